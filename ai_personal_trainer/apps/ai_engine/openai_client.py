@@ -178,7 +178,10 @@ import logging
 from django.conf import settings
 from django.utils.translation import gettext as _
 import json
+import time
 import tiktoken
+from apps.core.instrumentation import TimedHTTPClient
+from apps.core.usage import record_usage
 
 logger = logging.getLogger(__name__)
 
@@ -187,20 +190,41 @@ class OpenAIClient:
     
     def __init__(self):
         openai.api_key = settings.OPENAI_API_KEY
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY, http_client=TimedHTTPClient('openai'))
         self.model = "gpt-4o-mini"  # Cost-effective model
         self.max_tokens = 1000
         self.temperature = 0.7
     
-    def generate_response(self, message, system_prompt, user_context=None, language='en'):
-        """Generate conversational response for user messages"""
+    def _complete(self, endpoint, user_id=None, **kwargs):
+        """chat.completions.create, recording latency and token usage (per user) for APIUsageLog"""
+        started = time.monotonic()
+        try:
+            response = self.client.chat.completions.create(**kwargs)
+        except Exception as e:
+            record_usage('openai', endpoint, getattr(e, 'status_code', None) or 0, started,
+                         model=kwargs.get('model'), user_id=user_id)
+            raise
+        
+        usage = getattr(response, 'usage', None)
+        record_usage(
+            'openai', endpoint, 200, started,
+            prompt_tokens=getattr(usage, 'prompt_tokens', None),
+            completion_tokens=getattr(usage, 'completion_tokens', None),
+            model=kwargs.get('model'),
+            user_id=user_id
+        )
+        return response
+    
+    def generate_response(self, message, system_prompt, user_context=None, language='en', user_id=None,
+                          raise_on_error=False):
+        """Generate conversational response for user messages (``raise_on_error``: no canned fallback)"""
         try:
             messages = [
                 {"role": "system", "content": self._build_system_message(system_prompt, user_context, language)},
                 {"role": "user", "content": message}
             ]
             
-            response = self.client.chat.completions.create(
+            response = self._complete('generate_response', user_id=user_id,
                 model=self.model,
                 messages=messages,
                 max_tokens=self.max_tokens,
@@ -213,9 +237,11 @@ class OpenAIClient:
             
         except Exception as e:
             logger.error(f"Error generating OpenAI response: {str(e)}")
+            if raise_on_error:
+                raise
             return _("I'm experiencing some technical difficulties. Please try again in a moment.")
     
-    def generate_workout_plan(self, user_data):
+    def generate_workout_plan(self, user_data, user_id=None):
         """Generate personalized workout plan"""
         try:
             system_prompt = self._get_workout_plan_prompt(user_data['language'])
@@ -226,7 +252,7 @@ class OpenAIClient:
                 {"role": "user", "content": user_prompt}
             ]
             
-            response = self.client.chat.completions.create(
+            response = self._complete('generate_workout_plan', user_id=user_id,
                 model=self.model,
                 messages=messages,
                 max_tokens=2000,
@@ -241,7 +267,7 @@ class OpenAIClient:
             logger.error(f"Error generating workout plan: {str(e)}")
             return self._get_fallback_workout_plan()
     
-    def generate_nutrition_plan(self, user_data):
+    def generate_nutrition_plan(self, user_data, user_id=None):
         """Generate personalized nutrition plan"""
         try:
             system_prompt = self._get_nutrition_plan_prompt(user_data['language'])
@@ -252,7 +278,7 @@ class OpenAIClient:
                 {"role": "user", "content": user_prompt}
             ]
             
-            response = self.client.chat.completions.create(
+            response = self._complete('generate_nutrition_plan', user_id=user_id,
                 model=self.model,
                 messages=messages,
                 max_tokens=2000,
@@ -266,7 +292,7 @@ class OpenAIClient:
             logger.error(f"Error generating nutrition plan: {str(e)}")
             return self._get_fallback_nutrition_plan()
     
-    def analyze_progress(self, user_data, progress_data):
+    def analyze_progress(self, user_data, progress_data, user_id=None):
         """Analyze user progress and provide insights"""
         try:
             system_prompt = self._get_progress_analysis_prompt(user_data['language'])
@@ -277,7 +303,7 @@ class OpenAIClient:
                 {"role": "user", "content": user_prompt}
             ]
             
-            response = self.client.chat.completions.create(
+            response = self._complete('analyze_progress', user_id=user_id,
                 model=self.model,
                 messages=messages,
                 max_tokens=1500,
@@ -290,7 +316,7 @@ class OpenAIClient:
             logger.error(f"Error analyzing progress: {str(e)}")
             return _("Your progress looks good! Keep up the great work!")
     
-    def generate_motivational_message(self, user_data, context="general"):
+    def generate_motivational_message(self, user_data, context="general", user_id=None):
         """Generate personalized motivational message"""
         try:
             system_prompt = self._get_motivational_prompt(user_data['language'])
@@ -301,7 +327,7 @@ class OpenAIClient:
                 {"role": "user", "content": user_prompt}
             ]
             
-            response = self.client.chat.completions.create(
+            response = self._complete('generate_motivational_message', user_id=user_id,
                 model=self.model,
                 messages=messages,
                 max_tokens=300,
@@ -314,6 +340,46 @@ class OpenAIClient:
             logger.error(f"Error generating motivational message: {str(e)}")
             return _("You've got this! Every step counts towards your goals! 💪")
     
+    def generate_motivational_pool(self, context="general", goal_bucket="", count=20):
+        """Generate a pool of reusable English/Spanish motivational messages in one call.
+
+        Messages address the user as ``{name}`` so one pool serves every user
+        in the (context, goal) group. Returns a list of {"en": ..., "es": ...}.
+        """
+        try:
+            goal_info = {
+                'lose': 'Users are working to lose weight',
+                'gain': 'Users are working to gain weight or build muscle',
+                'maintain': 'Users are maintaining their weight and building habits',
+            }
+            
+            user_prompt = "\n".join(filter(None, [
+                f"Write {count} different motivational messages.",
+                f"Context: {context}",
+                goal_info.get(goal_bucket),
+                "Address the user as {name}. Give each message in English and Spanish.",
+                'Return JSON: {"messages": [{"en": "...", "es": "..."}]}',
+            ]))
+            
+            messages = [
+                {"role": "system", "content": self._get_motivational_prompt('en')},
+                {"role": "user", "content": user_prompt}
+            ]
+            
+            response = self._complete('generate_motivational_pool', model=self.model,
+                messages=messages,
+                max_tokens=150 * count,
+                temperature=0.9,  # Variety across the pool
+                response_format={"type": "json_object"}
+            )
+            
+            pool = json.loads(response.choices[0].message.content).get('messages', [])
+            return [item for item in pool if isinstance(item, dict) and item.get('en')]
+            
+        except Exception as e:
+            logger.error(f"Error generating motivational message pool: {str(e)}")
+            return []
+    
     def _build_system_message(self, system_prompt, user_context, language):
         """Build system message with user context"""
         base_message = system_prompt
@@ -178,6 +178,7 @@ from django.utils.translation import gettext as _
 from django.utils import timezone
 from apps.users.models import WorkoutPlan, NutritionPlan, UserProfile
 from apps.ai_engine.openai_client import OpenAIClient
+from apps.chatbot.queries import active_plans, recent_weights
 import json
 
 logger = logging.getLogger(__name__)
@@ -195,7 +196,7 @@ class PlanGenerator:
             user_data = self._build_user_data(user)
             
             # Generate plan with AI
-            plan_data = self.openai_client.generate_workout_plan(user_data)
+            plan_data = self.openai_client.generate_workout_plan(user_data, user_id=user.id)
             
             # Determine difficulty based on activity level
             difficulty = self._determine_workout_difficulty(user.activity_level)
@@ -240,7 +241,7 @@ class PlanGenerator:
             })
             
             # Generate plan with AI
-            plan_data = self.openai_client.generate_nutrition_plan(user_data)
+            plan_data = self.openai_client.generate_nutrition_plan(user_data, user_id=user.id)
             
             # Create nutrition plan object
             nutrition_plan = NutritionPlan.objects.create(
@@ -271,7 +272,7 @@ class PlanGenerator:
     def update_workout_plan(self, user, progress_data=None):
         """Update workout plan based on progress"""
         try:
-            current_plan = user.workout_plans.filter(is_active=True).first()
+            current_plan = active_plans(WorkoutPlan, user.id).first()
             if not current_plan:
                 return self.generate_workout_plan(user)
             
@@ -281,7 +282,7 @@ class PlanGenerator:
                 user_data.update(progress_data)
             
             # Generate updated plan
-            updated_plan_data = self.openai_client.generate_workout_plan(user_data)
+            updated_plan_data = self.openai_client.generate_workout_plan(user_data, user_id=user.id)
             
             # Create new plan version
             new_plan = WorkoutPlan.objects.create(
@@ -308,7 +309,7 @@ class PlanGenerator:
     def update_nutrition_plan(self, user, progress_data=None):
         """Update nutrition plan based on progress"""
         try:
-            current_plan = user.nutrition_plans.filter(is_active=True).first()
+            current_plan = active_plans(NutritionPlan, user.id).first()
             if not current_plan:
                 return self.generate_nutrition_plan(user)
             
@@ -327,7 +328,7 @@ class PlanGenerator:
                 user_data.update(progress_data)
             
             # Generate updated plan
-            updated_plan_data = self.openai_client.generate_nutrition_plan(user_data)
+            updated_plan_data = self.openai_client.generate_nutrition_plan(user_data, user_id=user.id)
             
             # Create new plan version
             new_plan = NutritionPlan.objects.create(
@@ -383,11 +384,11 @@ class PlanGenerator:
             })
         
         # Add recent weight data
-        recent_weights = user.weight_entries.order_by('-date_recorded')[:5]
-        if recent_weights:
+        weights = recent_weights(user.id)
+        if weights:
             user_data['recent_weights'] = [
                 {'weight': entry.weight, 'date': str(entry.date_recorded)}
-                for entry in recent_weights
+                for entry in weights
             ]
         
         return user_data
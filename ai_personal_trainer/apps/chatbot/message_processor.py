@@ -174,16 +174,23 @@ Start a new conversation
 
 # apps/chatbot/message_processor.py
 import re
+import hashlib
 import logging
+from django.core.cache import cache
 from django.utils.translation import gettext as _
 from django.utils.translation import activate
 from django.utils import timezone
-from apps.users.models import User, ProgressEntry, WeightEntry
-from apps.chatbot.models import Conversation, OnboardingSession
+from apps.users.models import User, ProgressEntry, WeightEntry, WorkoutPlan, NutritionPlan
+from apps.users.rollups import get_rollup
+from apps.chatbot.models import OnboardingSession
+from apps.chatbot.queries import active_conversations, active_plans, recent_messages
 from apps.ai_engine.openai_client import OpenAIClient
 from apps.ai_engine.plan_generator import PlanGenerator
 from apps.chatbot.whatsapp_handler import WhatsAppMessageBuilder
 from apps.notifications.tasks import send_motivational_message
+from apps.notifications.scheduler import schedule_notification
+from apps.core.db_routers import replica_reads
+from apps.core.quotas import get_quota_service
 from celery import shared_task
 import json
 
@@ -509,16 +516,12 @@ class MessageProcessor:
                 weight_entry.weight = weight
                 weight_entry.save()
             
-            # Calculate weight change
-            previous_entries = WeightEntry.objects.filter(
-                user=self.user,
-                date_recorded__lt=timezone.now().date()
-            ).order_by('-date_recorded')[:1]
+            # Calculate weight change (the save above already updated the rollup)
+            rollup = get_rollup(self.user)
             
             change_text = ""
-            if previous_entries:
-                prev_weight = previous_entries[0].weight
-                change = weight - prev_weight
+            if rollup.last_weigh_in == weight_entry.date_recorded and rollup.previous_weight is not None:
+                change = weight - rollup.previous_weight
                 if change > 0:
                     change_text = f" (+{change:.1f}kg from last entry)"
                 elif change < 0:
@@ -584,26 +587,61 @@ class MessageProcessor:
     def _generate_ai_response(self, message, context='general', system_prompt=None):
         """Generate AI response using OpenAI"""
         try:
-            # Build context for AI
-            user_context = self._build_user_context()
-            
-            if not system_prompt:
-                system_prompt = self._get_system_prompt(context)
+            # Quota first: one counter round trip, before any context is built
+            quotas = get_quota_service()
+            decision = quotas.check(self.user.id)
+            if not decision.allowed:
+                logger.info(f"AI quota ({decision.scope}) reached for user {self.user.id}: {decision.used}/{decision.limit}")
+                return self._over_quota_response(message, context)
             
-            # Generate response
-            response = self.openai_client.generate_response(
-                message=message,
-                system_prompt=system_prompt,
-                user_context=user_context,
-                language=self.user.preferred_language
-            )
+            try:
+                # Build context for AI
+                user_context = self._build_user_context()
+                
+                if not system_prompt:
+                    system_prompt = self._get_system_prompt(context)
+                
+                # Generate response
+                response = self.openai_client.generate_response(
+                    message=message,
+                    system_prompt=system_prompt,
+                    user_context=user_context,
+                    language=self.user.preferred_language,
+                    user_id=self.user.id,
+                    raise_on_error=True
+                )
+            except Exception:
+                # Nothing was generated, so the message doesn't count against the quota
+                quotas.refund(self.user.id, decision)
+                raise
             
+            cache.set(self._answer_cache_key(message), response, timeout=60 * 60 * 24 * 7)
             return response
             
         except Exception as e:
             logger.error(f"Error generating AI response: {str(e)}")
             return _("I'm here to help! Could you please rephrase your question? 🤖")
     
+    def _answer_cache_key(self, message):
+        # Per user: answers are personalised, never shared between users
+        digest = hashlib.sha1(' '.join(message.lower().split()).encode('utf-8')).hexdigest()
+        return f"ai_answer:{self.user.id}:{self.user.preferred_language}:{digest}"
+    
+    def _over_quota_response(self, message, context):
+        """Degraded reply once the AI quota is used up: a cached answer, else a template"""
+        cached = cache.get(self._answer_cache_key(message))
+        if cached:
+            return cached
+        
+        tips = {
+            'workout': _("Stick with your current workout plan today and focus on good form over heavy weights. 💪"),
+            'nutrition': _("Build your next meal around a lean protein, plenty of vegetables and a glass of water. 🥗"),
+            'progress': _("You can still log your weight by sending it as a number, e.g. '72.5 kg'. 📊"),
+            'motivation': _("Progress isn't always linear - showing up today is what counts. You've got this! 🌟"),
+        }
+        tip = tips.get(context, _("Keep following your plan and stay hydrated. 💧"))
+        return _("You've reached your AI coaching limit for now, so here's a quick tip instead:\n\n{tip}\n\nType 'menu' to see everything else I can help with!").format(tip=tip)
+    
     def _build_user_context(self):
         """Build user context for AI"""
         context = {
@@ -621,14 +659,16 @@ class MessageProcessor:
         }
         
         # Add recent progress data
-        recent_weight = WeightEntry.objects.filter(user=self.user).order_by('-date_recorded').first()
-        if recent_weight:
-            context['recent_weight'] = recent_weight.weight
-            context['last_weigh_in'] = recent_weight.date_recorded
+        rollup = get_rollup(self.user)
+        if rollup.last_weigh_in:
+            context['recent_weight'] = rollup.latest_weight
+            context['last_weigh_in'] = rollup.last_weigh_in
+            context['weight_change_30d'] = rollup.weight_change_30d
+        context['workout_streak'] = rollup.current_streak()
         
         # Add current plans info
-        active_workout = self.user.workout_plans.filter(is_active=True).first()
-        active_nutrition = self.user.nutrition_plans.filter(is_active=True).first()
+        active_workout = active_plans(WorkoutPlan, self.user.id).first()
+        active_nutrition = active_plans(NutritionPlan, self.user.id).first()
         
         if active_workout:
             context['has_workout_plan'] = True
@@ -761,10 +801,11 @@ Type "view plans" to see the details, or ask me any questions! 💪""").format(
             protein=nutrition_plan.daily_protein
         )
         
-        whatsapp_client.send_message(user.whatsapp_number, message)
+        whatsapp_client.send_message(user.whatsapp_number, message, user_id=user.id)
         
         # Schedule first motivational message
-        send_motivational_message.apply_async(
+        schedule_notification(
+            send_motivational_message,
             args=[user_id],
             countdown=3600  # Send after 1 hour
         )
@@ -783,23 +824,18 @@ class ConversationManager:
     
     def get_recent_context(self, limit=10):
         """Get recent conversation context"""
-        conversations = Conversation.objects.filter(
-            user=self.user,
-            is_active=True
-        ).prefetch_related('messages')
-        
-        recent_messages = []
-        for conversation in conversations:
-            messages = conversation.messages.order_by('-created_at')[:limit]
-            for message in reversed(messages):
-                recent_messages.append({
-                    'sender': message.sender_type,
-                    'content': message.content,
-                    'timestamp': message.created_at,
-                    'type': message.message_type
-                })
-        
-        return sorted(recent_messages, key=lambda x: x['timestamp'])[-limit:]
+        context = []
+        with replica_reads():
+            for conversation in active_conversations(self.user.id):
+                for message in reversed(recent_messages(conversation.id, limit)):
+                    context.append({
+                        'sender': message.sender_type,
+                        'content': message.content,
+                        'timestamp': message.created_at,
+                        'type': message.message_type
+                    })
+        
+        return sorted(context, key=lambda x: x['timestamp'])[-limit:]
     
     def summarize_conversation(self):
         """Generate conversation summary for context"""
@@ -178,6 +178,7 @@ from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from apps.users.models import User
 import uuid
+from apps.core.sharding import ShardedManager
 
 class Conversation(models.Model):
     """Chat conversation between user and AI assistant"""
@@ -203,6 +204,9 @@ class APIUsageLog(models.Model):
     execution_time = models.FloatField(help_text=_('Execution time in seconds'))
     created_at = models.DateTimeField(auto_now_add=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('API Usage Log')
         verbose_name_plural = _('API Usage Logs')
@@ -234,6 +238,34 @@ class SystemConfiguration(models.Model):
         return f"{self.key}: {self.value[:50]}"
 
 
+class ShardMoveRecord(models.Model):
+    """Row copied by ``rebalance_shards``: its pk on the source and on the target.
+
+    Written on the target in the same transaction as the copy and removed
+    once the source rows are gone, so an interrupted move resumes with the
+    rows it already wrote. Not sharded and no foreign key to the user, so
+    it is never moved or cascaded itself.
+    """
+    
+    user_id = models.BigIntegerField()
+    source = models.CharField(max_length=100)
+    model_label = models.CharField(max_length=100)
+    source_pk = models.CharField(max_length=64)
+    target_pk = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('Shard Move Record')
+        verbose_name_plural = _('Shard Move Records')
+        unique_together = ['source', 'model_label', 'source_pk']
+        indexes = [
+            models.Index(fields=['user_id', 'source']),
+        ]
+    
+    def __str__(self):
+        return f"{self.model_label} {self.source}:{self.source_pk} -> {self.target_pk}"
+
+
 class UserSession(models.Model):
     """Track user sessions and activity"""
     
@@ -254,6 +286,9 @@ class UserSession(models.Model):
     is_active = models.BooleanField(default=True)
     messages_count = models.IntegerField(default=0)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('User Session')
         verbose_name_plural = _('User Sessions')
@@ -291,6 +326,9 @@ class Milestone(models.Model):
     is_celebrated = models.BooleanField(default=False)
     celebrated_at = models.DateTimeField(null=True, blank=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Milestone')
         verbose_name_plural = _('Milestones')
@@ -333,6 +371,9 @@ class FeedbackEntry(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Feedback Entry')
         verbose_name_plural = _('Feedback Entries')
@@ -375,10 +416,21 @@ class WorkoutSession(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Workout Session')
         verbose_name_plural = _('Workout Sessions')
         ordering = ['-date', '-created_at']
+        indexes = [
+            # Streak and workout-count reads only look at completed sessions
+            models.Index(
+                fields=['user', '-date'],
+                condition=models.Q(is_completed=True),
+                name='workoutsession_done_user_date'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.date}"
@@ -413,6 +465,9 @@ class NutritionEntry(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Nutrition Entry')
         verbose_name_plural = _('Nutrition Entries')
@@ -555,6 +610,9 @@ class DataExport(models.Model):
     processed_at = models.DateTimeField(null=True, blank=True)
     downloaded_at = models.DateTimeField(null=True, blank=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Data Export')
         verbose_name_plural = _('Data Exports')
@@ -567,10 +625,20 @@ class DataExport(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Conversation')
         verbose_name_plural = _('Conversations')
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(
+                fields=['user', '-updated_at'],
+                condition=models.Q(is_active=True),
+                name='conversation_active_user'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.title}"
@@ -603,10 +671,16 @@ class Message(models.Model):
     timestamp = models.DateTimeField(default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    shard_key = 'conversation'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Message')
         verbose_name_plural = _('Messages')
         ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['conversation', 'created_at']),
+        ]
     
     def __str__(self):
         return f"{self.sender_type}: {self.content[:50]}..."
@@ -632,6 +706,9 @@ class OnboardingSession(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Onboarding Session')
         verbose_name_plural = _('Onboarding Sessions')
@@ -676,12 +753,15 @@ class NotificationLog(models.Model):
     metadata = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Notification Log')
         verbose_name_plural = _('Notification Logs')
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['user', 'notification_type']),
+            models.Index(fields=['user', 'notification_type', 'created_at']),
             models.Index(fields=['status']),
             models.Index(fields=['scheduled_for']),
         ]
@@ -702,9 +782,22 @@ class MotivationalMessage(models.Model):
         ('challenge', _('Challenge')),
     ]
     
+    GOAL_BUCKET_CHOICES = [
+        ('lose', _('Lose weight')),
+        ('gain', _('Gain weight')),
+        ('maintain', _('Maintain weight')),
+    ]
+    
     content_en = models.TextField(help_text=_('Message in English'))
     content_es = models.TextField(help_text=_('Message in Spanish'))
     context = models.CharField(max_length=20, choices=CONTEXT_CHOICES, default='general')
+    goal_bucket = models.CharField(
+        max_length=20,
+        choices=GOAL_BUCKET_CHOICES,
+        blank=True,
+        help_text=_('Leave blank for messages that suit any goal')
+    )
+    is_generated = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     usage_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -712,6 +805,9 @@ class MotivationalMessage(models.Model):
     class Meta:
         verbose_name = _('Motivational Message')
         verbose_name_plural = _('Motivational Messages')
+        indexes = [
+            models.Index(fields=['context', 'is_active']),
+        ]
     
     def __str__(self):
         return f"{self.get_context_display()}: {self.content_en[:50]}..."
@@ -737,6 +833,9 @@ class WeeklyReport(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Weekly Report')
         verbose_name_plural = _('Weekly Reports')
@@ -760,6 +859,9 @@ class MonthlyReport(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Monthly Report')
         verbose_name_plural = _('Monthly Reports')
@@ -0,0 +1,35 @@
+# apps/chatbot/queries.py
+from apps.users.models import WeightEntry, WorkoutPlan, NutritionPlan
+from apps.chatbot.models import Conversation, Message
+from apps.core.query_shapes import hot_query
+
+# Per-message reads of the chatbot. Call sites use these builders and the
+# plan audit explains them, so both always see the same SQL.
+
+
+def _first(queryset):
+    return queryset.first()
+
+
+@hot_query('conversation_active', sample=lambda user_id, conversation_id: (user_id,), evaluate=_first)
+def active_conversations(user_id):
+    return Conversation.objects.filter(user_id=user_id, is_active=True)
+
+
+@hot_query('message_recent_by_conversation', sample=lambda user_id, conversation_id: (conversation_id,))
+def recent_messages(conversation_id, limit=10):
+    """The conversation's last ``limit`` messages, newest first"""
+    return Message.objects.filter(conversation_id=conversation_id).order_by('-created_at')[:limit]
+
+
+@hot_query('workout_plan_active', sample=lambda user_id, conversation_id: (WorkoutPlan, user_id), evaluate=_first)
+@hot_query('nutrition_plan_active', sample=lambda user_id, conversation_id: (NutritionPlan, user_id), evaluate=_first)
+def active_plans(model, user_id):
+    """Active ``WorkoutPlan`` / ``NutritionPlan`` rows of a user"""
+    return model.objects.filter(user_id=user_id, is_active=True)
+
+
+@hot_query('weight_recent_by_user', sample=lambda user_id, conversation_id: (user_id,))
+def recent_weights(user_id, limit=5):
+    """The user's last ``limit`` weigh-ins, newest first"""
+    return WeightEntry.objects.filter(user_id=user_id).order_by('-date_recorded')[:limit]
@@ -1,6 +1,7 @@
 # apps/chatbot/whatsapp_handler.py
 import json
 import logging
+import time
 import requests
 from django.conf import settings
 from django.http import HttpResponse, HttpResponseBadRequest
@@ -15,12 +16,18 @@ from rest_framework import status
 from apps.users.models import User
 from apps.chatbot.message_processor import MessageProcessor
 from apps.chatbot.models import Conversation, Message
+from apps.chatbot.queries import active_conversations
 from apps.core.utils import get_or_create_user_by_whatsapp
+from apps.core.instrumentation import InstrumentedViewMixin, TimedSession
+from apps.core.ratelimit import get_rate_limiter, rate_limit_exempt
+from apps.core.usage import record_usage
 from celery import shared_task
 
 logger = logging.getLogger(__name__)
 
-class WhatsAppWebhookView(APIView):
+# Every delivery comes from Meta's addresses; limited per sender in process_whatsapp_message
+@rate_limit_exempt
+class WhatsAppWebhookView(InstrumentedViewMixin, APIView):
     """Handle WhatsApp webhook events"""
     
     def get(self, request):
@@ -67,6 +74,16 @@ def process_whatsapp_message(message_data, metadata):
         message_type = message_data.get('type')
         timestamp = message_data.get('timestamp')
         
+        # Drop floods from one number before any DB or OpenAI work
+        allowed, retry_after = get_rate_limiter('whatsapp_number').allow(from_number)
+        if not allowed:
+            logger.warning(f"Rate limited WhatsApp messages from {from_number} (retry in {retry_after:.0f}s)")
+            if get_rate_limiter('whatsapp_notice').allow(from_number)[0]:
+                WhatsAppClient().send_message(
+                    from_number, _("You're sending messages faster than I can answer. Give me a moment and try again.")
+                )
+            return
+        
         # Get or create user
         user = get_or_create_user_by_whatsapp(from_number)
         
@@ -103,7 +120,7 @@ def process_whatsapp_message(message_data, metadata):
         
         # Send response via WhatsApp
         whatsapp_client = WhatsAppClient()
-        whatsapp_client.send_message(from_number, response)
+        whatsapp_client.send_message(from_number, response, user_id=user.id)
         
         # Update user activity
         user.update_last_active()
@@ -142,11 +159,9 @@ def extract_message_content(message_data):
 
 def get_or_create_conversation(user):
     """Get or create active conversation for user"""
-    conversation, created = Conversation.objects.get_or_create(
-        user=user,
-        is_active=True,
-        defaults={'title': _('WhatsApp Chat')}
-    )
+    conversation = active_conversations(user.id).first()
+    if conversation is None:
+        conversation = Conversation.objects.create(user=user, is_active=True, title=_('WhatsApp Chat'))
     return conversation
 
 
@@ -161,8 +176,21 @@ class WhatsAppClient:
             'Authorization': f'Bearer {self.access_token}',
             'Content-Type': 'application/json'
         }
+        # Pooled connections; time spent here is reported as external HTTP time
+        self.session = TimedSession('whatsapp')
+    
+    def _post(self, url, payload, timeout=10, user_id=None):
+        """POST to the Graph API, recording latency and status for APIUsageLog"""
+        started = time.monotonic()
+        status_code = 0
+        try:
+            response = self.session.post(url, headers=self.headers, json=payload, timeout=timeout)
+            status_code = response.status_code
+            return response
+        finally:
+            record_usage('whatsapp', url.rsplit('/', 1)[-1], status_code, started, user_id=user_id)
     
-    def send_message(self, to_number, message, message_type='text'):
+    def send_message(self, to_number, message, message_type='text', user_id=None):
         """Send message to WhatsApp number"""
         try:
             url = f"{self.base_url}/messages"
@@ -188,7 +216,7 @@ class WhatsAppClient:
                     "text": {"body": str(message)}
                 }
             
-            response = requests.post(url, headers=self.headers, json=payload, timeout=10)
+            response = self._post(url, payload, timeout=10, user_id=user_id)
             response.raise_for_status()
             
             logger.info(f"Message sent successfully to {to_number}")
@@ -198,7 +226,7 @@ class WhatsAppClient:
             logger.error(f"Error sending WhatsApp message to {to_number}: {str(e)}")
             raise
     
-    def send_interactive_buttons(self, to_number, text, buttons):
+    def send_interactive_buttons(self, to_number, text, buttons, user_id=None):
         """Send interactive buttons message"""
         try:
             url = f"{self.base_url}/messages"
@@ -225,7 +253,7 @@ class WhatsAppClient:
                 }
             }
             
-            response = requests.post(url, headers=self.headers, json=payload, timeout=10)
+            response = self._post(url, payload, timeout=10, user_id=user_id)
             response.raise_for_status()
             
             return response.json()
@@ -233,9 +261,11 @@ class WhatsAppClient:
         except Exception as e:
             logger.error(f"Error sending interactive buttons: {str(e)}")
             # Fallback to regular text message
-            return self.send_message(to_number, f"{text}\n\n" + "\n".join([f"{i+1}. {btn}" for i, btn in enumerate(buttons)]))
+            return self.send_message(
+                to_number, f"{text}\n\n" + "\n".join([f"{i+1}. {btn}" for i, btn in enumerate(buttons)]), user_id=user_id
+            )
     
-    def send_interactive_list(self, to_number, text, options):
+    def send_interactive_list(self, to_number, text, options, user_id=None):
         """Send interactive list message"""
         try:
             url = f"{self.base_url}/messages"
@@ -266,7 +296,7 @@ class WhatsAppClient:
                 }
             }
             
-            response = requests.post(url, headers=self.headers, json=payload, timeout=10)
+            response = self._post(url, payload, timeout=10, user_id=user_id)
             response.raise_for_status()
             
             return response.json()
@@ -275,9 +305,9 @@ class WhatsAppClient:
             logger.error(f"Error sending interactive list: {str(e)}")
             # Fallback to regular text message
             option_text = "\n".join([f"{i+1}. {opt}" for i, opt in enumerate(options)])
-            return self.send_message(to_number, f"{text}\n\n{option_text}")
+            return self.send_message(to_number, f"{text}\n\n{option_text}", user_id=user_id)
     
-    def send_document(self, to_number, document_url, filename, caption=""):
+    def send_document(self, to_number, document_url, filename, caption="", user_id=None):
         """Send document via WhatsApp"""
         try:
             url = f"{self.base_url}/messages"
@@ -293,7 +323,7 @@ class WhatsAppClient:
                 }
             }
             
-            response = requests.post(url, headers=self.headers, json=payload, timeout=30)
+            response = self._post(url, payload, timeout=30, user_id=user_id)
             response.raise_for_status()
             
             return response.json()
@@ -339,7 +369,7 @@ class WhatsAppClient:
                 "message_id": message_id
             }
             
-            response = requests.post(url, headers=self.headers, json=payload, timeout=10)
+            response = self._post(url, payload, timeout=10)
             response.raise_for_status()
             
             return response.json()
@@ -0,0 +1,21 @@
+# apps/core/admin.py
+from apps.core.db_routers import replica_reads
+
+
+class ReplicaReadAdminMixin:
+    """Serve admin changelist pages from the read replica.
+
+    Only GET listings are routed; change forms and bulk actions keep using the
+    primary so admins never edit a stale row.
+    """
+    
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'GET':
+            return super().changelist_view(request, extra_context)
+        
+        with replica_reads():
+            response = super().changelist_view(request, extra_context)
+            # Changelist querysets are lazy; render inside the replica scope
+            if hasattr(response, 'render'):
+                response.render()
+        return response
@@ -0,0 +1,11 @@
+# apps/core/apps.py
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.core'
+    
+    def ready(self):
+        from apps.core import signals  # noqa: F401
+        from apps.core import instrumentation  # noqa: F401
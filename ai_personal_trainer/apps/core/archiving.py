@@ -0,0 +1,101 @@
+# apps/core/archiving.py
+import gzip
+import io
+import json
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Longest dedup window used by the notification fan-outs (re-engagement looks
+# back 7 days). Hot tables always keep at least this much history.
+MIN_HOT_RETENTION_DAYS = 8
+
+
+class ColdStorageArchiver:
+    """Move rows older than ``retention_days`` out of a hot log table.
+
+    Rows are written as gzip JSONL objects under
+    ``archive/<table>/<db alias>/YYYY/MM/DD/<first pk>-<last pk>.jsonl.gz`` and
+    then deleted, keeping the hot table (and the dedup queries that scan it)
+    small. Files are immutable and named by pk range, so a run interrupted
+    between upload and delete just rewrites the same object next time.
+    """
+    
+    def __init__(self, model, retention_days, date_field='created_at', batch_size=5000,
+                 storage=None, prefix='archive'):
+        self.model = model
+        self.retention_days = max(retention_days, MIN_HOT_RETENTION_DAYS)
+        self.date_field = date_field
+        self.batch_size = batch_size
+        self.storage = storage or default_storage
+        self.prefix = prefix
+    
+    def archive(self, using='default', now=None):
+        """Archive every row older than the retention window; returns rows moved"""
+        cutoff = (now or timezone.now()) - timedelta(days=self.retention_days)
+        table = self.model._meta.db_table
+        archived = 0
+        
+        while True:
+            rows = list(
+                self.model.objects.using(using)
+                .filter(**{f'{self.date_field}__lt': cutoff})
+                .order_by('pk')
+                .values()[:self.batch_size]
+            )
+            if not rows:
+                break
+            
+            for day, day_rows in self._group_by_day(rows).items():
+                self._write_batch(table, using, day, day_rows)
+            
+            with transaction.atomic(using=using):
+                self.model.objects.using(using).filter(pk__in=[row['id'] for row in rows]).delete()
+            
+            archived += len(rows)
+            if len(rows) < self.batch_size:
+                break
+        
+        if archived:
+            logger.info(f"Archived {archived} rows from {table} on {using} older than {cutoff:%Y-%m-%d}")
+        return archived
+    
+    def _group_by_day(self, rows):
+        grouped = defaultdict(list)
+        for row in rows:
+            grouped[row[self.date_field].date()].append(row)
+        return grouped
+    
+    def _write_batch(self, table, using, day, rows):
+        """Write one immutable gzip JSONL object for a day's slice of a batch"""
+        path = (
+            f"{self.prefix}/{table}/{using}/{day:%Y/%m/%d}/"
+            f"{rows[0]['id']}-{rows[-1]['id']}.jsonl.gz"
+        )
+        
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode='wb') as gz:
+            for row in rows:
+                gz.write(json.dumps(row, cls=DjangoJSONEncoder).encode('utf-8'))
+                gz.write(b'\n')
+        
+        if self.storage.exists(path):
+            self.storage.delete(path)
+        self.storage.save(path, ContentFile(buffer.getvalue()))
+        return path
+
+
+def read_archive(path, storage=None):
+    """Yield archived rows back as dicts (for audits and GDPR exports)"""
+    storage = storage or default_storage
+    with storage.open(path, 'rb') as fh:
+        with gzip.GzipFile(fileobj=fh) as gz:
+            for line in gz:
+                yield json.loads(line)
@@ -0,0 +1,230 @@
+# apps/core/instrumentation.py
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+import httpx
+import requests
+from celery.signals import task_prerun, task_postrun
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+metrics_logger = logging.getLogger('apps.metrics')
+
+DEFAULT_BUDGET = {
+    'queries': 100,
+    'repeated_queries': 20,  # same SQL issued this often in one unit smells like N+1
+    'db_ms': 1000,
+    'http_ms': 10000,
+    'wall_ms': 30000,
+}
+
+_current = contextvars.ContextVar('instrumentation_measurement', default=None)
+
+
+def get_budget(name):
+    """Budget for a task or view: DEFAULT_BUDGET overridden by INSTRUMENTATION_BUDGETS"""
+    budgets = getattr(settings, 'INSTRUMENTATION_BUDGETS', {})
+    budget = dict(DEFAULT_BUDGET)
+    budget.update(budgets.get('default', {}))
+    budget.update(budgets.get(name, {}))
+    return budget
+
+
+class Measurement:
+    """Queries, DB time, external HTTP time and wall time of one task run or request"""
+    
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.queries = 0
+        self.db_time = 0.0
+        self.http_calls = Counter()
+        self.http_time = 0.0
+        self.statements = Counter()
+        self.started = time.monotonic()
+        self.wall_time = None
+        # Worker threads attached to this measurement report concurrently
+        self._lock = threading.Lock()
+    
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook: count and time every query
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self.db_time += elapsed
+                self.queries += 1
+                self.statements[sql] += 1
+    
+    def record_http(self, service, elapsed):
+        with self._lock:
+            self.http_calls[service] += 1
+            self.http_time += elapsed
+    
+    def finish(self):
+        self.wall_time = time.monotonic() - self.started
+    
+    def as_dict(self):
+        most_repeated = self.statements.most_common(1)
+        return {
+            'kind': self.kind,
+            'name': self.name,
+            'queries': self.queries,
+            'repeated_queries': most_repeated[0][1] if most_repeated else 0,
+            'db_ms': round(self.db_time * 1000, 1),
+            'http_calls': dict(self.http_calls),
+            'http_ms': round(self.http_time * 1000, 1),
+            'wall_ms': round((self.wall_time or 0) * 1000, 1),
+        }
+    
+    def over_budget(self, data):
+        budget = get_budget(self.name)
+        return {key: data[key] for key, limit in budget.items() if limit is not None and data[key] > limit}
+
+
+def emit(measurement):
+    """Log the measurement as one JSON line; over-budget runs are logged as warnings"""
+    data = measurement.as_dict()
+    exceeded = measurement.over_budget(data)
+    if exceeded:
+        data['over_budget'] = exceeded
+        if 'repeated_queries' in exceeded:
+            data['repeated_sql'] = measurement.statements.most_common(1)[0][0][:300]
+        metrics_logger.warning(json.dumps(data))
+    else:
+        metrics_logger.info(json.dumps(data))
+    return data
+
+
+def start(kind, name):
+    """Begin measuring on every database connection; returns a handle for ``stop``"""
+    measurement = Measurement(kind, name)
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(measurement))
+    token = _current.set(measurement)
+    return measurement, stack, token
+
+
+def stop(handle):
+    measurement, stack, token = handle
+    stack.close()
+    _current.reset(token)
+    measurement.finish()
+    if getattr(settings, 'INSTRUMENTATION_ENABLED', True):
+        emit(measurement)
+    return measurement
+
+
+@contextmanager
+def measure(kind, name):
+    handle = start(kind, name)
+    try:
+        yield handle[0]
+    finally:
+        stop(handle)
+
+
+def current_measurement():
+    """Measurement of the task or request running in this context, or None"""
+    return _current.get()
+
+
+@contextmanager
+def attached(measurement):
+    """Count this thread's queries and HTTP calls against ``measurement``.
+
+    Executor threads do not inherit the caller's context or connections, so
+    work handed off to them is invisible to its task unless attached here.
+    """
+    if measurement is None:
+        yield
+        return
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(measurement))
+        token = _current.set(measurement)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+
+def run_attached(measurement, func, *args):
+    """``func(*args)`` inside ``attached(measurement)``; for executor submissions"""
+    with attached(measurement):
+        return func(*args)
+
+
+@contextmanager
+def http_call(service):
+    """Time one external HTTP call against the current measurement (if any)"""
+    measurement = _current.get()
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        if measurement is not None:
+            measurement.record_http(service, time.monotonic() - started)
+
+
+class TimedSession(requests.Session):
+    """``requests`` session whose calls count as external HTTP time"""
+    
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+    
+    def request(self, *args, **kwargs):
+        with http_call(self.service):
+            return super().request(*args, **kwargs)
+
+
+class TimedHTTPClient(httpx.Client):
+    """``httpx`` client (as used by the OpenAI SDK) whose calls count as external HTTP time"""
+    
+    def __init__(self, service, **kwargs):
+        super().__init__(**kwargs)
+        self.service = service
+    
+    def send(self, request, **kwargs):
+        with http_call(self.service):
+            return super().send(request, **kwargs)
+
+
+class InstrumentedViewMixin:
+    """Measure every request a view handles"""
+    
+    def dispatch(self, request, *args, **kwargs):
+        with measure('request', f"{type(self).__name__}.{request.method}"):
+            return super().dispatch(request, *args, **kwargs)
+
+
+# Every Celery task is measured from prerun to postrun
+_running = {}
+
+
+@task_prerun.connect
+def start_task_measurement(task_id=None, task=None, **kwargs):
+    try:
+        _running[task_id] = start('task', task.name)
+    except Exception as e:
+        logger.error(f"Error starting task instrumentation: {str(e)}")
+
+
+@task_postrun.connect
+def stop_task_measurement(task_id=None, task=None, **kwargs):
+    handle = _running.pop(task_id, None)
+    if handle is None:
+        return
+    try:
+        stop(handle)
+    except Exception as e:
+        logger.error(f"Error recording task instrumentation: {str(e)}")
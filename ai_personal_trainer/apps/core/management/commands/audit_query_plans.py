@@ -0,0 +1,43 @@
+# apps/core/management/commands/audit_query_plans.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from apps.core.query_shapes import load_hot_queries, capture_queries, explain_query_plan, plan_problems
+
+
+class Command(BaseCommand):
+    help = 'Run every registered hot query shape and fail if SQLite plans any of them as a full scan'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, default=1, help='Sample user id bound into the queries')
+        parser.add_argument('--conversation-id', type=int, default=1)
+        parser.add_argument('--strict', action='store_true', help='Also fail on temp B-tree sorts')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plan of every query')
+    
+    def handle(self, *args, **options):
+        failures = []
+        hot_queries = load_hot_queries()
+        
+        for name, shape in hot_queries.items():
+            source = shape.source
+            queries = capture_queries(shape.run, options['user_id'], options['conversation_id'])
+            if not queries:
+                failures.append(f"{name}: issued no queries")
+                continue
+            
+            for alias, sql, params in queries:
+                if connections[alias].vendor != 'sqlite':
+                    raise CommandError(f"EXPLAIN QUERY PLAN needs SQLite; {alias} is {connections[alias].vendor}")
+                
+                plan = explain_query_plan(alias, sql, params)
+                problems = plan_problems(plan)
+                if not options['strict']:
+                    problems = [problem for problem in problems if problem.startswith('full scan')]
+                
+                if options['verbose_plans']:
+                    self.stdout.write(f"{name} ({source}):\n  {sql}\n  " + '\n  '.join(plan))
+                for problem in problems:
+                    failures.append(f"{name} ({source}): {problem}")
+        
+        if failures:
+            raise CommandError('Hot queries without a usable index:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS(f"All {len(hot_queries)} hot query shapes use an index"))
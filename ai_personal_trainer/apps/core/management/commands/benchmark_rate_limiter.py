@@ -0,0 +1,58 @@
+# apps/core/management/commands/benchmark_rate_limiter.py
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.core.ratelimit import LocalGCRA, RateLimiter
+
+
+class Command(BaseCommand):
+    help = 'Time per-check rate limiter overhead and simulate a message flood from one number'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=10000)
+        parser.add_argument('--flood', type=int, default=1000, help='messages sent by one number')
+        parser.add_argument('--flood-seconds', type=float, default=60.0, help='span the flood is spread over')
+    
+    def handle(self, *args, **options):
+        checks = options['checks']
+        limit, period, *burst = settings.RATE_LIMITS['whatsapp_number']
+        burst = burst[0] if burst else None
+        
+        local = LocalGCRA()
+        emission_ms = period * 1000.0 / limit
+        tolerance_ms = emission_ms * (burst or limit)
+        started = time.perf_counter()
+        for i in range(checks):
+            local.allow(f'bench:{i % 1000}', emission_ms, tolerance_ms)
+        self._report('local', checks, time.perf_counter() - started)
+        
+        limiter = RateLimiter('benchmark', limit, period, burst)
+        try:
+            limiter.redis.ping()
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"redis: skipped ({e})"))
+        else:
+            started = time.perf_counter()
+            for i in range(checks):
+                limiter.allow(f'bench:{i % 1000}')
+            self._report('redis', checks, time.perf_counter() - started)
+        
+        # Flood from one number on a simulated clock: what would reach OpenAI?
+        flood, span_ms = options['flood'], options['flood_seconds'] * 1000
+        clock = [0.0]
+        flood_limiter = LocalGCRA(clock=lambda: clock[0])
+        passed = 0
+        for i in range(flood):
+            clock[0] = span_ms * i / flood / 1000
+            passed += flood_limiter.allow('+15550000000', emission_ms, tolerance_ms)[0]
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"flood: {flood} messages in {options['flood_seconds']:.0f}s from one number, "
+            f"{passed} reach OpenAI, {flood - passed} blocked "
+            f"(limit {limit}/{period}s, burst {burst or limit})"
+        ))
+    
+    def _report(self, backend, checks, elapsed):
+        self.stdout.write(self.style.SUCCESS(
+            f"{backend}: {checks} checks in {elapsed * 1000:.1f}ms, {elapsed / checks * 1e6:.2f}µs per check"
+        ))
@@ -0,0 +1,26 @@
+# apps/core/management/commands/benchmark_usage_recorder.py
+import time
+from django.core.management.base import BaseCommand
+from apps.core.usage import UsageRecorder
+
+
+class Command(BaseCommand):
+    help = 'Time the hot-path cost of recording API usage (no flush is timed)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=100000)
+    
+    def handle(self, *args, **options):
+        calls = options['calls']
+        # Large batch and interval so the writer thread stays idle while timing
+        recorder = UsageRecorder(flush_interval=3600, batch_size=calls + 1, max_buffer=calls + 1)
+        
+        started = time.perf_counter()
+        for i in range(calls):
+            recorder.record('openai', 'generate_response', 200, 0.8, 420, 180, 'gpt-4o-mini', None)
+        elapsed = time.perf_counter() - started
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"{calls} records in {elapsed * 1000:.1f}ms: {elapsed / calls * 1e6:.2f}µs per call"
+        ))
+        recorder.buffer.clear()
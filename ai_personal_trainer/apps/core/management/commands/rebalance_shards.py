@@ -0,0 +1,220 @@
+# apps/core/management/commands/rebalance_shards.py
+import logging
+from itertools import islice
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.core.sharding import (
+    PRIMARY_DB_ALIAS, get_shard_aliases, get_sharded_models, partition_by_shard,
+    shard_for_user, user_lookup,
+)
+from apps.core.signals import copy_user_to_shard
+
+logger = logging.getLogger(__name__)
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Move user-scoped rows onto the shard each user currently hashes to'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report misplaced users without moving anything')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--drain', action='append', default=[],
+            help='Extra database alias to empty (e.g. a shard being retired); may be repeated'
+        )
+    
+    def handle(self, *args, **options):
+        shards = get_shard_aliases()
+        sources = shards + [alias for alias in options['drain'] if alias not in shards]
+        for alias in sources:
+            if alias not in settings.DATABASES:
+                raise CommandError(f"Unknown database alias: {alias}")
+        
+        self.dry_run = options['dry_run']
+        self.models = get_sharded_models()
+        User = get_user_model()
+        
+        user_ids = User.objects.using(PRIMARY_DB_ALIAS).order_by('pk').values_list('pk', flat=True)
+        synced = moved = 0
+        
+        for chunk in _batched(user_ids.iterator(chunk_size=options['batch_size']), options['batch_size']):
+            synced += self._sync_directory_copies(chunk)
+            for source in sources:
+                for user_id in self._find_misplaced(source, chunk):
+                    self._move_user(user_id, source, shard_for_user(user_id))
+                    moved += 1
+        
+        verb = 'Would move' if self.dry_run else 'Moved'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {moved} user(s) across {len(shards)} shard(s); created {synced} shard user copies"
+        ))
+    
+    def _sync_directory_copies(self, user_ids):
+        """Make sure every user has a copy on its home shard"""
+        User = get_user_model()
+        created = 0
+        
+        for alias, ids in partition_by_shard(user_ids).items():
+            if alias == PRIMARY_DB_ALIAS:
+                continue
+            existing = set(User.objects.using(alias).filter(pk__in=ids).values_list('pk', flat=True))
+            missing = [user_id for user_id in ids if user_id not in existing]
+            if missing and not self.dry_run:
+                for user in User.objects.using(PRIMARY_DB_ALIAS).filter(pk__in=missing):
+                    copy_user_to_shard(user, alias)
+            created += len(missing)
+        
+        return created
+    
+    def _find_misplaced(self, source, user_ids):
+        """Users in ``user_ids`` that still own rows on ``source`` but hash elsewhere"""
+        candidates = [user_id for user_id in user_ids if shard_for_user(user_id) != source]
+        if not candidates:
+            return set()
+        
+        misplaced = set()
+        for model in self.models:
+            lookup = user_lookup(model)
+            misplaced.update(
+                model.objects.using(source)
+                .filter(**{f'{lookup}__in': candidates})
+                .values_list(lookup, flat=True)
+                .distinct()
+            )
+        return misplaced
+    
+    def _move_user(self, user_id, source, target):
+        """Copy one user's rows to ``target``, verify them, then remove them from ``source``.
+
+        Safe to rerun after a failure between the two steps: every copied row
+        is journaled (``ShardMoveRecord``) in the copy's transaction, and a
+        rerun reuses exactly those rows instead of copying them again.
+        """
+        from apps.core.models import ShardMoveRecord
+        
+        self.stdout.write(f"User {user_id}: {source} -> {target}")
+        if self.dry_run:
+            return
+        
+        User = get_user_model()
+        if target != PRIMARY_DB_ALIAS:
+            copy_user_to_shard(User.objects.using(PRIMARY_DB_ALIAS).get(pk=user_id), target)
+        
+        journal = ShardMoveRecord.objects.using(target).filter(user_id=user_id, source=source)
+        
+        # Primary keys are per-database sequences, so rows get new ids on the
+        # target and intra-user foreign keys are remapped as we go.
+        pk_map = {}
+        source_counts = {}
+        with transaction.atomic(using=target):
+            copied_before = {
+                (label, source_pk): target_pk
+                for label, source_pk, target_pk in journal.values_list('model_label', 'source_pk', 'target_pk')
+            }
+            for model in self.models:
+                label = model._meta.label
+                timestamp_fields = [
+                    f.attname for f in model._meta.concrete_fields
+                    if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)
+                ]
+                keeps_pk = model._meta.pk.is_relation
+                rows = list(model.objects.using(source).filter(**{user_lookup(model): user_id}).order_by('pk'))
+                source_counts[model] = len(rows)
+                used = set()
+                records = []
+                
+                for obj in rows:
+                    old_pk = obj.pk
+                    for field in model._meta.concrete_fields:
+                        if field.is_relation:
+                            key = (field.related_model, getattr(obj, field.attname))
+                            if key in pk_map:
+                                setattr(obj, field.attname, pk_map[key])
+                    
+                    existing = self._existing_copy(model, obj, target, copied_before.get((label, str(old_pk))), used)
+                    if existing is None:
+                        timestamps = {name: getattr(obj, name) for name in timestamp_fields}
+                        if not keeps_pk:
+                            obj.pk = None
+                        obj._state.adding = True
+                        obj.save(using=target)
+                        if timestamps:
+                            model.objects.using(target).filter(pk=obj.pk).update(**timestamps)
+                        existing = obj.pk
+                        records.append(ShardMoveRecord(
+                            user_id=user_id, source=source, model_label=label,
+                            source_pk=str(old_pk), target_pk=str(existing)
+                        ))
+                    
+                    used.add(existing)
+                    pk_map[(model, old_pk)] = existing
+                
+                ShardMoveRecord.objects.using(target).bulk_create(records)
+        
+        self._verify_copy(user_id, target, pk_map, source_counts)
+        
+        with transaction.atomic(using=source):
+            for model in reversed(self.models):
+                model.objects.using(source).filter(**{user_lookup(model): user_id}).delete()
+            if source != PRIMARY_DB_ALIAS:
+                User.objects.using(source).filter(pk=user_id).delete()
+        journal.delete()
+        
+        logger.info(f"Rebalanced user {user_id} from {source} to {target}")
+    
+    def _existing_copy(self, model, obj, target, journaled_pk, used):
+        """Pk of the row on ``target`` that already holds ``obj``, or None to copy it.
+
+        Rows copied by an earlier run are found through the journal. Rows
+        keyed by the user (pk or a unique key) may instead have been written
+        on the target after the shard count changed; those are kept. No
+        target row is ever matched to two source rows.
+        """
+        rows = model.objects.using(target)
+        if journaled_pk is not None:
+            existing = rows.filter(pk=journaled_pk).values_list('pk', flat=True).first()
+            if existing is not None:
+                return existing
+        
+        pk_field = model._meta.pk
+        lookups = {pk_field.attname: obj.pk} if pk_field.is_relation else self._unique_lookups(model, obj)
+        if not lookups:
+            return None
+        existing = rows.filter(**lookups).values_list('pk', flat=True).first()
+        if existing in used:
+            raise CommandError(
+                f"Two {model._meta.label} rows of one user match target row {existing}; nothing was moved"
+            )
+        return existing
+    
+    def _unique_lookups(self, model, obj):
+        """Values of the first unique key (other than the pk) the row fills in"""
+        keys = [[f.attname] for f in model._meta.concrete_fields if f.unique and not f.primary_key]
+        keys += [[model._meta.get_field(name).attname for name in fields] for fields in model._meta.unique_together]
+        for names in keys:
+            values = {name: getattr(obj, name) for name in names}
+            if None not in values.values():
+                return values
+        return None
+    
+    def _verify_copy(self, user_id, target, pk_map, source_counts):
+        """Refuse to delete the source rows unless each one has its own row on ``target``"""
+        for model, count in source_counts.items():
+            copied = {new_pk for (mapped_model, old_pk), new_pk in pk_map.items() if mapped_model is model}
+            found = model.objects.using(target).filter(pk__in=copied).count()
+            if len(copied) != count or found != count:
+                raise CommandError(
+                    f"Copy of user {user_id} to {target} is incomplete for {model._meta.label} "
+                    f"({found} of {count} rows); source rows were kept, rerun to resume"
+                )
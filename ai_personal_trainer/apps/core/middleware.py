@@ -0,0 +1,61 @@
+# apps/core/middleware.py
+import logging
+import math
+from django.conf import settings
+from django.http import JsonResponse
+from apps.core.db_routers import reset_routing_state
+from apps.core.ratelimit import get_rate_limiter, is_rate_limit_exempt
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaStickinessMiddleware:
+    """Start every request with fresh replica routing state"""
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        reset_routing_state()
+        try:
+            return self.get_response(request)
+        finally:
+            reset_routing_state()
+
+
+class RateLimitMiddleware:
+    """Per-client GCRA rate limit on every request (``settings.RATE_LIMITS['http']``).
+
+    Clients are keyed by IP (the first ``X-Forwarded-For`` hop when
+    ``RATE_LIMIT_TRUST_FORWARDED`` is on, i.e. behind a load balancer).
+    The check runs once the URL has resolved, so views marked with
+    ``rate_limit_exempt`` skip it wherever they are mounted: WhatsApp
+    webhook deliveries all arrive from Meta's addresses, so they are
+    limited per sender number in ``process_whatsapp_message`` instead.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limiter = get_rate_limiter('http')
+        self.trust_forwarded = getattr(settings, 'RATE_LIMIT_TRUST_FORWARDED', False)
+    
+    def __call__(self, request):
+        return self.get_response(request)
+    
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if is_rate_limit_exempt(view_func):
+            return None
+        
+        allowed, retry_after = self.limiter.allow(self._client_key(request))
+        if not allowed:
+            response = JsonResponse({'error': 'rate_limited', 'retry_after': round(retry_after, 3)}, status=429)
+            response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+            return response
+        return None
+    
+    def _client_key(self, request):
+        if self.trust_forwarded:
+            forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+            if forwarded:
+                return forwarded.split(',')[0].strip()
+        return request.META.get('REMOTE_ADDR', 'unknown')
@@ -0,0 +1,99 @@
+# apps/core/query_shapes.py
+import re
+from contextlib import ExitStack
+from importlib import import_module
+from django.db import connections
+
+# name -> HotQuery; filled in as the modules below are imported
+HOT_QUERIES = {}
+
+# Modules whose query builders carry ``@hot_query``
+HOT_QUERY_MODULES = [
+    'apps.notifications.recipients',
+    'apps.reports.loaders',
+    'apps.users.rollups',
+    'apps.chatbot.queries',
+]
+
+# SQLite reports a full table scan as "SCAN <table>" with no index after it
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)\b(?! USING)', re.IGNORECASE)
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+class HotQuery:
+    """A production query builder registered for the plan audit.
+
+    ``sample(user_id, conversation_id)`` gives the builder's arguments for a
+    sample user, and ``evaluate`` runs what the builder returns the way its
+    call sites do (``list``, ``.exists()``, ``.first()``...), so the audit
+    explains exactly the SQL the hot path sends.
+    """
+    
+    def __init__(self, builder, sample, evaluate):
+        self.builder = builder
+        self.sample = sample
+        self.evaluate = evaluate
+        self.source = f'{builder.__module__}.{builder.__qualname__}'
+    
+    def run(self, user_id, conversation_id):
+        return self.evaluate(self.builder(*self.sample(user_id, conversation_id)))
+
+
+def hot_query(name, sample, evaluate=list):
+    """Register the decorated query builder as hot shape ``name``.
+
+    The builder itself is returned unchanged; call sites keep using it, so
+    the registry cannot drift from the queries the code runs. Stack the
+    decorator to register one builder under several samples.
+    """
+    def register(builder):
+        HOT_QUERIES[name] = HotQuery(builder, sample, evaluate)
+        return builder
+    return register
+
+
+def load_hot_queries():
+    """Import every module in ``HOT_QUERY_MODULES`` and return the registry"""
+    for module in HOT_QUERY_MODULES:
+        import_module(module)
+    return HOT_QUERIES
+
+
+class QueryCapture:
+    """``execute_wrapper`` that records every (alias, sql, params) a block issues"""
+    
+    def __init__(self, queries, alias):
+        self.queries = queries
+        self.alias = alias
+    
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((self.alias, sql, params))
+        return execute(sql, params, many, context)
+
+
+def capture_queries(func, *args):
+    """Run ``func`` and return the queries it sent to any database (routers pick shards)"""
+    queries = []
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(QueryCapture(queries, connection.alias)))
+        func(*args)
+    return queries
+
+
+def explain_query_plan(using, sql, params):
+    """SQLite ``EXPLAIN QUERY PLAN`` detail lines for one query"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(plan):
+    """Full scans (and temp sorts, which mean the index misses the ORDER BY) in a plan"""
+    problems = []
+    for detail in plan:
+        if FULL_SCAN.match(detail):
+            problems.append(f'full scan: {detail}')
+        elif detail.startswith(TEMP_SORT):
+            problems.append(f'sort: {detail}')
+    return problems
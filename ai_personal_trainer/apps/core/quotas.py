@@ -0,0 +1,366 @@
+# apps/core/quotas.py
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict, namedtuple
+from django.conf import settings
+from django.db.models import F
+from django_redis import get_redis_connection
+from apps.core.sharding import partition_by_shard
+
+logger = logging.getLogger(__name__)
+
+# ``charge`` identifies what was charged (backend, plan, time) so a failed
+# call can be refunded; None when nothing was charged
+QuotaDecision = namedtuple('QuotaDecision', ['allowed', 'scope', 'used', 'limit', 'charge'])
+Charge = namedtuple('Charge', ['backend', 'plan', 'plan_window', 'plan_limited', 'user_window', 'at'])
+
+UNLIMITED = -1
+
+# Sliding-window check for the user and plan counters, charged only when
+# both have room, plus the per-user usage tally drained into rollups later.
+# Each window is two fixed buckets; the previous one is weighted by how much
+# of it still overlaps the sliding window, so every check is O(1).
+CHECK_AND_CHARGE_SCRIPT = """
+local function used(current, previous, weight)
+    return tonumber(redis.call('GET', current) or '0') + tonumber(redis.call('GET', previous) or '0') * weight
+end
+local user_limit, plan_limit = tonumber(ARGV[1]), tonumber(ARGV[2])
+local user_used = used(KEYS[1], KEYS[2], tonumber(ARGV[3]))
+if user_limit >= 0 and user_used + 1 > user_limit then
+    return {0, 1, math.floor(user_used)}
+end
+local plan_used = 0
+if plan_limit >= 0 then
+    plan_used = used(KEYS[3], KEYS[4], tonumber(ARGV[4]))
+    if plan_used + 1 > plan_limit then
+        return {0, 2, math.floor(plan_used)}
+    end
+    redis.call('INCR', KEYS[3])
+    redis.call('EXPIRE', KEYS[3], ARGV[6])
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+redis.call('HINCRBY', KEYS[5], ARGV[7], 1)
+return {1, 0, math.floor(user_used) + 1}
+"""
+
+# Undo one charge: the buckets it went into and the pending usage tally. The
+# tally may go negative if it was drained in between; the drain then
+# subtracts from the rollup instead.
+REFUND_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') > 0 then
+    redis.call('DECR', KEYS[1])
+end
+if ARGV[1] == '1' and tonumber(redis.call('GET', KEYS[2]) or '0') > 0 then
+    redis.call('DECR', KEYS[2])
+end
+redis.call('HINCRBY', KEYS[3], ARGV[2], -1)
+return 1
+"""
+
+DRAIN_USAGE_SCRIPT = """
+local usage = redis.call('HGETALL', KEYS[1])
+redis.call('DEL', KEYS[1])
+return usage
+"""
+
+SCOPES = {1: 'user', 2: 'plan'}
+
+
+def _window(now, seconds):
+    """(current bucket, weight of the previous bucket) for a sliding window"""
+    bucket = int(now // seconds)
+    return bucket, 1 - (now - bucket * seconds) / seconds
+
+
+class RedisQuotaBackend:
+    """Counters in Redis: one script round trip per check"""
+    
+    def __init__(self, prefix='quota', redis=None):
+        self.prefix = prefix
+        self.usage_key = f'{prefix}:usage:pending'
+        self._redis = redis
+        self._script = None
+        self._refund_script = None
+    
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection('default')
+        return self._redis
+    
+    def check_and_charge(self, user_id, user_limit, user_window, plan, plan_limit, plan_window, now):
+        if self._script is None:
+            self._script = self.redis.register_script(CHECK_AND_CHARGE_SCRIPT)
+        user_bucket, user_weight = _window(now, user_window)
+        plan_bucket, plan_weight = _window(now, plan_window)
+        allowed, scope, used = self._script(
+            keys=[
+                f'{self.prefix}:user:{user_id}:{user_bucket}',
+                f'{self.prefix}:user:{user_id}:{user_bucket - 1}',
+                f'{self.prefix}:plan:{plan}:{plan_bucket}',
+                f'{self.prefix}:plan:{plan}:{plan_bucket - 1}',
+                self.usage_key,
+            ],
+            args=[user_limit, plan_limit, user_weight, plan_weight, 2 * user_window, 2 * plan_window, user_id],
+        )
+        return bool(allowed), SCOPES.get(scope), used
+    
+    def refund(self, user_id, user_window, plan, plan_window, plan_limited, at):
+        if self._refund_script is None:
+            self._refund_script = self.redis.register_script(REFUND_SCRIPT)
+        self._refund_script(
+            keys=[
+                f'{self.prefix}:user:{user_id}:{_window(at, user_window)[0]}',
+                f'{self.prefix}:plan:{plan}:{_window(at, plan_window)[0]}',
+                self.usage_key,
+            ],
+            args=['1' if plan_limited else '0', user_id],
+        )
+    
+    def drain_usage(self):
+        flat = self.redis.eval(DRAIN_USAGE_SCRIPT, 1, self.usage_key)
+        return {int(flat[i]): int(flat[i + 1]) for i in range(0, len(flat), 2)}
+
+
+class LocalQuotaBackend:
+    """In-process stand-in with the same sliding-window semantics.
+
+    Used when Redis is unreachable (limits then apply per process) and in
+    development. Only the current and previous bucket of each counter are
+    kept.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # key -> (bucket, current, previous)
+        self._usage = Counter()
+    
+    def _used(self, key, bucket, weight):
+        stored = self._counters.get(key)
+        if stored is None or stored[0] < bucket - 1:
+            return 0, 0
+        if stored[0] == bucket - 1:
+            return stored[1] * weight, stored[1]
+        return stored[1] + stored[2] * weight, stored[2]
+    
+    def _charge(self, key, bucket):
+        stored = self._counters.get(key)
+        if stored is not None and stored[0] == bucket:
+            self._counters[key] = (bucket, stored[1] + 1, stored[2])
+        else:
+            previous = stored[1] if stored is not None and stored[0] == bucket - 1 else 0
+            self._counters[key] = (bucket, 1, previous)
+    
+    def _uncharge(self, key, bucket):
+        stored = self._counters.get(key)
+        if stored is None:
+            return
+        if stored[0] == bucket and stored[1] > 0:
+            self._counters[key] = (bucket, stored[1] - 1, stored[2])
+        elif stored[0] == bucket + 1 and stored[2] > 0:
+            self._counters[key] = (stored[0], stored[1], stored[2] - 1)
+    
+    def check_and_charge(self, user_id, user_limit, user_window, plan, plan_limit, plan_window, now):
+        user_key, plan_key = ('user', user_id), ('plan', plan)
+        user_bucket, user_weight = _window(now, user_window)
+        plan_bucket, plan_weight = _window(now, plan_window)
+        
+        with self._lock:
+            user_used = self._used(user_key, user_bucket, user_weight)[0]
+            if user_limit >= 0 and user_used + 1 > user_limit:
+                return False, 'user', int(user_used)
+            if plan_limit >= 0:
+                plan_used = self._used(plan_key, plan_bucket, plan_weight)[0]
+                if plan_used + 1 > plan_limit:
+                    return False, 'plan', int(plan_used)
+                self._charge(plan_key, plan_bucket)
+            self._charge(user_key, user_bucket)
+            self._usage[user_id] += 1
+        return True, None, int(user_used) + 1
+    
+    def refund(self, user_id, user_window, plan, plan_window, plan_limited, at):
+        with self._lock:
+            self._uncharge(('user', user_id), _window(at, user_window)[0])
+            if plan_limited:
+                self._uncharge(('plan', plan), _window(at, plan_window)[0])
+            self._usage[user_id] -= 1
+    
+    def pending(self):
+        return len(self._usage)
+    
+    def drain_usage(self):
+        with self._lock:
+            usage, self._usage = dict(self._usage), Counter()
+        return usage
+
+
+class QuotaService:
+    """Per-user and per-plan LLM message quotas.
+
+    The user limit is the plan's ``ai_messages_limit`` over
+    ``AI_QUOTA_WINDOW_SECONDS`` (users without an active subscription get
+    ``AI_FREE_MESSAGES_LIMIT``). ``AI_PLAN_RATE_LIMITS`` optionally caps a
+    whole plan as ``{plan_type: (messages, window_seconds)}``, so one tier
+    cannot drive unbounded spend for everyone. Plan lookups are memoised
+    per process for ``plan_cache_seconds``.
+
+    Charges taken by in-process counters (``AI_QUOTA_BACKEND = 'local'``, or
+    the fallback during a Redis outage) only exist in the process that took
+    them, so that process drains them into user rollups itself, from a
+    daemon thread every ``local_flush_seconds``.
+    """
+    
+    def __init__(self, backend=None, plan_cache_seconds=300, local_flush_seconds=60):
+        self.backend = backend or (
+            LocalQuotaBackend() if getattr(settings, 'AI_QUOTA_BACKEND', 'redis') == 'local' else RedisQuotaBackend()
+        )
+        self.fallback = LocalQuotaBackend()
+        self.plan_cache_seconds = plan_cache_seconds
+        self.local_flush_seconds = local_flush_seconds
+        self._plans = {}
+        self._reset_flusher()
+        # The flush thread does not survive a fork (Celery prefork, gunicorn)
+        os.register_at_fork(after_in_child=self._reset_flusher)
+        atexit.register(self._flush_on_exit)
+    
+    def _reset_flusher(self):
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+    
+    def plan_for(self, user_id):
+        """(plan_type, ai_messages_limit or None) for the user's active subscription"""
+        from apps.core.models import UserSubscription
+        
+        cached = self._plans.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        plan = UserSubscription.objects.filter(user_id=user_id, status='active').values_list(
+            'plan__plan_type', 'plan__ai_messages_limit'
+        ).first() or ('free', getattr(settings, 'AI_FREE_MESSAGES_LIMIT', 30))
+        
+        if len(self._plans) > 10000:
+            self._plans.clear()
+        self._plans[user_id] = (time.monotonic() + self.plan_cache_seconds, plan)
+        return plan
+    
+    def check(self, user_id, now=None):
+        """Charge one AI message if the user and plan both have room"""
+        now = now if now is not None else time.time()
+        plan, user_limit = self.plan_for(user_id)
+        plan_limit, plan_window = getattr(settings, 'AI_PLAN_RATE_LIMITS', {}).get(plan, (UNLIMITED, 3600))
+        user_limit = UNLIMITED if user_limit is None else user_limit
+        user_window = getattr(settings, 'AI_QUOTA_WINDOW_SECONDS', 30 * 24 * 3600)
+        
+        args = (user_id, user_limit, user_window, plan, plan_limit, plan_window, now)
+        backend = self.backend
+        try:
+            allowed, scope, used = backend.check_and_charge(*args)
+        except Exception as e:
+            logger.error(f"Error checking AI quota in Redis, using local counters: {str(e)}")
+            backend = self.fallback
+            allowed, scope, used = backend.check_and_charge(*args)
+        
+        charge = None
+        if allowed:
+            charge = Charge(backend, plan, plan_window, plan_limit >= 0, user_window, now)
+            if isinstance(backend, LocalQuotaBackend):
+                self._ensure_local_flusher()
+        return QuotaDecision(allowed, scope, used, plan_limit if scope == 'plan' else user_limit, charge)
+    
+    def refund(self, user_id, decision):
+        """Give back the message ``decision`` charged (the AI call it paid for failed)"""
+        charge = decision.charge
+        if charge is None:
+            return
+        try:
+            charge.backend.refund(
+                user_id, charge.user_window, charge.plan, charge.plan_window, charge.plan_limited, charge.at
+            )
+        except Exception as e:
+            logger.error(f"Error refunding AI quota for user {user_id}: {str(e)}")
+    
+    def flush_usage_rollups(self):
+        """Add the messages charged since the last flush to each user's rollup, in batches"""
+        backends = [self.backend] if not isinstance(self.backend, LocalQuotaBackend) else []
+        return self._flush(backends + self._local_backends())
+    
+    def flush_local_usage(self):
+        """Drain this process's in-memory counters into rollups"""
+        return self._flush(self._local_backends())
+    
+    def _flush_on_exit(self):
+        try:
+            self.flush_local_usage()
+        except Exception as e:
+            logger.error(f"Error flushing local AI usage counters at exit: {str(e)}")
+    
+    def _local_backends(self):
+        return [b for b in (self.backend, self.fallback) if isinstance(b, LocalQuotaBackend)]
+    
+    def _ensure_local_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._flush_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run_local_flusher, name='ai-quota-flush', daemon=True)
+                self._flusher.start()
+    
+    def _run_local_flusher(self):
+        from django.db import close_old_connections
+        
+        while True:
+            time.sleep(self.local_flush_seconds)
+            if not any(backend.pending() for backend in self._local_backends()):
+                continue
+            try:
+                close_old_connections()
+                flushed = self.flush_local_usage()
+                if flushed:
+                    logger.info(f"Flushed {flushed} locally counted AI quota charges to user rollups")
+            except Exception as e:
+                logger.error(f"Error flushing local AI usage counters: {str(e)}")
+    
+    def _flush(self, backends):
+        from apps.users.models import UserRollup
+        from apps.users.rollups import rebuild_rollup
+        
+        usage = Counter()
+        for backend in backends:
+            try:
+                usage.update(backend.drain_usage())
+            except Exception as e:
+                logger.error(f"Error draining AI usage counters: {str(e)}")
+        # Refunds can cancel charges out (or go negative after a drain)
+        usage = {user_id: count for user_id, count in usage.items() if count}
+        if not usage:
+            return 0
+        
+        for alias, user_ids in partition_by_shard(list(usage)).items():
+            existing = set(UserRollup.objects.using(alias).filter(user_id__in=user_ids).values_list('user_id', flat=True))
+            for user_id in set(user_ids) - existing:
+                rebuild_rollup(user_id)
+            
+            # One UPDATE per distinct increment instead of one per user
+            by_count = defaultdict(list)
+            for user_id in user_ids:
+                by_count[usage[user_id]].append(user_id)
+            for count, ids in by_count.items():
+                UserRollup.objects.using(alias).filter(user_id__in=ids).update(
+                    ai_messages_used=F('ai_messages_used') + count
+                )
+        return sum(usage.values())
+
+
+_service = None
+
+
+def get_quota_service():
+    global _service
+    if _service is None:
+        _service = QuotaService()
+    return _service
@@ -0,0 +1,115 @@
+# apps/core/ratelimit.py
+import logging
+import threading
+import time
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+# GCRA: the key holds the "theoretical arrival time" (TAT) of the next
+# request. A request is allowed while TAT - now stays within the burst
+# tolerance, and each allowed request pushes TAT one emission interval
+# further. One key, one round trip; Redis' own clock keeps app servers in
+# step. Returns {allowed, retry_after_ms}.
+GCRA_SCRIPT = """
+local emission = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local allow_at = tat + emission - tolerance
+if now < allow_at then
+    return {0, allow_at - now}
+end
+local new_tat = tat + emission
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, 0}
+"""
+
+
+class LocalGCRA:
+    """In-process GCRA with the same semantics, used when Redis is unavailable"""
+    
+    def __init__(self, max_keys=100000, clock=time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._tats = {}
+        self.max_keys = max_keys
+    
+    def allow(self, key, emission_ms, tolerance_ms):
+        now = self.clock() * 1000
+        with self._lock:
+            tat = max(self._tats.get(key, now), now)
+            allow_at = tat + emission_ms - tolerance_ms
+            if now < allow_at:
+                return False, allow_at - now
+            if len(self._tats) >= self.max_keys:
+                # Expired keys carry no state; drop them before growing
+                self._tats = {k: v for k, v in self._tats.items() if v > now}
+            self._tats[key] = tat + emission_ms
+        return True, 0
+
+
+class RateLimiter:
+    """``limit`` requests per ``period`` seconds per key, allowing ``burst`` at once.
+
+    Checks run the GCRA script in Redis (a single round trip); if Redis
+    fails the limiter falls back to per-process counters rather than
+    letting everything through or failing requests.
+    """
+    
+    def __init__(self, name, limit, period, burst=None, redis=None):
+        self.name = name
+        self.emission_ms = period * 1000.0 / limit
+        self.tolerance_ms = self.emission_ms * (burst or limit)
+        self._redis = redis
+        self._script = None
+        self.fallback = LocalGCRA()
+    
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection('default')
+        return self._redis
+    
+    def allow(self, key):
+        """(allowed, retry_after_seconds) for one request by ``key``"""
+        try:
+            if self._script is None:
+                self._script = self.redis.register_script(GCRA_SCRIPT)
+            allowed, retry_after_ms = self._script(
+                keys=[f'ratelimit:{self.name}:{key}'],
+                args=[max(1, round(self.emission_ms)), round(self.tolerance_ms)]
+            )
+        except Exception as e:
+            logger.error(f"Error checking rate limit {self.name} in Redis, using local limiter: {str(e)}")
+            allowed, retry_after_ms = self.fallback.allow(key, self.emission_ms, self.tolerance_ms)
+        return bool(allowed), retry_after_ms / 1000.0
+
+
+def rate_limit_exempt(view):
+    """Skip ``RateLimitMiddleware`` for a view function or class-based view"""
+    view.rate_limit_exempt = True
+    return view
+
+
+def is_rate_limit_exempt(view_func):
+    # as_view() functions carry their class as ``view_class``
+    view_class = getattr(view_func, 'view_class', None)
+    return getattr(view_func, 'rate_limit_exempt', False) or getattr(view_class, 'rate_limit_exempt', False)
+
+
+_limiters = {}
+
+
+def get_rate_limiter(name):
+    """Shared limiter configured by ``settings.RATE_LIMITS[name]`` = (limit, period[, burst])"""
+    limiter = _limiters.get(name)
+    if limiter is None:
+        limit, period, *burst = settings.RATE_LIMITS[name]
+        limiter = _limiters[name] = RateLimiter(name, limit, period, burst[0] if burst else None)
+    return limiter
@@ -0,0 +1,193 @@
+# apps/core/sharding.py
+import logging
+from collections import defaultdict
+from django.conf import settings
+from django.db import models
+from apps.core.db_routers import shard_read_alias
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_DB_ALIAS = 'default'
+
+
+def get_shard_aliases():
+    """Database aliases holding user-scoped tables, in shard order"""
+    return list(getattr(settings, 'DATABASE_SHARDS', None) or [PRIMARY_DB_ALIAS])
+
+
+def sharding_enabled():
+    return len(get_shard_aliases()) > 1
+
+
+def jump_hash(key, num_buckets):
+    """Jump consistent hash: only ~1/N of keys move when a shard is added"""
+    key = int(key) & 0xFFFFFFFFFFFFFFFF
+    bucket, j = -1, 0
+    while j < num_buckets:
+        bucket = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((bucket + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return bucket
+
+
+def shard_for_user(user_id):
+    """Alias of the database holding all rows for ``user_id``"""
+    shards = get_shard_aliases()
+    if user_id is None or len(shards) == 1:
+        return PRIMARY_DB_ALIAS
+    return shards[jump_hash(user_id, len(shards))]
+
+
+def is_sharded_model(model):
+    return getattr(model, 'shard_key', None) is not None
+
+
+def user_lookup(model):
+    """ORM path from a sharded model to its owning user id"""
+    if model.shard_key == 'user':
+        return 'user_id'
+    return f'{model.shard_key}__user_id'
+
+
+def shard_for_instance(obj):
+    """Shard a model instance lives on (users resolve to their home shard)"""
+    from django.contrib.auth import get_user_model
+    
+    if isinstance(obj, get_user_model()):
+        return shard_for_user(obj.pk)
+    
+    if obj._state.db in get_shard_aliases():
+        return obj._state.db
+    
+    key = getattr(obj, 'shard_key', None)
+    if key == 'user':
+        return shard_for_user(obj.user_id)
+    if key:
+        related = getattr(obj, key, None)
+        return shard_for_instance(related) if related is not None else PRIMARY_DB_ALIAS
+    return None
+
+
+def resolve_shard(model, lookups):
+    """Work out the shard from filter/create kwargs such as ``user=...``"""
+    key = getattr(model, 'shard_key', None)
+    if not key:
+        return None
+    
+    user_path = 'user' if key == 'user' else f'{key}__user'
+    for path, is_user in ((user_path, True), (key, key == 'user')):
+        for lookup in (path, f'{path}_id', f'{path}__id', f'{path}__pk'):
+            if lookup not in lookups:
+                continue
+            value = lookups[lookup]
+            if isinstance(value, models.Model):
+                return shard_for_instance(value)
+            if is_user and isinstance(value, (int, str)):
+                return shard_for_user(value)
+    return None
+
+
+def partition_by_shard(user_ids):
+    """Group user ids by home shard: {alias: [user_id, ...]}"""
+    partitions = defaultdict(list)
+    for user_id in user_ids:
+        partitions[shard_for_user(user_id)].append(user_id)
+    return dict(partitions)
+
+
+def iter_users_by_shard(users, chunk_size=1000):
+    """Stream a directory queryset of users as (alias, [users]) chunks.
+
+    Everything a fan-out does for one chunk hits a single shard connection,
+    and users are never all loaded into memory at once.
+    """
+    buffers = defaultdict(list)
+    for user in users.iterator(chunk_size=chunk_size):
+        alias = shard_for_user(user.pk)
+        buffers[alias].append(user)
+        if len(buffers[alias]) >= chunk_size:
+            yield alias, buffers.pop(alias)
+    
+    for alias, chunk in buffers.items():
+        if chunk:
+            yield alias, chunk
+
+
+def for_each_shard(callback):
+    """Run ``callback(alias)`` on every shard and return {alias: result}"""
+    results = {}
+    for alias in get_shard_aliases():
+        try:
+            results[alias] = callback(alias)
+        except Exception as e:
+            logger.error(f"Error running cross-shard operation on {alias}: {str(e)}")
+            results[alias] = None
+    return results
+
+
+def get_sharded_models():
+    """Sharded models ordered so FK targets come before the rows that use them"""
+    from django.apps import apps
+    
+    sharded = [m for m in apps.get_models() if is_sharded_model(m)]
+    ordered = []
+    
+    def visit(model, seen):
+        if model in ordered or model in seen:
+            return
+        seen.add(model)
+        for field in model._meta.concrete_fields:
+            if field.is_relation and field.related_model in sharded:
+                visit(field.related_model, seen)
+        ordered.append(model)
+    
+    for model in sharded:
+        visit(model, set())
+    return ordered
+
+
+class ShardedQuerySet(models.QuerySet):
+    """QuerySet that pins itself to the owning user's shard.
+
+    ``filter(user=...)``, ``create(user=...)`` and friends route to the right
+    database automatically; queries without a shard key keep default routing.
+    """
+    
+    @property
+    def db(self):
+        # Reads pinned to a shard may still be served by that shard's replica
+        alias = super().db
+        if self._for_write or not sharding_enabled():
+            return alias
+        return shard_read_alias(alias)
+    
+    def _route_by_lookup(self, lookups):
+        if self._db is not None or not sharding_enabled():
+            return self
+        alias = resolve_shard(self.model, lookups)
+        return self.using(alias) if alias else self
+    
+    def _filter_or_exclude(self, negate, args, kwargs):
+        qs = self if negate else self._route_by_lookup(kwargs)
+        return super(ShardedQuerySet, qs)._filter_or_exclude(negate, args, kwargs)
+    
+    def create(self, **kwargs):
+        qs = self._route_by_lookup(kwargs)
+        return super(ShardedQuerySet, qs).create(**kwargs)
+    
+    def get_or_create(self, defaults=None, **kwargs):
+        qs = self._route_by_lookup(kwargs)
+        return super(ShardedQuerySet, qs).get_or_create(defaults=defaults, **kwargs)
+    
+    def update_or_create(self, defaults=None, **kwargs):
+        qs = self._route_by_lookup(kwargs)
+        return super(ShardedQuerySet, qs).update_or_create(defaults=defaults, **kwargs)
+    
+    def for_user(self, user):
+        """Explicitly target the shard that owns ``user`` (instance or id)"""
+        return self.using(shard_for_user(getattr(user, 'pk', user)))
+
+
+class ShardedManager(models.Manager.from_queryset(ShardedQuerySet)):
+    """Default manager for user-scoped models"""
+    pass
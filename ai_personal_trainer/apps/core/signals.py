@@ -0,0 +1,56 @@
+# apps/core/signals.py
+import copy
+import logging
+from celery.signals import task_prerun, task_postrun
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.core.db_routers import reset_routing_state
+from apps.core.sharding import PRIMARY_DB_ALIAS, sharding_enabled, shard_for_user
+
+logger = logging.getLogger(__name__)
+
+
+@task_prerun.connect
+def reset_routing_before_task(**kwargs):
+    """Each Celery task gets its own read-your-writes scope"""
+    reset_routing_state()
+
+
+@task_postrun.connect
+def reset_routing_after_task(**kwargs):
+    """Don't leak stickiness into the next task on the same worker"""
+    reset_routing_state()
+
+
+def copy_user_to_shard(user, alias):
+    """Upsert the directory row for ``user`` into its home shard"""
+    shard_copy = copy.copy(user)
+    shard_copy.save(using=alias)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_user_to_home_shard(sender, instance, using, raw=False, **kwargs):
+    """Keep the shard copy of a user in step with the primary directory"""
+    if raw or using != PRIMARY_DB_ALIAS or not sharding_enabled():
+        return
+    
+    alias = shard_for_user(instance.pk)
+    if alias == PRIMARY_DB_ALIAS:
+        return
+    
+    try:
+        copy_user_to_shard(instance, alias)
+    except Exception as e:
+        logger.error(f"Error syncing user {instance.pk} to shard {alias}: {str(e)}")
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def delete_user_from_home_shard(sender, instance, using, **kwargs):
+    """Deleting the directory row cascades to the user's shard data"""
+    if using != PRIMARY_DB_ALIAS or not sharding_enabled():
+        return
+    
+    alias = shard_for_user(instance.pk)
+    if alias != PRIMARY_DB_ALIAS:
+        sender.objects.using(alias).filter(pk=instance.pk).delete()
@@ -0,0 +1,171 @@
+# apps/core/usage.py
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from decimal import Decimal
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from apps.core.sharding import shard_for_user
+
+logger = logging.getLogger(__name__)
+
+MILLION = Decimal(1000000)
+
+# USD. OpenAI per 1M tokens (input, output); WhatsApp per sent message.
+# Override or extend with settings.API_PRICING (same shape).
+DEFAULT_PRICING = {
+    'openai': {
+        'gpt-4o-mini': {'input': Decimal('0.15'), 'output': Decimal('0.60')},
+        'gpt-4o': {'input': Decimal('2.50'), 'output': Decimal('10.00')},
+    },
+    'whatsapp': {
+        'messages': {'request': Decimal('0')},
+    },
+}
+
+
+def get_pricing():
+    pricing = {api_type: dict(models) for api_type, models in DEFAULT_PRICING.items()}
+    for api_type, models in getattr(settings, 'API_PRICING', {}).items():
+        pricing.setdefault(api_type, {}).update(models)
+    return pricing
+
+
+def compute_cost(pricing, api_type, price_key, prompt_tokens, completion_tokens):
+    """Cost of one call, or None when the pricing table has no entry for it"""
+    price = pricing.get(api_type, {}).get(price_key)
+    if price is None:
+        return None
+    if 'request' in price:
+        return price['request']
+    return (
+        Decimal(prompt_tokens or 0) * price['input'] + Decimal(completion_tokens or 0) * price['output']
+    ) / MILLION
+
+
+class UsageRecorder:
+    """Non-blocking ``APIUsageLog`` writer.
+
+    ``record`` only appends a tuple to a deque (no locks, no DB, no cost
+    maths), so API calls pay microseconds for it. A daemon thread drains
+    the buffer every ``flush_interval`` seconds, or as soon as
+    ``batch_size`` records are waiting, prices them and writes them with one
+    ``bulk_create`` per shard. The buffer is bounded: under a DB outage the
+    oldest records are dropped (and counted) rather than growing memory.
+    """
+    
+    def __init__(self, flush_interval=5.0, batch_size=500, max_buffer=50000):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.buffer = deque(maxlen=max_buffer)
+        self.dropped = 0
+        self._reset_threading()
+        # Threads and held locks do not survive a fork (Celery prefork)
+        os.register_at_fork(after_in_child=self._reset_threading)
+    
+    def _reset_threading(self):
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+    
+    def record(self, api_type, endpoint, status_code, execution_time, prompt_tokens=None,
+               completion_tokens=None, model=None, user_id=None):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append((
+            api_type, endpoint, status_code, execution_time, prompt_tokens, completion_tokens, model, user_id
+        ))
+        if self._thread is None:
+            self._start()
+        elif len(self.buffer) >= self.batch_size:
+            self._wake.set()
+    
+    def _start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='api-usage-writer', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+    
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written"""
+        from django.db import close_old_connections
+        from apps.core.models import APIUsageLog
+        
+        with self._flush_lock:
+            records = []
+            while self.buffer:
+                try:
+                    records.append(self.buffer.popleft())
+                except IndexError:
+                    break
+            if not records:
+                return 0
+            
+            pricing = get_pricing()
+            by_shard = defaultdict(list)
+            for api_type, endpoint, status_code, execution_time, prompt_tokens, completion_tokens, model, user_id in records:
+                tokens = (prompt_tokens or 0) + (completion_tokens or 0) if prompt_tokens is not None else None
+                by_shard[shard_for_user(user_id)].append(APIUsageLog(
+                    user_id=user_id,
+                    api_type=api_type,
+                    endpoint=endpoint[:200],
+                    request_data={'model': model} if model else {},
+                    response_data={'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens}
+                    if prompt_tokens is not None else {},
+                    tokens_used=tokens,
+                    cost=compute_cost(pricing, api_type, model or endpoint, prompt_tokens, completion_tokens),
+                    status_code=status_code,
+                    execution_time=execution_time,
+                ))
+            
+            written = 0
+            try:
+                close_old_connections()
+                for alias, rows in by_shard.items():
+                    for start in range(0, len(rows), self.batch_size):
+                        APIUsageLog.objects.using(alias).bulk_create(rows[start:start + self.batch_size])
+                        written += len(rows[start:start + self.batch_size])
+            except Exception as e:
+                logger.error(f"Error writing {len(records) - written} API usage records: {str(e)}")
+            
+            if self.dropped:
+                logger.warning(f"Dropped {self.dropped} API usage records (buffer full)")
+                self.dropped = 0
+            return written
+
+
+_recorder = None
+
+
+def get_usage_recorder():
+    global _recorder
+    if _recorder is None:
+        _recorder = UsageRecorder(
+            flush_interval=getattr(settings, 'API_USAGE_FLUSH_SECONDS', 5.0),
+            batch_size=getattr(settings, 'API_USAGE_BATCH_SIZE', 500),
+        )
+        atexit.register(_recorder.flush)
+    return _recorder
+
+
+def record_usage(api_type, endpoint, status_code, started, **kwargs):
+    """Record one external API call that began at ``started`` (``time.monotonic()``)"""
+    get_usage_recorder().record(api_type, endpoint, status_code, time.monotonic() - started, **kwargs)
+
+
+@worker_process_shutdown.connect
+def flush_usage_on_shutdown(**kwargs):
+    # Prefork children leave through os._exit, which skips atexit
+    if _recorder is not None:
+        _recorder.flush()
@@ -0,0 +1,10 @@
+# apps/notifications/apps.py
+from django.apps import AppConfig
+
+
+class NotificationsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.notifications'
+    
+    def ready(self):
+        from apps.notifications import signals  # noqa: F401
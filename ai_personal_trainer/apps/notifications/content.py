@@ -0,0 +1,182 @@
+# apps/notifications/content.py
+import logging
+from functools import lru_cache
+from django.utils import timezone
+from django.utils import translation
+from django.utils.translation import gettext as _
+from django.utils.translation import gettext_noop
+
+logger = logging.getLogger(__name__)
+
+# Notification templates, keyed by name. Each is rendered (translated) once per
+# (template, language, variant) and cached for the life of the worker process;
+# per-user sends only fill in ``{placeholders}`` with str.format_map.
+TEMPLATES = {}
+
+
+def template(key):
+    def register(func):
+        TEMPLATES[key] = func
+        return func
+    return register
+
+
+@lru_cache(maxsize=1024)
+def render_template(key, language, variant=None):
+    """Translated template text for ``language`` (placeholders left in)"""
+    with translation.override(language):
+        return TEMPLATES[key](variant)
+
+
+def render_content(key, language, variant=None, **placeholders):
+    """Cached template plus cheap per-user placeholder substitution"""
+    rendered = render_template(key, language, variant)
+    if not placeholders:
+        return rendered
+    return rendered.format_map(placeholders)
+
+
+# Marked for translation here, translated when rendered
+NUTRITION_TIPS = [
+    gettext_noop("Start your day with a protein-rich breakfast to boost metabolism and maintain steady energy levels."),
+    gettext_noop("Drink a glass of water before each meal to help with digestion and portion control."),
+    gettext_noop("Include colorful vegetables in every meal - the more colors, the more nutrients!"),
+    gettext_noop("Choose whole grains over refined grains for better fiber and sustained energy."),
+    gettext_noop("Healthy fats like avocados, nuts, and olive oil support brain function and hormone production."),
+    gettext_noop("Eating slowly helps your brain recognize when you're full, preventing overeating."),
+    gettext_noop("Pre-cut vegetables and fruits for easy, healthy snacking throughout the week."),
+    gettext_noop("Greek yogurt is an excellent source of protein and probiotics for gut health."),
+    gettext_noop("Green tea contains antioxidants and can boost metabolism when enjoyed regularly."),
+    gettext_noop("Planning meals ahead reduces the temptation to make unhealthy food choices."),
+    gettext_noop("Lean proteins like chicken, fish, and legumes help maintain muscle mass during weight loss."),
+    gettext_noop("Dark leafy greens are nutrient powerhouses - try to include them in smoothies or salads."),
+    gettext_noop("Portion control is key - use smaller plates to naturally reduce serving sizes."),
+    gettext_noop("Stay hydrated! Sometimes thirst is mistaken for hunger."),
+    gettext_noop("Limit processed foods and focus on whole, natural ingredients for optimal nutrition."),
+]
+
+NUTRITION_TIP_COUNT = len(NUTRITION_TIPS)
+
+
+def daily_nutrition_tip_variant():
+    """Tip index for today, based on day of year for consistency"""
+    return timezone.now().timetuple().tm_yday % NUTRITION_TIP_COUNT
+
+
+@template('nutrition_tip')
+def _nutrition_tip(variant):
+    # No per-user placeholders: every user with this language gets the same text
+    return nutrition_tip_message(_(NUTRITION_TIPS[variant % NUTRITION_TIP_COUNT]))
+
+
+def nutrition_tip_message(tip):
+    """Daily tip message around already translated ``tip`` text"""
+    return f"🍎 {_('Daily Nutrition Tip')} 🍎\n\n{tip}\n\n{_('Have a healthy day!')} 😊"
+
+
+@template('weekly_checkin')
+def _weekly_checkin(variant):
+    message = _("""📊 Weekly Check-in Time! 
+
+Hi {name}! Let's see how your week went. Your progress matters to me! 💪
+
+How would you rate this week?""")
+
+    options = (
+        _("🌟 Excellent - Crushed my goals!"),
+        _("😊 Good - Made solid progress"),
+        _("😐 Okay - Had some ups and downs"),
+        _("😔 Tough - Struggled this week"),
+        _("📝 Let me share details")
+    )
+    
+    return message, options
+
+
+@template('reengagement')
+def _reengagement(variant):
+    return _("""👋 Hey {name}! We miss you!
+
+It's been {days} days since we last connected. Your fitness journey is important, and I'm here to help you get back on track! 💪
+
+What's been challenging for you lately?
+• Need motivation?
+• Want to adjust your plan?
+• Have questions about nutrition?
+
+Just reply and let's chat! Remember, every day is a new opportunity to work towards your goals. 🌟
+
+Type 'menu' to see what I can help you with today!""")
+
+
+@template('milestone')
+def _milestone(variant):
+    messages = {
+        'weight_goal': _("""🎉 AMAZING NEWS, {name}! 
+
+You've reached your weight goal of {target}kg! 
+Current weight: {current}kg
+
+This is a HUGE achievement! All your hard work, dedication, and consistency has paid off! 🏆
+
+What's next? Let's set a new goal or focus on maintenance. I'm so proud of you! 💪✨"""),
+
+        'weight_milestone': _("""🎉 Milestone Achieved! 
+
+{name}, you've lost {amount}kg! That's incredible progress! 📉
+
+Keep up this fantastic momentum. Every kilogram lost is a victory worth celebrating! 
+
+You're proving that consistency and dedication really work! 🌟💪"""),
+
+        'streak_7days': _("""🔥 7-Day Streak! 
+
+{name}, you've been consistent for 7 days straight! This is how lasting change happens! 
+
+Building healthy habits one day at a time. Keep this momentum going! 🚀💪"""),
+
+        'streak_30days': _("""🔥 30-Day Champion! 
+
+{name}, ONE MONTH of consistency! This is absolutely incredible! 🏆
+
+You've officially turned fitness into a lifestyle. This dedication will transform your life! 
+
+I'm so proud of your commitment! 🌟💪✨"""),
+
+        'streak_90days': _("""🔥 90-Day Legend! 
+
+{name}, THREE MONTHS without breaking your streak! Very few people ever get here! 🏆
+
+This isn't a phase anymore - it's who you are. Incredible work! 🌟💪"""),
+
+        'first_workout': _("""🎉 First Workout Complete! 
+
+{name}, you just completed your first workout! This is the beginning of an amazing journey! 
+
+The hardest part is starting, and you just did it! Every journey of a thousand miles begins with a single step! 💪🌟"""),
+
+        '100_workouts': _("""💯 100 Workouts! 
+
+{name}, you've completed {workouts} workouts! Every single one of them counted! 🏆
+
+Look how far you've come since the first one. Here's to the next hundred! 💪🚀"""),
+
+        'consistency': _("""⭐ Consistency Champion! 
+
+{name}, {weeks} weeks in a row of excellent workout adherence! 
+
+Showing up week after week is what turns effort into results. Keep it going! 💪🌟"""),
+
+        'transformation': _("""🦋 Body Transformation! 
+
+{name}, you've made {amount}kg of progress since your first weigh-in! 
+
+That's a real transformation, built one day at a time. Be proud of yourself! 🏆✨""")
+    }
+    
+    return messages.get(variant, _("🎉 Congratulations on your achievement!"))
+
+
+@template('fallback_name')
+def _fallback_name(variant):
+    return _("Superstar") if variant == 'milestone' else _("friend")
@@ -0,0 +1,76 @@
+# apps/notifications/dispatch.py
+import logging
+from collections import Counter
+from celery import chord, shared_task
+from django.conf import settings
+from django.utils.translation import activate
+from apps.users.models import User
+from apps.chatbot.whatsapp_handler import WhatsAppClient
+
+logger = logging.getLogger(__name__)
+
+
+def get_batch_size():
+    return getattr(settings, 'NOTIFICATION_BATCH_SIZE', 500)
+
+
+def dispatch_batches(batch_task, recipients, *args, label=None, batch_size=None):
+    """Fan recipients out as a chord of batch tasks instead of one task per user.
+
+    ``recipients`` is an ``EligibleRecipients`` builder; every chunk of ids
+    becomes one ``batch_task.s(user_ids, *args)`` message and
+    ``summarize_batches`` aggregates the per-batch counts once all finish.
+    Returns ``(batches, users)`` dispatched.
+    """
+    batch_size = batch_size or get_batch_size()
+    header = []
+    users = 0
+    
+    for user_ids in recipients.iter_ids(chunk_size=batch_size):
+        header.append(batch_task.s(user_ids, *args))
+        users += len(user_ids)
+    
+    if header:
+        chord(header)(summarize_batches.s(label or batch_task.name))
+    
+    return len(header), users
+
+
+def run_batch(user_ids, send, label):
+    """Load a batch of users in one query and call ``send(user, whatsapp_client)``.
+
+    ``send`` returns False to mark a user as skipped; exceptions are counted
+    as failures without aborting the rest of the batch.
+    """
+    counts = Counter(sent=0, skipped=0, failed=0)
+    whatsapp_client = WhatsAppClient()
+    
+    users = User.objects.filter(id__in=user_ids).select_related('profile')
+    for user in users:
+        try:
+            activate(user.preferred_language)
+            if send(user, whatsapp_client) is False:
+                counts['skipped'] += 1
+            else:
+                counts['sent'] += 1
+        except Exception as e:
+            counts['failed'] += 1
+            logger.error(f"Error sending {label} to user {user.id}: {str(e)}")
+    
+    # Users deleted between selection and delivery
+    counts['skipped'] += len(user_ids) - sum(counts.values())
+    return dict(counts)
+
+
+@shared_task
+def summarize_batches(results, label):
+    """Chord callback: add up the counts returned by every batch"""
+    totals = Counter()
+    for result in results:
+        totals.update(result or {})
+    
+    logger.info(
+        f"Finished {label}: {totals['sent']} sent, {totals['skipped']} skipped, "
+        f"{totals['failed']} failed across {len(results)} batches"
+    )
+    return dict(totals)
@@ -0,0 +1,84 @@
+# apps/notifications/management/commands/benchmark_dispatch.py
+import json
+import time
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from apps.core.sharding import get_shard_aliases
+from apps.users.models import User
+from apps.notifications.recipients import chunked
+from apps.notifications.tasks import send_weekly_checkin_batch, send_weekly_checkin_to_user
+
+
+class Command(BaseCommand):
+    help = 'Compare per-user and chunked fan-out dispatch (message count, payload, user loading)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='How many user ids to sample')
+        parser.add_argument('--batch-size', type=int, default=500)
+    
+    def handle(self, *args, **options):
+        user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True)[:options['users']])
+        if not user_ids:
+            self.stdout.write(self.style.WARNING('No users to benchmark against'))
+            return
+        
+        batches = list(chunked(user_ids, options['batch_size']))
+        
+        per_user = self._measure(
+            [send_weekly_checkin_to_user.s(user_id) for user_id in user_ids],
+            lambda: [self._load_one(user_id) for user_id in user_ids]
+        )
+        chunked_dispatch = self._measure(
+            [send_weekly_checkin_batch.s(batch) for batch in batches],
+            lambda: [self._load_batch(batch) for batch in batches]
+        )
+        
+        self.stdout.write(f"Sampled {len(user_ids)} users, batch size {options['batch_size']}")
+        for name, result in (('per-user', per_user), ('chunked', chunked_dispatch)):
+            self.stdout.write(
+                f"{name:>9}: {result['messages']} messages, {result['payload_bytes']} payload bytes, "
+                f"{result['queries']} queries, {result['load_seconds']:.3f}s loading users"
+            )
+        
+        if chunked_dispatch['load_seconds']:
+            speedup = per_user['load_seconds'] / chunked_dispatch['load_seconds']
+            self.stdout.write(self.style.SUCCESS(f"Chunked user loading is {speedup:.1f}x faster"))
+    
+    def _measure(self, signatures, load):
+        """Size the broker messages and time the worker-side user loading"""
+        payload_bytes = sum(
+            len(json.dumps({'task': sig.task, 'args': list(sig.args), 'kwargs': sig.kwargs}))
+            for sig in signatures
+        )
+        
+        contexts = [CaptureQueriesContext(connections[alias]) for alias in get_shard_aliases()]
+        for context in contexts:
+            context.__enter__()
+        try:
+            started = time.perf_counter()
+            load()
+            elapsed = time.perf_counter() - started
+        finally:
+            for context in contexts:
+                context.__exit__(None, None, None)
+        
+        return {
+            'messages': len(signatures),
+            'payload_bytes': payload_bytes,
+            'queries': sum(len(context.captured_queries) for context in contexts),
+            'load_seconds': elapsed,
+        }
+    
+    def _load_one(self, user_id):
+        # What each per-user task does before sending
+        user = User.objects.get(id=user_id)
+        getattr(user, 'profile', None)
+        return user
+    
+    def _load_batch(self, user_ids):
+        # What each batch task does before sending
+        return [
+            getattr(user, 'profile', None)
+            for user in User.objects.filter(id__in=user_ids).select_related('profile')
+        ]
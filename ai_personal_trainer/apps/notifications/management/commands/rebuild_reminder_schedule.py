@@ -0,0 +1,14 @@
+# apps/notifications/management/commands/rebuild_reminder_schedule.py
+from django.core.management.base import BaseCommand
+from apps.notifications.reminders import rebuild_reminder_schedule
+
+
+class Command(BaseCommand):
+    help = 'Recompute next_reminder_at for every user profile (backfill after deploy or tz data updates)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        scheduled = rebuild_reminder_schedule(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Scheduled workout reminders for {scheduled} profile(s)"))
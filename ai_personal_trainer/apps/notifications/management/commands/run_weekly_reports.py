@@ -0,0 +1,47 @@
+# apps/notifications/management/commands/run_weekly_reports.py
+import json
+from django.core.management.base import BaseCommand
+from apps.core.db_routers import replica_reads
+from apps.notifications.recipients import weekly_report_recipients
+from apps.notifications.tasks import _deliver_weekly_report
+from apps.reports.pipeline import WeeklyReportPipeline
+
+
+class Command(BaseCommand):
+    help = 'Generate and send weekly reports for every eligible user through one streaming pipeline'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200, help='Users loaded per chunk')
+        parser.add_argument('--processes', type=int, default=None, help='Render processes (default: all cores)')
+        parser.add_argument('--send-workers', type=int, default=16)
+        parser.add_argument('--limit', type=int, default=None, help='Only the first N eligible users')
+    
+    def handle(self, *args, **options):
+        # Unlike the Celery fan-out this runs in a normal process, so rendering
+        # gets a real process pool across every core
+        pipeline = WeeklyReportPipeline(
+            _deliver_weekly_report,
+            render_processes=options['processes'],
+            send_workers=options['send_workers']
+        )
+        summary = pipeline.run(self._chunks(options['chunk_size'], options['limit']))
+        
+        self.stdout.write(json.dumps(summary['stages'], indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['sent']} sent, {summary['skipped']} skipped, {summary['failed']} failed "
+            f"in {summary['seconds']:.1f}s"
+        ))
+    
+    def _chunks(self, chunk_size, limit):
+        """Stream eligible ids chunk by chunk, so loading starts right away"""
+        remaining = limit
+        recipients = weekly_report_recipients()
+        with replica_reads():
+            for chunk in recipients.iter_ids(chunk_size=chunk_size):
+                if remaining is not None:
+                    chunk = chunk[:remaining]
+                    remaining -= len(chunk)
+                if chunk:
+                    yield chunk
+                if remaining == 0:
+                    return
@@ -0,0 +1,264 @@
+# apps/notifications/motivation.py
+import logging
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from apps.ai_engine.openai_client import OpenAIClient
+from apps.notifications.models import MotivationalMessage
+
+logger = logging.getLogger(__name__)
+
+GOAL_BUCKETS = ('lose', 'gain', 'maintain')
+
+# Contexts passed to send_motivational_message -> MotivationalMessage.context
+POOL_CONTEXTS = {
+    'general': 'general',
+    'workout_completion': 'workout',
+    'missed_workout': 'workout',
+    'weekly_checkin': 'progress',
+    'weight_loss': 'progress',
+    'plateau': 'challenge',
+}
+
+# Every pool some context draws from; refreshing fewer leaves contexts with
+# an empty pool, which falls back to one LLM call per user
+POOLS = tuple(dict.fromkeys(POOL_CONTEXTS.values()))
+
+
+def goal_bucket(user, tolerance=1.0):
+    """Coarse goal used to share message pools: lose, gain or maintain"""
+    if not user.current_weight or not user.target_weight:
+        return 'maintain'
+    if user.target_weight < user.current_weight - tolerance:
+        return 'lose'
+    if user.target_weight > user.current_weight + tolerance:
+        return 'gain'
+    return 'maintain'
+
+
+def pool_context(context):
+    return POOL_CONTEXTS.get(context, 'general')
+
+
+def refresh_message_pools(contexts=('general',), pool_size=20, client=None):
+    """Generate one pool of messages per (context, goal bucket) group.
+
+    Each group costs a single completion that returns English and Spanish
+    variants together, so a daily refresh is ``len(contexts) * 3`` LLM calls
+    no matter how many users receive motivation. New pools replace the
+    previous generated pool for the group, which is deleted (along with any
+    generated rows deactivated by older refreshes) so the table stays at one
+    pool per group; hand-written messages are kept.
+    Returns the number of messages stored.
+    """
+    client = client or OpenAIClient()
+    created = 0
+    
+    for context in contexts:
+        for bucket in GOAL_BUCKETS:
+            pool = client.generate_motivational_pool(context, bucket, count=pool_size)
+            if not pool:
+                logger.warning(f"Empty motivational pool for {context}/{bucket}; keeping previous pool")
+                continue
+            
+            with transaction.atomic():
+                MotivationalMessage.objects.filter(
+                    context=context, goal_bucket=bucket, is_generated=True
+                ).delete()
+                MotivationalMessage.objects.bulk_create([
+                    MotivationalMessage(
+                        content_en=item['en'],
+                        content_es=item.get('es', ''),
+                        context=context,
+                        goal_bucket=bucket,
+                        is_generated=True,
+                    )
+                    for item in pool
+                ])
+            created += len(pool)
+    
+    if created:
+        bump_index_version()
+    logger.info(f"Generated {created} pooled motivational messages")
+    return created
+
+
+INDEX_VERSION_KEY = 'motivation:index_version'
+RECENT_KEY = 'motivation:recent:{user_id}'
+
+
+def bump_index_version():
+    """Tell every worker's MessageRotation to reload on its next check"""
+    try:
+        cache.incr(INDEX_VERSION_KEY)
+    except ValueError:
+        cache.set(INDEX_VERSION_KEY, 1, timeout=None)
+
+
+def build_alias_table(weights):
+    """Walker alias table: O(n) to build, O(1) per weighted draw"""
+    n = len(weights)
+    total = float(sum(weights))
+    prob = [w * n / total for w in weights]
+    alias = [0] * n
+    small = [i for i, p in enumerate(prob) if p < 1.0]
+    large = [i for i, p in enumerate(prob) if p >= 1.0]
+    
+    while small and large:
+        lesser, greater = small.pop(), large.pop()
+        alias[lesser] = greater
+        prob[greater] += prob[lesser] - 1.0
+        (small if prob[greater] < 1.0 else large).append(greater)
+    
+    for i in small + large:
+        prob[i] = 1.0
+    return prob, alias
+
+
+class WeightedPool:
+    """Active messages for one (context, language, goal bucket)"""
+    
+    def __init__(self, entries):
+        # entries: [(message_id, content, usage_count), ...]
+        self.ids = [entry[0] for entry in entries]
+        self.contents = [entry[1] for entry in entries]
+        self.prob, self.alias = build_alias_table([1.0 / (1 + entry[2]) for entry in entries])
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def draw(self):
+        i = random.randrange(len(self.ids))
+        if random.random() >= self.prob[i]:
+            i = self.alias[i]
+        return self.ids[i], self.contents[i]
+
+
+class MessageRotation:
+    """In-memory weighted rotation over active MotivationalMessage rows.
+
+    The whole active table is indexed per (context, language, goal bucket)
+    with weights of ``1 / (1 + usage_count)``, so rarely used messages come
+    up more often and a pick is an O(1) alias-table draw. The last few
+    messages each user received are kept in a small cache-backed ring buffer
+    and redrawn on a repeat. Usage counts are buffered in-process and written
+    in one UPDATE per flush. The index reloads when the table's version stamp
+    changes (saves, deletes, pool refreshes) or after ``max_age`` seconds.
+    """
+    
+    def __init__(self, history_size=5, max_draws=8, flush_every=200, flush_interval=30,
+                 version_check_interval=30, max_age=600):
+        self.history_size = history_size
+        self.max_draws = max_draws
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.version_check_interval = version_check_interval
+        self.max_age = max_age
+        
+        self._lock = threading.Lock()
+        self._pools = {}
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._pending = Counter()
+        self._flushed_at = time.monotonic()
+    
+    def pick(self, user, context='general'):
+        """Message text for ``user`` with ``{name}`` filled in, or None"""
+        self._ensure_fresh()
+        pool = self._pools.get((pool_context(context), user.preferred_language, goal_bucket(user)))
+        if not pool:
+            return None
+        
+        recent_key = RECENT_KEY.format(user_id=user.pk)
+        recent = cache.get(recent_key) or []
+        
+        message_id, content = pool.draw()
+        draws = 1
+        while message_id in recent and draws < min(self.max_draws, len(pool)):
+            message_id, content = pool.draw()
+            draws += 1
+        
+        cache.set(recent_key, (recent + [message_id])[-self.history_size:], timeout=60 * 60 * 24 * 30)
+        self._record_use(message_id)
+        
+        return content.replace('{name}', user.first_name or user.username)
+    
+    def flush(self):
+        """Write buffered usage counts in a single UPDATE"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return 0
+        
+        MotivationalMessage.objects.filter(pk__in=list(pending)).update(
+            usage_count=F('usage_count') + Case(
+                *[When(pk=pk, then=Value(count)) for pk, count in pending.items()],
+                default=Value(0),
+                output_field=IntegerField()
+            )
+        )
+        return sum(pending.values())
+    
+    def _record_use(self, message_id):
+        with self._lock:
+            self._pending[message_id] += 1
+            due = (
+                sum(self._pending.values()) >= self.flush_every
+                or time.monotonic() - self._flushed_at >= self.flush_interval
+            )
+        if due:
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing motivational message usage counts: {str(e)}")
+    
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if self._loaded_at and now - self._loaded_at < self.max_age:
+            if now - self._checked_at < self.version_check_interval:
+                return
+            self._checked_at = now
+            if cache.get(INDEX_VERSION_KEY) == self._version:
+                return
+        self._load()
+    
+    def _load(self):
+        version = cache.get(INDEX_VERSION_KEY)
+        rows = MotivationalMessage.objects.filter(is_active=True).values_list(
+            'id', 'context', 'goal_bucket', 'content_en', 'content_es', 'usage_count'
+        )
+        
+        grouped = defaultdict(list)
+        for message_id, context, bucket, content_en, content_es, usage_count in rows:
+            for language, content in (('en', content_en), ('es', content_es or content_en)):
+                for target in ([bucket] if bucket else GOAL_BUCKETS):
+                    grouped[(context, language, target)].append((message_id, content, usage_count))
+        
+        pools = {key: WeightedPool(entries) for key, entries in grouped.items()}
+        now = time.monotonic()
+        with self._lock:
+            self._pools = pools
+            self._version = version
+            self._loaded_at = self._checked_at = now
+        logger.info(f"Loaded {len(pools)} motivational message pools")
+
+
+_rotation = None
+
+
+def get_rotation():
+    global _rotation
+    if _rotation is None:
+        _rotation = MessageRotation()
+    return _rotation
+
+
+def pick_pool_message(user, context='general'):
+    """A pooled message for ``user``, or None when the pool is empty"""
+    return get_rotation().pick(user, context)
@@ -0,0 +1,169 @@
+# apps/notifications/recipients.py
+import logging
+from datetime import timedelta
+from itertools import islice
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from apps.users.models import User
+from apps.notifications.models import NotificationLog
+from apps.core.query_shapes import hot_query
+from apps.core.sharding import partition_by_shard, sharding_enabled
+
+logger = logging.getLogger(__name__)
+
+
+def chunked(iterable, size):
+    """Yield lists of at most ``size`` items from ``iterable``"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class EligibleRecipients:
+    """Set-based recipient selection for notification fan-outs.
+
+    Instead of one ``NotificationLog ... .exists()`` per user, the dedup rules
+    become NOT EXISTS subqueries (an anti-join) on the user query, so the whole
+    recipient set comes back from a single streamed query (one per shard
+    chunk when sharding is enabled).
+
+        recipients = EligibleRecipients(is_subscribed=True).not_notified(
+            'weekly_checkin', since=timezone.now() - timedelta(days=6)
+        )
+        for user_ids in recipients.iter_ids(chunk_size=500):
+            ...
+    """
+    
+    def __init__(self, *conditions, **filters):
+        self.conditions = list(conditions)
+        self.filters = filters
+        self.exclusions = []
+    
+    def where(self, *conditions, **filters):
+        """Add more user filters (Q objects or keyword lookups)"""
+        self.conditions.extend(conditions)
+        self.filters.update(filters)
+        return self
+    
+    def not_notified(self, notification_type, since=None, on_date=None):
+        """Skip users who already got ``notification_type`` since a time / on a date"""
+        lookups = {'notification_type': notification_type}
+        if since is not None:
+            lookups['created_at__gte'] = since
+        if on_date is not None:
+            lookups['created_at__date'] = on_date
+        self.exclusions.append(lookups)
+        return self
+    
+    def queryset(self, using=None):
+        """Eligible users as one query on ``using`` (router decides when None)"""
+        users = User.objects.all() if using is None else User.objects.using(using)
+        return self._exclude_notified(users.filter(*self.conditions, **self.filters))
+    
+    def _exclude_notified(self, users):
+        for lookups in self.exclusions:
+            already_sent = NotificationLog.objects.filter(user_id=OuterRef('pk'), **lookups)
+            users = users.filter(~Exists(already_sent))
+        return users
+    
+    def iter_ids(self, chunk_size=1000):
+        """Stream eligible user ids as lists of at most ``chunk_size``"""
+        if not sharding_enabled():
+            ids = self.queryset().order_by('pk').values_list('pk', flat=True)
+            yield from chunked(ids.iterator(chunk_size=chunk_size), chunk_size)
+            return
+        
+        # Notification logs live on each user's shard: filter candidates in the
+        # directory (profiles live there), then anti-join on the user's shard.
+        candidates = User.objects.filter(*self.conditions, **self.filters).order_by('pk').values_list('pk', flat=True)
+        for batch in chunked(candidates.iterator(chunk_size=chunk_size), chunk_size):
+            for alias, ids in partition_by_shard(batch).items():
+                shard_users = User.objects.using(alias).filter(pk__in=ids)
+                eligible = list(self._exclude_notified(shard_users).values_list('pk', flat=True))
+                if eligible:
+                    yield eligible
+
+
+def drain_ids(recipients):
+    """Evaluate a recipient builder the way ``dispatch_batches`` does"""
+    return [user_id for ids in recipients.iter_ids() for user_id in ids]
+
+
+def _now(user_id, conversation_id):
+    return (timezone.now(),)
+
+
+@hot_query('recent_notification', sample=lambda user_id, conversation_id: (
+    user_id, 'motivational', timezone.now() - timedelta(hours=6)
+), evaluate=lambda notifications: notifications.exists())
+def recent_notifications(user_id, notification_type, since):
+    """The user's ``notification_type`` logs since ``since`` (spam guard)"""
+    return NotificationLog.objects.filter(
+        user_id=user_id,
+        notification_type=notification_type,
+        created_at__gte=since
+    )
+
+
+@hot_query('weekly_report_recipients', sample=lambda user_id, conversation_id: (), evaluate=drain_ids)
+def weekly_report_recipients():
+    """Users who get the weekly report; shared by the Celery fan-out and run_weekly_reports"""
+    return EligibleRecipients(is_subscribed=True, is_onboarded=True, receive_weekly_reports=True)
+
+
+@hot_query('monthly_report_recipients', sample=lambda user_id, conversation_id: (), evaluate=drain_ids)
+def monthly_report_recipients():
+    """Users who get the monthly report"""
+    return EligibleRecipients(is_subscribed=True, is_onboarded=True)
+
+
+@hot_query('weekly_checkin_recipients', sample=_now, evaluate=drain_ids)
+def weekly_checkin_recipients(now):
+    """Users who want check-ins and haven't had one this week"""
+    return EligibleRecipients(
+        is_subscribed=True,
+        is_onboarded=True,
+        receive_motivational_messages=True
+    ).not_notified('weekly_checkin', since=now - timedelta(days=6))
+
+
+@hot_query('workout_reminder_recipients', sample=lambda user_id, conversation_id: (
+    [user_id], timezone.now()
+), evaluate=drain_ids)
+def workout_reminder_recipients(due_ids, now):
+    """Users in a claimed reminder batch not reminded in the last 12 hours"""
+    return EligibleRecipients(
+        id__in=due_ids,
+        is_subscribed=True,
+        is_onboarded=True
+    ).not_notified('workout_reminder', since=now - timedelta(hours=12))
+
+
+@hot_query('nutrition_tip_recipients', sample=_now, evaluate=drain_ids)
+def nutrition_tip_recipients(now):
+    """Users who haven't had today's nutrition tip"""
+    return EligibleRecipients(
+        is_subscribed=True,
+        is_onboarded=True,
+        receive_motivational_messages=True
+    ).not_notified('nutrition_tip', on_date=now.date())
+
+
+@hot_query('reengagement_recipients', sample=_now, evaluate=drain_ids)
+def reengagement_recipients(now):
+    """Users inactive for 3+ days without a re-engagement message this week"""
+    return EligibleRecipients(
+        is_subscribed=True,
+        is_onboarded=True,
+        last_active__lt=now - timedelta(days=3)
+    ).not_notified('reengagement', since=now - timedelta(days=7))
+
+
+def time_window_q(field, start, end):
+    """Q for a TimeField falling in [start, end], wrapping past midnight"""
+    if start <= end:
+        return Q(**{f'{field}__gte': start, f'{field}__lte': end})
+    return Q(**{f'{field}__gte': start}) | Q(**{f'{field}__lte': end})
@@ -0,0 +1,103 @@
+# apps/notifications/reminders.py
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from apps.users.models import UserProfile
+
+logger = logging.getLogger(__name__)
+
+
+def get_user_zone(tz_name):
+    """ZoneInfo for a ``User.timezone`` value, falling back to UTC"""
+    try:
+        return ZoneInfo(tz_name or 'UTC')
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown timezone {tz_name!r}, using UTC")
+        return ZoneInfo('UTC')
+
+
+def next_reminder_instant(workout_time, tz_name, after=None):
+    """Next UTC instant strictly after ``after`` when it is ``workout_time`` locally"""
+    if workout_time is None:
+        return None
+    
+    zone = get_user_zone(tz_name)
+    local_now = (after or timezone.now()).astimezone(zone)
+    candidate = datetime.combine(local_now.date(), workout_time, tzinfo=zone)
+    if candidate <= local_now:
+        candidate = datetime.combine(local_now.date() + timedelta(days=1), workout_time, tzinfo=zone)
+    return candidate.astimezone(dt_timezone.utc)
+
+
+def schedule_profile(profile, after=None):
+    """Set ``profile.next_reminder_at`` from its workout time and the user's timezone"""
+    profile.next_reminder_at = next_reminder_instant(
+        profile.preferred_workout_time, profile.user.timezone, after
+    )
+    return profile.next_reminder_at
+
+
+def claim_due_reminders(now=None, batch_size=1000, max_lateness=None):
+    """Pop every profile whose reminder is due and advance it to the next day.
+
+    Only rows with ``next_reminder_at <= now`` are touched (an index range
+    scan), so a tick costs O(due users). Rows are claimed under
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` where supported, so overlapping
+    ticks never hand out the same user twice. Yields lists of user ids.
+
+    Reminders more than ``max_lateness`` overdue (default
+    ``WORKOUT_REMINDER_MAX_LATENESS`` minutes), e.g. after a beat or worker
+    outage, are advanced without being yielded: a morning reminder is not
+    sent at night.
+    """
+    now = now or timezone.now()
+    if max_lateness is None:
+        max_lateness = timedelta(minutes=getattr(settings, 'WORKOUT_REMINDER_MAX_LATENESS', 60))
+    oldest_on_time = now - max_lateness
+    
+    while True:
+        with transaction.atomic():
+            profiles = list(
+                UserProfile.objects.select_for_update(skip_locked=True, of=('self',))
+                .filter(next_reminder_at__lte=now)
+                .select_related('user')
+                .order_by('next_reminder_at')[:batch_size]
+            )
+            if not profiles:
+                return
+            
+            on_time = [profile.user_id for profile in profiles if profile.next_reminder_at >= oldest_on_time]
+            for profile in profiles:
+                schedule_profile(profile, after=now)
+            UserProfile.objects.bulk_update(profiles, ['next_reminder_at'])
+        
+        if len(on_time) < len(profiles):
+            logger.warning(f"Skipped {len(profiles) - len(on_time)} workout reminders overdue by more than {max_lateness}")
+        if on_time:
+            yield on_time
+        
+        if len(profiles) < batch_size:
+            return
+
+
+def rebuild_reminder_schedule(batch_size=1000):
+    """Recompute ``next_reminder_at`` for every profile; returns rows scheduled"""
+    now = timezone.now()
+    scheduled = 0
+    profiles = UserProfile.objects.select_related('user').order_by('pk')
+    
+    batch = []
+    for profile in profiles.iterator(chunk_size=batch_size):
+        if schedule_profile(profile, after=now):
+            scheduled += 1
+        batch.append(profile)
+        if len(batch) >= batch_size:
+            UserProfile.objects.bulk_update(batch, ['next_reminder_at'])
+            batch = []
+    if batch:
+        UserProfile.objects.bulk_update(batch, ['next_reminder_at'])
+    
+    return scheduled
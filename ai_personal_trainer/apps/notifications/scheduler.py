@@ -0,0 +1,137 @@
+# apps/notifications/scheduler.py
+import json
+import logging
+import time
+import uuid
+from celery import current_app
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+# Claim due entries: move them from the pending set to the in-flight set with
+# a lease deadline, atomically, so two dispatchers never fire the same entry.
+CLAIM_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, member in ipairs(due) do
+    redis.call('ZREM', KEYS[1], member)
+    redis.call('ZADD', KEYS[2], ARGV[3], member)
+end
+return due
+"""
+
+# Put entries whose lease ran out (dispatcher died mid-batch) back in the queue
+REQUEUE_EXPIRED_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, member in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], member)
+    redis.call('ZADD', KEYS[1], ARGV[1], member)
+end
+return #expired
+"""
+
+
+class DelayedNotificationQueue:
+    """Redis sorted-set scheduler for notifications due at a later time.
+
+    Each pending entry is one compact JSON member ``[task, args, kwargs, id]``
+    scored by its due time in epoch seconds, so millions of entries cost a
+    few hundred bytes each in Redis instead of sitting in broker memory as
+    countdown messages. A once-a-second dispatcher claims whatever is due in
+    batches. Claimed entries sit in an in-flight set until acknowledged, and
+    go back to the queue if the dispatcher dies before sending them.
+    """
+    
+    def __init__(self, key='notifications:delayed', lease_seconds=60, redis=None):
+        self.key = key
+        self.inflight_key = f'{key}:inflight'
+        self.lease_seconds = lease_seconds
+        self._redis = redis
+    
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection('default')
+        return self._redis
+    
+    def schedule(self, task, args=None, kwargs=None, eta=None, countdown=None):
+        """Queue ``task`` to run at ``eta`` (datetime) or after ``countdown`` seconds"""
+        if eta is not None:
+            due = eta.timestamp()
+        else:
+            due = time.time() + (countdown or 0)
+        
+        name = getattr(task, 'name', task)
+        member = json.dumps(
+            [name, list(args or []), kwargs or {}, uuid.uuid4().hex[:12]],
+            separators=(',', ':')
+        )
+        self.redis.zadd(self.key, {member: due})
+        return member
+    
+    def claim_due(self, now=None, limit=500):
+        """Atomically claim up to ``limit`` due entries as (member, entry) pairs"""
+        now = now if now is not None else time.time()
+        members = self.redis.eval(
+            CLAIM_DUE_SCRIPT, 2, self.key, self.inflight_key,
+            now, limit, now + self.lease_seconds
+        )
+        claimed = []
+        for member in members:
+            member = member.decode() if isinstance(member, bytes) else member
+            claimed.append((member, json.loads(member)))
+        return claimed
+    
+    def ack(self, members):
+        if members:
+            self.redis.zrem(self.inflight_key, *members)
+    
+    def requeue_expired(self, now=None, limit=1000):
+        now = now if now is not None else time.time()
+        return self.redis.eval(REQUEUE_EXPIRED_SCRIPT, 2, self.key, self.inflight_key, now, limit)
+    
+    def pending_count(self):
+        return self.redis.zcard(self.key)
+    
+    def dispatch_due(self, batch_size=500, max_batches=20):
+        """Send every due entry to Celery in batches; returns how many were sent"""
+        self.requeue_expired()
+        sent = 0
+        
+        for _ in range(max_batches):
+            claimed = self.claim_due(limit=batch_size)
+            if not claimed:
+                break
+            
+            delivered = []
+            for member, (name, args, kwargs, _entry_id) in claimed:
+                try:
+                    current_app.send_task(name, args=args, kwargs=kwargs)
+                    delivered.append(member)
+                except Exception as e:
+                    # Left in flight; the lease expiry puts it back in the queue
+                    logger.error(f"Error dispatching scheduled {name}: {str(e)}")
+            
+            self.ack(delivered)
+            sent += len(delivered)
+            if len(claimed) < batch_size:
+                break
+        
+        return sent
+
+
+_queue = None
+
+
+def get_delayed_queue():
+    global _queue
+    if _queue is None:
+        _queue = DelayedNotificationQueue(
+            key=getattr(settings, 'DELAYED_NOTIFICATIONS_KEY', 'notifications:delayed')
+        )
+    return _queue
+
+
+def schedule_notification(task, args=None, kwargs=None, eta=None, countdown=None):
+    """Drop-in replacement for ``task.apply_async(args, countdown=...)`` on long delays"""
+    return get_delayed_queue().schedule(task, args=args, kwargs=kwargs, eta=eta, countdown=countdown)
@@ -0,0 +1,62 @@
+# apps/notifications/signals.py
+import logging
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from apps.users.models import UserProfile
+from apps.notifications.models import MotivationalMessage
+from apps.notifications.motivation import bump_index_version, get_rotation
+from apps.notifications.reminders import schedule_profile
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(pre_save, sender=UserProfile)
+def schedule_workout_reminder(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep ``next_reminder_at`` in step with ``preferred_workout_time``"""
+    if raw or (update_fields is not None and 'preferred_workout_time' not in update_fields):
+        return
+    schedule_profile(instance)
+
+
+@receiver(post_save, sender=UserProfile)
+def persist_workout_reminder(sender, instance, raw=False, update_fields=None, **kwargs):
+    """A partial save that changed the workout time did not write the new reminder instant"""
+    if raw or update_fields is None or 'preferred_workout_time' not in update_fields:
+        return
+    if 'next_reminder_at' not in update_fields:
+        UserProfile.objects.filter(pk=instance.pk).update(next_reminder_at=instance.next_reminder_at)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reschedule_on_timezone_change(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """A timezone change moves the user's reminder instant"""
+    if raw or created or (update_fields is not None and 'timezone' not in update_fields):
+        return
+    
+    try:
+        profile = UserProfile.objects.get(user=instance, preferred_workout_time__isnull=False)
+    except UserProfile.DoesNotExist:
+        return
+    
+    profile.user = instance
+    previous = profile.next_reminder_at
+    if schedule_profile(profile) != previous:
+        profile.save(update_fields=['next_reminder_at'])
+
+
+@receiver(post_save, sender=MotivationalMessage)
+@receiver(post_delete, sender=MotivationalMessage)
+def invalidate_message_rotation(sender, instance, **kwargs):
+    """Edits in the admin reach every worker's rotation index"""
+    bump_index_version()
+
+
+@worker_process_shutdown.connect
+def flush_message_usage(**kwargs):
+    """Don't lose buffered usage counts when a worker process exits"""
+    try:
+        get_rotation().flush()
+    except Exception as e:
+        logger.error(f"Error flushing motivational message usage counts: {str(e)}")
@@ -174,16 +174,35 @@ Start a new conversation
 
 # apps/notifications/tasks.py
 import logging
+from collections import defaultdict
 from datetime import timedelta, datetime
 from django.utils import timezone
 from django.utils.translation import gettext as _
 from django.utils.translation import activate
 from celery import shared_task
-from apps.users.models import User, ProgressEntry, WeightEntry
+from apps.users.models import User, ProgressEntry, WeightEntry, WorkoutPlan
+from apps.users.rollups import get_rollup
 from apps.chatbot.whatsapp_handler import WhatsAppClient
+from apps.chatbot.queries import active_plans
 from apps.ai_engine.openai_client import OpenAIClient
 from apps.reports.generators import WeeklyReportGenerator
+from apps.reports.pipeline import WeeklyReportPipeline, report_kinds
 from apps.notifications.models import NotificationLog, MotivationalMessage
+from apps.core.db_routers import replica_reads
+from apps.core.sharding import for_each_shard, shard_for_user
+from apps.notifications.recipients import (
+    chunked, recent_notifications, weekly_report_recipients, monthly_report_recipients,
+    weekly_checkin_recipients, workout_reminder_recipients, nutrition_tip_recipients, reengagement_recipients
+)
+from apps.notifications.reminders import claim_due_reminders
+from apps.notifications.scheduler import get_delayed_queue
+from apps.notifications.motivation import POOLS, pick_pool_message, refresh_message_pools
+from apps.notifications.content import render_content, render_template, daily_nutrition_tip_variant, nutrition_tip_message
+from apps.notifications.dispatch import dispatch_batches, run_batch
+from apps.core.archiving import ColdStorageArchiver
+from apps.core.quotas import get_quota_service
+from apps.core.models import APIUsageLog, Milestone
+from django.conf import settings
 import random
 
 logger = logging.getLogger(__name__)
@@ -202,26 +221,24 @@ def send_motivational_message(user_id, context='general'):
         activate(user.preferred_language)
         
         # Check if we've sent a message recently (avoid spam)
-        recent_motivation = NotificationLog.objects.filter(
-            user=user,
-            notification_type='motivational',
-            created_at__gte=timezone.now() - timedelta(hours=6)
+        recent_motivation = recent_notifications(
+            user.id, 'motivational', timezone.now() - timedelta(hours=6)
         ).exists()
         
         if recent_motivation:
             logger.info(f"Skipping motivational message for user {user_id} - sent recently")
             return
         
-        # Build user data for personalized message
-        user_data = _build_user_context(user)
-        
-        # Generate AI-powered motivational message
-        openai_client = OpenAIClient()
-        message = openai_client.generate_motivational_message(user_data, context)
+        # Use the pre-generated pool; only call the LLM when it is empty
+        message = pick_pool_message(user, context)
+        if not message:
+            user_data = _build_user_context(user)
+            openai_client = OpenAIClient()
+            message = openai_client.generate_motivational_message(user_data, context, user_id=user.id)
         
         # Send via WhatsApp
         whatsapp_client = WhatsAppClient()
-        whatsapp_client.send_message(user.whatsapp_number, message)
+        whatsapp_client.send_message(user.whatsapp_number, message, user_id=user.id)
         
         # Log notification
         NotificationLog.objects.create(
@@ -237,34 +254,39 @@ def send_motivational_message(user_id, context='general'):
         logger.error(f"Error sending motivational message to user {user_id}: {str(e)}")
 
 
+@shared_task
+def refresh_motivational_pools():
+    """Generate the day's pooled motivational messages (one LLM call per group)"""
+    try:
+        created = refresh_message_pools(contexts=POOLS)
+        logger.info(f"Refreshed motivational pools with {created} messages")
+        
+    except Exception as e:
+        logger.error(f"Error refreshing motivational pools: {str(e)}")
+
+
 @shared_task
 def send_weekly_checkin():
     """Send weekly check-in messages to all active users"""
     try:
-        # Get users who should receive weekly check-ins
-        users = User.objects.filter(
-            is_subscribed=True,
-            is_onboarded=True,
-            receive_motivational_messages=True
-        )
+        # Users who should receive weekly check-ins and haven't had one this week
+        recipients = weekly_checkin_recipients(timezone.now())
         
-        for user in users:
-            # Check if it's been a week since last check-in
-            last_checkin = NotificationLog.objects.filter(
-                user=user,
-                notification_type='weekly_checkin',
-                created_at__gte=timezone.now() - timedelta(days=6)
-            ).exists()
-            
-            if not last_checkin:
-                send_weekly_checkin_to_user.delay(user.id)
+        with replica_reads():
+            batches, dispatched = dispatch_batches(send_weekly_checkin_batch, recipients, label='weekly check-ins')
         
-        logger.info(f"Initiated weekly check-ins for {users.count()} users")
+        logger.info(f"Initiated weekly check-ins for {dispatched} users in {batches} batches")
         
     except Exception as e:
         logger.error(f"Error initiating weekly check-ins: {str(e)}")
 
 
+@shared_task
+def send_weekly_checkin_batch(user_ids):
+    """Send weekly check-ins to a batch of users"""
+    return run_batch(user_ids, _send_weekly_checkin, 'weekly check-in')
+
+
 @shared_task
 def send_weekly_checkin_to_user(user_id):
     """Send weekly check-in to specific user"""
@@ -272,23 +294,7 @@ def send_weekly_checkin_to_user(user_id):
         user = User.objects.get(id=user_id)
         activate(user.preferred_language)
         
-        # Build check-in message based on user's progress
-        message, interactive_options = _build_weekly_checkin_message(user)
-        
-        # Send via WhatsApp
-        whatsapp_client = WhatsAppClient()
-        if interactive_options:
-            whatsapp_client.send_interactive_list(user.whatsapp_number, message, interactive_options)
-        else:
-            whatsapp_client.send_message(user.whatsapp_number, message)
-        
-        # Log notification
-        NotificationLog.objects.create(
-            user=user,
-            notification_type='weekly_checkin',
-            content=message,
-            status='sent'
-        )
+        _send_weekly_checkin(user, WhatsAppClient())
         
         logger.info(f"Sent weekly check-in to user {user_id}")
         
@@ -296,25 +302,79 @@ def send_weekly_checkin_to_user(user_id):
         logger.error(f"Error sending weekly check-in to user {user_id}: {str(e)}")
 
 
+def _send_weekly_checkin(user, whatsapp_client):
+    # Build check-in message based on user's progress
+    message, interactive_options = _build_weekly_checkin_message(user)
+    
+    # Send via WhatsApp
+    if interactive_options:
+        whatsapp_client.send_interactive_list(user.whatsapp_number, message, interactive_options, user_id=user.id)
+    else:
+        whatsapp_client.send_message(user.whatsapp_number, message, user_id=user.id)
+    
+    # Log notification
+    NotificationLog.objects.create(
+        user=user,
+        notification_type='weekly_checkin',
+        content=message,
+        status='sent'
+    )
+
+
 @shared_task
 def generate_and_send_weekly_reports():
     """Generate and send weekly reports to all users"""
     try:
-        users = User.objects.filter(
-            is_subscribed=True,
-            is_onboarded=True,
-            receive_weekly_reports=True
-        )
+        recipients = weekly_report_recipients()
         
-        for user in users:
-            generate_and_send_weekly_report.delay(user.id)
+        with replica_reads():
+            batches, dispatched = dispatch_batches(
+                generate_and_send_weekly_report_batch, recipients, label='weekly reports'
+            )
         
-        logger.info(f"Initiated weekly report generation for {users.count()} users")
+        logger.info(f"Initiated weekly report generation for {dispatched} users in {batches} batches")
         
     except Exception as e:
         logger.error(f"Error initiating weekly report generation: {str(e)}")
 
 
+@shared_task
+def generate_and_send_weekly_report_batch(user_ids):
+    """Generate and send weekly reports for a batch of users"""
+    # Sub-chunks stream through load/compute/render/upload/send, so the
+    # stages overlap within the batch instead of running user by user
+    chunk_size = getattr(settings, 'REPORT_PIPELINE_CHUNK_SIZE', 50)
+    summary = WeeklyReportPipeline(_deliver_weekly_report).run(chunked(user_ids, chunk_size))
+    return {key: summary[key] for key in ('sent', 'skipped', 'failed')}
+
+
+@shared_task
+def generate_monthly_reports():
+    """Compute monthly reports for all active users"""
+    try:
+        recipients = monthly_report_recipients()
+        
+        with replica_reads():
+            batches, dispatched = dispatch_batches(
+                generate_monthly_report_batch, recipients, label='monthly reports'
+            )
+        
+        logger.info(f"Initiated monthly report generation for {dispatched} users in {batches} batches")
+        
+    except Exception as e:
+        logger.error(f"Error initiating monthly report generation: {str(e)}")
+
+
+@shared_task
+def generate_monthly_report_batch(user_ids):
+    """Compute and store monthly reports for a batch of users in one pass"""
+    # Runs on the 1st: report on the month that just ended
+    last_month = timezone.now().date().replace(day=1) - timedelta(days=1)
+    users = User.objects.filter(id__in=user_ids)
+    saved = WeeklyReportGenerator().generate_monthly_reports(users, month_start=last_month)
+    return {'sent': saved, 'skipped': 0, 'failed': len(user_ids) - saved}
+
+
 @shared_task
 def generate_and_send_weekly_report(user_id):
     """Generate and send weekly report to specific user"""
@@ -322,91 +382,89 @@ def generate_and_send_weekly_report(user_id):
         user = User.objects.get(id=user_id)
         activate(user.preferred_language)
         
-        # Generate report
-        report_generator = WeeklyReportGenerator()
-        report_data = report_generator.generate_report(user)
-        
-        if not report_data:
+        if _generate_and_send_weekly_report(user, WhatsAppClient()) is False:
             logger.info(f"No data available for weekly report for user {user_id}")
             return
         
-        # Generate PDF report
-        report_url = report_generator.generate_pdf_report(user, report_data)
-        
-        # Create summary message
-        summary_message = _build_weekly_report_message(user, report_data)
-        
-        # Send via WhatsApp
-        whatsapp_client = WhatsAppClient()
-        whatsapp_client.send_message(user.whatsapp_number, summary_message)
-        
-        # Send PDF report if available
-        if report_url:
-            whatsapp_client.send_document(
-                user.whatsapp_number,
-                report_url,
-                f"Weekly_Report_{timezone.now().strftime('%Y%m%d')}.pdf",
-                _("Your weekly progress report")
-            )
-        
-        # Log notification
-        NotificationLog.objects.create(
-            user=user,
-            notification_type='weekly_report',
-            content=summary_message,
-            status='sent'
-        )
-        
         logger.info(f"Sent weekly report to user {user_id}")
         
     except Exception as e:
         logger.error(f"Error sending weekly report to user {user_id}: {str(e)}")
 
 
+def _generate_and_send_weekly_report(user, whatsapp_client, report_generator=None, frame=None, metrics=None,
+                                     charts=None):
+    # Generate report
+    report_generator = report_generator or WeeklyReportGenerator()
+    report_data = report_generator.generate_report(user, frame=frame, metrics=metrics, charts=charts)
+    
+    if not report_data:
+        return False
+    
+    # WEEKLY_REPORT_FORMAT: 'html' sends a link only, 'pdf' attaches the PDF, 'both' does both
+    kinds = report_kinds()
+    urls = {
+        'html': report_generator.generate_html_report(user, report_data) if 'html' in kinds else None,
+        'pdf': report_generator.generate_pdf_report(user, report_data) if 'pdf' in kinds else None,
+    }
+    return _deliver_weekly_report(user, report_data, urls, whatsapp_client)
+
+
+def _deliver_weekly_report(user, report_data, urls, whatsapp_client):
+    """Send a generated weekly report; ``urls`` holds its 'html'/'pdf' artifact URLs"""
+    html_url, report_url = urls.get('html'), urls.get('pdf')
+    
+    # Create summary message
+    summary_message = _build_weekly_report_message(user, report_data, html_url, pdf_attached=bool(report_url))
+    
+    # Send via WhatsApp
+    whatsapp_client.send_message(user.whatsapp_number, summary_message, user_id=user.id)
+    
+    # Send PDF report if available
+    if report_url:
+        whatsapp_client.send_document(
+            user.whatsapp_number,
+            report_url,
+            f"Weekly_Report_{timezone.now().strftime('%Y%m%d')}.pdf",
+            _("Your weekly progress report"),
+            user_id=user.id
+        )
+    
+    # Log notification
+    NotificationLog.objects.create(
+        user=user,
+        notification_type='weekly_report',
+        content=summary_message,
+        status='sent'
+    )
+
+
 @shared_task
 def send_workout_reminders():
-    """Send workout reminders based on user preferences"""
+    """Send workout reminders to users whose preferred workout time has come"""
     try:
-        # Get users with workout plans and preferred workout times
-        users = User.objects.filter(
-            is_subscribed=True,
-            is_onboarded=True,
-            profile__preferred_workout_time__isnull=False
-        ).select_related('profile')
-        
-        current_time = timezone.now().time()
-        reminder_window = timedelta(minutes=30)
-        
-        for user in users:
-            preferred_time = user.profile.preferred_workout_time
-            
-            # Check if current time is within 30 minutes of preferred workout time
-            preferred_datetime = timezone.now().replace(
-                hour=preferred_time.hour,
-                minute=preferred_time.minute,
-                second=0,
-                microsecond=0
-            )
-            
-            time_diff = abs((timezone.now() - preferred_datetime).total_seconds())
+        now = timezone.now()
+        dispatched = 0
+        
+        # Only users due now are read; each is advanced to tomorrow's local time
+        for due_ids in claim_due_reminders(now):
+            recipients = workout_reminder_recipients(due_ids, now)
             
-            if time_diff <= reminder_window.total_seconds():
-                # Check if reminder already sent today
-                today_reminder = NotificationLog.objects.filter(
-                    user=user,
-                    notification_type='workout_reminder',
-                    created_at__date=timezone.now().date()
-                ).exists()
-                
-                if not today_reminder:
-                    send_workout_reminder_to_user.delay(user.id)
-        
-        logger.info("Processed workout reminders")
+            batches, users = dispatch_batches(send_workout_reminder_batch, recipients, label='workout reminders')
+            dispatched += users
+        
+        logger.info(f"Processed workout reminders for {dispatched} users")
         
     except Exception as e:
         logger.error(f"Error processing workout reminders: {str(e)}")
 
 
+@shared_task
+def send_workout_reminder_batch(user_ids):
+    """Send workout reminders to a batch of users"""
+    return run_batch(user_ids, _send_workout_reminder, 'workout reminder')
+
+
 @shared_task
 def send_workout_reminder_to_user(user_id):
     """Send workout reminder to specific user"""
@@ -414,14 +472,23 @@ def send_workout_reminder_to_user(user_id):
         user = User.objects.get(id=user_id)
         activate(user.preferred_language)
         
-        # Get current workout plan
-        workout_plan = user.workout_plans.filter(is_active=True).first()
+        _send_workout_reminder(user, WhatsAppClient())
+        
+        logger.info(f"Sent workout reminder to user {user_id}")
         
-        if workout_plan:
-            # Build reminder message with today's workout
-            message = _build_workout_reminder_message(user, workout_plan)
-        else:
-            message = _("""🏋️ Time for your workout! 💪
+    except Exception as e:
+        logger.error(f"Error sending workout reminder to user {user_id}: {str(e)}")
+
+
+def _send_workout_reminder(user, whatsapp_client):
+    # Get current workout plan
+    workout_plan = active_plans(WorkoutPlan, user.id).first()
+    
+    if workout_plan:
+        # Build reminder message with today's workout
+        message = _build_workout_reminder_message(user, workout_plan)
+    else:
+        message = _("""🏋️ Time for your workout! 💪
 
 No specific plan? No problem! Try:
 • 20 minutes of walking
@@ -429,111 +496,107 @@ No specific plan? No problem! Try:
 • 5 minutes of stretching
 
 Every bit of movement counts! You've got this! 🌟""")
-        
-        # Send via WhatsApp
-        whatsapp_client = WhatsAppClient()
-        whatsapp_client.send_message(user.whatsapp_number, message)
-        
-        # Log notification
-        NotificationLog.objects.create(
-            user=user,
-            notification_type='workout_reminder',
-            content=message,
-            status='sent'
-        )
-        
-        logger.info(f"Sent workout reminder to user {user_id}")
-        
-    except Exception as e:
-        logger.error(f"Error sending workout reminder to user {user_id}: {str(e)}")
+    
+    # Send via WhatsApp
+    whatsapp_client.send_message(user.whatsapp_number, message, user_id=user.id)
+    
+    # Log notification
+    NotificationLog.objects.create(
+        user=user,
+        notification_type='workout_reminder',
+        content=message,
+        status='sent'
+    )
 
 
 @shared_task
 def send_daily_nutrition_tips():
     """Send daily nutrition tips to users"""
     try:
-        users = User.objects.filter(
-            is_subscribed=True,
-            is_onboarded=True,
-            receive_motivational_messages=True
-        )
+        recipients = nutrition_tip_recipients(timezone.now())
         
-        # Get or create daily tip
-        tip = _get_daily_nutrition_tip()
+        # Today's tip; each batch renders it once per language
+        tip_variant = daily_nutrition_tip_variant()
         
-        for user in users:
-            # Check if tip already sent today
-            today_tip = NotificationLog.objects.filter(
-                user=user,
-                notification_type='nutrition_tip',
-                created_at__date=timezone.now().date()
-            ).exists()
-            
-            if not today_tip:
-                send_nutrition_tip_to_user.delay(user.id, tip)
+        with replica_reads():
+            batches, dispatched = dispatch_batches(
+                send_nutrition_tip_batch, recipients, tip_variant, label='nutrition tips'
+            )
         
-        logger.info(f"Sent daily nutrition tips to {users.count()} users")
+        logger.info(f"Sent daily nutrition tips to {dispatched} users in {batches} batches")
         
     except Exception as e:
         logger.error(f"Error sending daily nutrition tips: {str(e)}")
 
 
 @shared_task
-def send_nutrition_tip_to_user(user_id, tip):
+def send_nutrition_tip_batch(user_ids, tip_variant):
+    """Send the daily nutrition tip to a batch of users"""
+    return run_batch(
+        user_ids,
+        lambda user, whatsapp_client: _send_nutrition_tip(user, whatsapp_client, tip_variant),
+        'nutrition tip'
+    )
+
+
+@shared_task
+def send_nutrition_tip_to_user(user_id, tip_variant):
     """Send nutrition tip to specific user"""
     try:
         user = User.objects.get(id=user_id)
         activate(user.preferred_language)
         
-        # Personalize the tip
-        personalized_tip = f"🍎 {_('Daily Nutrition Tip')} 🍎\n\n{tip}\n\n{_('Have a healthy day!')} 😊"
-        
-        # Send via WhatsApp
-        whatsapp_client = WhatsAppClient()
-        whatsapp_client.send_message(user.whatsapp_number, personalized_tip)
-        
-        # Log notification
-        NotificationLog.objects.create(
-            user=user,
-            notification_type='nutrition_tip',
-            content=personalized_tip,
-            status='sent'
-        )
+        _send_nutrition_tip(user, WhatsAppClient(), tip_variant)
         
     except Exception as e:
         logger.error(f"Error sending nutrition tip to user {user_id}: {str(e)}")
 
 
+def _send_nutrition_tip(user, whatsapp_client, tip_variant):
+    if isinstance(tip_variant, str):
+        # Tasks queued before tips became template variants carry the tip text
+        # itself; accepted for one release
+        personalized_tip = nutrition_tip_message(tip_variant)
+    else:
+        # Same text for everyone with this language, rendered once per worker
+        personalized_tip = render_content('nutrition_tip', user.preferred_language, tip_variant)
+    
+    # Send via WhatsApp
+    whatsapp_client.send_message(user.whatsapp_number, personalized_tip, user_id=user.id)
+    
+    # Log notification
+    NotificationLog.objects.create(
+        user=user,
+        notification_type='nutrition_tip',
+        content=personalized_tip,
+        status='sent'
+    )
+
+
 @shared_task
 def check_inactive_users():
     """Check for inactive users and send re-engagement messages"""
     try:
-        # Find users inactive for 3+ days
-        inactive_threshold = timezone.now() - timedelta(days=3)
+        # Users inactive for 3+ days without a re-engagement message this week
+        recipients = reengagement_recipients(timezone.now())
         
-        inactive_users = User.objects.filter(
-            is_subscribed=True,
-            is_onboarded=True,
-            last_active__lt=inactive_threshold
-        )
-        
-        for user in inactive_users:
-            # Check if we've already sent a re-engagement message recently
-            recent_reengagement = NotificationLog.objects.filter(
-                user=user,
-                notification_type='reengagement',
-                created_at__gte=timezone.now() - timedelta(days=7)
-            ).exists()
-            
-            if not recent_reengagement:
-                send_reengagement_message.delay(user.id)
+        with replica_reads():
+            batches, dispatched = dispatch_batches(
+                send_reengagement_message_batch, recipients, label='re-engagement messages'
+            )
         
-        logger.info(f"Processed {inactive_users.count()} inactive users")
+        logger.info(f"Processed {dispatched} inactive users in {batches} batches")
         
     except Exception as e:
         logger.error(f"Error checking inactive users: {str(e)}")
 
 
+@shared_task
+def send_reengagement_message_batch(user_ids):
+    """Send re-engagement messages to a batch of inactive users"""
+    return run_batch(user_ids, _send_reengagement_message, 're-engagement message')
+
+
 @shared_task
 def send_reengagement_message(user_id):
     """Send re-engagement message to inactive user"""
@@ -541,39 +604,7 @@ def send_reengagement_message(user_id):
         user = User.objects.get(id=user_id)
         activate(user.preferred_language)
         
-        # Calculate days since last activity
-        if user.last_active:
-            days_inactive = (timezone.now() - user.last_active).days
-        else:
-            days_inactive = 7  # Default
-        
-        message = _("""👋 Hey {name}! We miss you!
-
-It's been {days} days since we last connected. Your fitness journey is important, and I'm here to help you get back on track! 💪
-
-What's been challenging for you lately?
-• Need motivation?
-• Want to adjust your plan?
-• Have questions about nutrition?
-
-Just reply and let's chat! Remember, every day is a new opportunity to work towards your goals. 🌟
-
-Type 'menu' to see what I can help you with today!""").format(
-            name=user.first_name or _("friend"),
-            days=days_inactive
-        )
-        
-        # Send via WhatsApp
-        whatsapp_client = WhatsAppClient()
-        whatsapp_client.send_message(user.whatsapp_number, message)
-        
-        # Log notification
-        NotificationLog.objects.create(
-            user=user,
-            notification_type='reengagement',
-            content=message,
-            status='sent'
-        )
+        _send_reengagement_message(user, WhatsAppClient())
         
         logger.info(f"Sent re-engagement message to user {user_id}")
         
@@ -581,6 +612,32 @@ Type 'menu' to see what I can help you with today!""").format(
         logger.error(f"Error sending re-engagement message to user {user_id}: {str(e)}")
 
 
+def _send_reengagement_message(user, whatsapp_client):
+    # Calculate days since last activity
+    if user.last_active:
+        days_inactive = (timezone.now() - user.last_active).days
+    else:
+        days_inactive = 7  # Default
+    
+    message = render_content(
+        'reengagement',
+        user.preferred_language,
+        name=user.first_name or render_template('fallback_name', user.preferred_language),
+        days=days_inactive
+    )
+    
+    # Send via WhatsApp
+    whatsapp_client.send_message(user.whatsapp_number, message, user_id=user.id)
+    
+    # Log notification
+    NotificationLog.objects.create(
+        user=user,
+        notification_type='reengagement',
+        content=message,
+        status='sent'
+    )
+
+
 @shared_task
 def send_milestone_celebration(user_id, milestone_type, milestone_data):
     """Send celebration message for user milestones"""
@@ -592,7 +649,7 @@ def send_milestone_celebration(user_id, milestone_type, milestone_data):
         
         # Send via WhatsApp
         whatsapp_client = WhatsAppClient()
-        whatsapp_client.send_message(user.whatsapp_number, message)
+        whatsapp_client.send_message(user.whatsapp_number, message, user_id=user.id)
         
         # Log notification
         NotificationLog.objects.create(
@@ -608,6 +665,86 @@ def send_milestone_celebration(user_id, milestone_type, milestone_data):
         logger.error(f"Error sending milestone celebration to user {user_id}: {str(e)}")
 
 
+@shared_task
+def send_milestone_celebration_batch(celebrations):
+    """Celebrate a batch of milestones queued by the milestone engine.
+
+    ``celebrations`` are dicts of milestone_id, user_id, milestone_type and
+    milestone_data. Users are loaded in one query, one WhatsApp client is
+    shared, and the delivered milestones are marked celebrated per shard.
+    """
+    whatsapp_client = WhatsAppClient()
+    users = User.objects.in_bulk({item['user_id'] for item in celebrations})
+    celebrated = defaultdict(list)
+    logs = defaultdict(list)
+    
+    for item in celebrations:
+        user = users.get(item['user_id'])
+        if user is None:
+            continue
+        try:
+            activate(user.preferred_language)
+            message = _build_milestone_message(user, item['milestone_type'], item['milestone_data'])
+            whatsapp_client.send_message(user.whatsapp_number, message, user_id=user.id)
+            alias = shard_for_user(user.id)
+            logs[alias].append(NotificationLog(user=user, notification_type='milestone', content=message, status='sent'))
+            celebrated[alias].append(item['milestone_id'])
+        except Exception as e:
+            logger.error(f"Error sending milestone celebration to user {user.id}: {str(e)}")
+    
+    # bulk_create has no instance hint for the router, so pick each shard explicitly
+    now = timezone.now()
+    for alias, milestone_ids in celebrated.items():
+        NotificationLog.objects.using(alias).bulk_create(logs[alias])
+        Milestone.objects.using(alias).filter(pk__in=milestone_ids).update(is_celebrated=True, celebrated_at=now)
+    
+    sent = sum(len(shard_logs) for shard_logs in logs.values())
+    logger.info(f"Sent {sent} of {len(celebrations)} milestone celebrations")
+    return sent
+
+
+@shared_task
+def dispatch_scheduled_notifications():
+    """Fire delayed notifications that have come due (runs every second)"""
+    try:
+        sent = get_delayed_queue().dispatch_due()
+        if sent:
+            logger.info(f"Dispatched {sent} scheduled notifications")
+        
+    except Exception as e:
+        logger.error(f"Error dispatching scheduled notifications: {str(e)}")
+
+
+@shared_task
+def flush_ai_usage_rollups():
+    """Write the AI messages charged against quotas back to user rollups (runs every minute)"""
+    try:
+        flushed = get_quota_service().flush_usage_rollups()
+        if flushed:
+            logger.info(f"Flushed {flushed} AI quota charges to user rollups")
+        
+    except Exception as e:
+        logger.error(f"Error flushing AI usage rollups: {str(e)}")
+
+
+@shared_task
+def archive_cold_logs():
+    """Move old NotificationLog/APIUsageLog rows to compressed cold storage"""
+    try:
+        archivers = [
+            ColdStorageArchiver(NotificationLog, settings.NOTIFICATION_LOG_RETENTION_DAYS),
+            ColdStorageArchiver(APIUsageLog, settings.API_USAGE_LOG_RETENTION_DAYS),
+        ]
+        
+        for archiver in archivers:
+            results = for_each_shard(lambda alias: archiver.archive(using=alias))
+            total = sum(count or 0 for count in results.values())
+            logger.info(f"Archived {total} {archiver.model.__name__} rows to cold storage")
+        
+    except Exception as e:
+        logger.error(f"Error archiving cold logs: {str(e)}")
+
+
 def _build_user_context(user):
     """Build user context for AI message generation"""
     context = {
@@ -620,42 +757,30 @@ def _build_user_context(user):
         'target_weight': user.target_weight,
     }
     
-    # Add recent progress data
-    recent_weight = user.weight_entries.order_by('-date_recorded').first()
-    if recent_weight:
-        context['recent_weight'] = recent_weight.weight
-        context['last_weigh_in'] = recent_weight.date_recorded
+    # Add recent progress data (one row read from the rollup)
+    rollup = get_rollup(user)
+    if rollup.last_weigh_in:
+        context['recent_weight'] = rollup.latest_weight
+        context['last_weigh_in'] = rollup.last_weigh_in
     
     # Add workout adherence data
-    recent_progress = user.progress_entries.order_by('-week_start_date').first()
-    if recent_progress:
-        context['workout_adherence'] = recent_progress.workout_adherence
-        context['energy_level'] = recent_progress.energy_level
+    if rollup.adherence_week:
+        context['workout_adherence'] = rollup.workout_adherence
+        context['energy_level'] = rollup.energy_level
     
     return context
 
 
 def _build_weekly_checkin_message(user):
     """Build weekly check-in message"""
-    message = _("""📊 Weekly Check-in Time! 
-
-Hi {name}! Let's see how your week went. Your progress matters to me! 💪
-
-How would you rate this week?""").format(name=user.first_name or _("friend"))
-    
-    options = [
-        _("🌟 Excellent - Crushed my goals!"),
-        _("😊 Good - Made solid progress"),
-        _("😐 Okay - Had some ups and downs"),
-        _("😔 Tough - Struggled this week"),
-        _("📝 Let me share details")
-    ]
+    message, options = render_template('weekly_checkin', user.preferred_language)
+    message = message.format(name=user.first_name or render_template('fallback_name', user.preferred_language))
     
-    return message, options
+    return message, list(options)
 
 
-def _build_weekly_report_message(user, report_data):
-    """Build weekly report summary message"""
+def _build_weekly_report_message(user, report_data, html_url=None, pdf_attached=True):
+    """Build weekly report summary message, linking the HTML report if any"""
     weight_change = report_data.get('weight_change', 0)
     workout_count = report_data.get('workouts_completed', 0)
     
@@ -669,6 +794,13 @@ def _build_weekly_report_message(user, report_data):
         weight_text = _("No change this week")
         weight_emoji = "➡️"
     
+    if html_url:
+        report_note = _("Keep up the amazing work! View your full report here: {url} 📄").format(url=html_url)
+    elif pdf_attached:
+        report_note = _("Keep up the amazing work! Your detailed PDF report is attached. 📄")
+    else:
+        report_note = _("Keep up the amazing work!")
+    
     message = _("""📊 Your Weekly Progress Report
 
 {weight_emoji} Weight: {weight_text}
@@ -677,14 +809,15 @@ def _build_weekly_report_message(user, report_data):
 
 {summary}
 
-Keep up the amazing work! Your detailed PDF report is attached. 📄
+{report_note}
 
 Questions? Just ask! I'm here to help! 💪""").format(
         weight_emoji=weight_emoji,
         weight_text=weight_text,
         workout_count=workout_count,
         overall_rating=report_data.get('overall_rating', _('Good progress')),
-        summary=report_data.get('summary', _('You\'re making steady progress!'))
+        summary=report_data.get('summary', _('You\'re making steady progress!')),
+        report_note=report_note
     )
     
     return message
@@ -735,86 +868,17 @@ What matters is that you move! You've got this! 🌟""")
     return message
 
 
-def _get_daily_nutrition_tip():
-    """Get daily nutrition tip"""
-    tips = [
-        _("Start your day with a protein-rich breakfast to boost metabolism and maintain steady energy levels."),
-        _("Drink a glass of water before each meal to help with digestion and portion control."),
-        _("Include colorful vegetables in every meal - the more colors, the more nutrients!"),
-        _("Choose whole grains over refined grains for better fiber and sustained energy."),
-        _("Healthy fats like avocados, nuts, and olive oil support brain function and hormone production."),
-        _("Eating slowly helps your brain recognize when you're full, preventing overeating."),
-        _("Pre-cut vegetables and fruits for easy, healthy snacking throughout the week."),
-        _("Greek yogurt is an excellent source of protein and probiotics for gut health."),
-        _("Green tea contains antioxidants and can boost metabolism when enjoyed regularly."),
-        _("Planning meals ahead reduces the temptation to make unhealthy food choices."),
-        _("Lean proteins like chicken, fish, and legumes help maintain muscle mass during weight loss."),
-        _("Dark leafy greens are nutrient powerhouses - try to include them in smoothies or salads."),
-        _("Portion control is key - use smaller plates to naturally reduce serving sizes."),
-        _("Stay hydrated! Sometimes thirst is mistaken for hunger."),
-        _("Limit processed foods and focus on whole, natural ingredients for optimal nutrition.")
-    ]
-    
-    # Get tip based on day of year for consistency
-    day_of_year = timezone.now().timetuple().tm_yday
-    return tips[day_of_year % len(tips)]
-
-
 def _build_milestone_message(user, milestone_type, milestone_data):
     """Build milestone celebration message"""
-    name = user.first_name or _("Superstar")
-    
-    messages = {
-        'weight_goal': _("""🎉 AMAZING NEWS, {name}! 
-
-You've reached your weight goal of {target}kg! 
-Current weight: {current}kg
-
-This is a HUGE achievement! All your hard work, dedication, and consistency has paid off! 🏆
-
-What's next? Let's set a new goal or focus on maintenance. I'm so proud of you! 💪✨"""),
-        
-        'weight_milestone': _("""🎉 Milestone Achieved! 
-
-{name}, you've lost {amount}kg! That's incredible progress! 📉
-
-Keep up this fantastic momentum. Every kilogram lost is a victory worth celebrating! 
-
-You're proving that consistency and dedication really work! 🌟💪"""),
-        
-        'streak_7days': _("""🔥 7-Day Streak! 
-
-{name}, you've been consistent for 7 days straight! This is how lasting change happens! 
-
-Building healthy habits one day at a time. Keep this momentum going! 🚀💪"""),
-        
-        'streak_30days': _("""🔥 30-Day Champion! 
-
-{name}, ONE MONTH of consistency! This is absolutely incredible! 🏆
-
-You've officially turned fitness into a lifestyle. This dedication will transform your life! 
-
-I'm so proud of your commitment! 🌟💪✨"""),
-        
-        'first_workout': _("""🎉 First Workout Complete! 
-
-{name}, you just completed your first workout! This is the beginning of an amazing journey! 
-
-The hardest part is starting, and you just did it! Every journey of a thousand miles begins with a single step! 💪🌟""")
-    }
-    
-    template = messages.get(milestone_type, _("🎉 Congratulations on your achievement!"))
+    name = user.first_name or render_template('fallback_name', user.preferred_language, 'milestone')
     
-    return template.format(
-        name=name,
-        **milestone_data
-    )
+    return render_content('milestone', user.preferred_language, milestone_type, name=name, **milestone_data)
 
 
 # Periodic task setup (in celery beat schedule)
 def setup_periodic_tasks():
     """Setup periodic tasks for notifications"""
-    from django_celery_beat.models import PeriodicTask, CrontabSchedule
+    from django_celery_beat.models import PeriodicTask, CrontabSchedule, IntervalSchedule
     
     # Daily motivational messages (9 AM)
     daily_9am, _ = CrontabSchedule.objects.get_or_create(
@@ -831,6 +895,21 @@ def setup_periodic_tasks():
         task='apps.notifications.tasks.send_daily_nutrition_tips',
     )
     
+    # Motivational message pools (daily 8 AM, ahead of the morning sends)
+    daily_8am, _ = CrontabSchedule.objects.get_or_create(
+        minute=0,
+        hour=8,
+        day_of_week='*',
+        day_of_month='*',
+        month_of_year='*',
+    )
+    
+    PeriodicTask.objects.get_or_create(
+        crontab=daily_8am,
+        name='Refresh Motivational Pools',
+        task='apps.notifications.tasks.refresh_motivational_pools',
+    )
+    
     # Weekly check-ins (Sunday 6 PM)
     weekly_sunday, _ = CrontabSchedule.objects.get_or_create(
         minute=0,
@@ -861,19 +940,37 @@ def setup_periodic_tasks():
         task='apps.notifications.tasks.generate_and_send_weekly_reports',
     )
     
-    # Workout reminders (every 30 minutes during active hours)
-    every_30min, _ = CrontabSchedule.objects.get_or_create(
-        minute='*/30',
-        hour='6-22',  # 6 AM to 10 PM
+    # Monthly reports (1st of the month, 7 AM)
+    monthly_first, _ = CrontabSchedule.objects.get_or_create(
+        minute=0,
+        hour=7,
         day_of_week='*',
-        day_of_month='*',
+        day_of_month=1,
         month_of_year='*',
     )
     
     PeriodicTask.objects.get_or_create(
-        crontab=every_30min,
+        crontab=monthly_first,
+        name='Monthly Reports',
+        task='apps.notifications.tasks.generate_monthly_reports',
+    )
+    
+    # Workout reminders (every 5 minutes; only users due in their own timezone are read)
+    every_5min, _ = CrontabSchedule.objects.get_or_create(
+        minute='*/5',
+        hour='*',
+        day_of_week='*',
+        day_of_month='*',
+        month_of_year='*',
+    )
+    
+    # update_or_create: existing databases already have this task on the old hourly crontab
+    PeriodicTask.objects.update_or_create(
         name='Workout Reminders',
-        task='apps.notifications.tasks.send_workout_reminders',
+        defaults={
+            'crontab': every_5min,
+            'task': 'apps.notifications.tasks.send_workout_reminders',
+        },
     )
     
     # Check inactive users (daily at midnight)
@@ -890,3 +987,42 @@ def setup_periodic_tasks():
         name='Check Inactive Users',
         task='apps.notifications.tasks.check_inactive_users',
     )
+    
+    # Archive cold notification/API logs (daily at 3 AM, off-peak)
+    daily_3am, _ = CrontabSchedule.objects.get_or_create(
+        minute=0,
+        hour=3,
+        day_of_week='*',
+        day_of_month='*',
+        month_of_year='*',
+    )
+    
+    PeriodicTask.objects.get_or_create(
+        crontab=daily_3am,
+        name='Archive Cold Logs',
+        task='apps.notifications.tasks.archive_cold_logs',
+    )
+    
+    # Delayed notifications (every second, fires whatever has come due)
+    every_second, _ = IntervalSchedule.objects.get_or_create(
+        every=1,
+        period=IntervalSchedule.SECONDS,
+    )
+    
+    PeriodicTask.objects.get_or_create(
+        interval=every_second,
+        name='Dispatch Scheduled Notifications',
+        task='apps.notifications.tasks.dispatch_scheduled_notifications',
+    )
+    
+    # AI quota usage rollups (every minute, one batch for all users)
+    every_minute, _ = IntervalSchedule.objects.get_or_create(
+        every=60,
+        period=IntervalSchedule.SECONDS,
+    )
+    
+    PeriodicTask.objects.get_or_create(
+        interval=every_minute,
+        name='Flush AI Usage Rollups',
+        task='apps.notifications.tasks.flush_ai_usage_rollups',
+    )
@@ -0,0 +1,104 @@
+# apps/reports/artifacts.py
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+# Bump when a renderer's output changes for the same inputs (layout, styles,
+# fonts); old artifacts are then simply never looked up again.
+TEMPLATE_VERSIONS = {
+    'chart': 1,
+    'pdf': 1,
+    'html': 1,
+}
+
+
+def artifact_digest(kind, inputs, language):
+    """sha256 of the canonical JSON of the inputs, language and template version"""
+    payload = json.dumps(
+        {'kind': kind, 'version': TEMPLATE_VERSIONS[kind], 'language': language, 'inputs': inputs},
+        sort_keys=True,
+        separators=(',', ':'),
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ArtifactStore:
+    """Content-addressed report artifacts in default storage.
+
+    An artifact lives at ``artifacts/<kind>/<ab>/<digest>.<ext>``, where the
+    digest covers everything that affects its bytes. Before rendering, the
+    store checks whether that path exists; identical inputs (reruns, users
+    with no new entries, shared charts) are served without rendering or
+    uploading, and storage holds each distinct artifact once. Paths seen by
+    this process are remembered so repeat lookups skip the storage call.
+    """
+    
+    def __init__(self, storage=None, prefix='artifacts', known_size=10000):
+        self.storage = storage or default_storage
+        self.prefix = prefix
+        self.known_size = known_size
+        self._known = OrderedDict()
+    
+    def path(self, kind, digest, extension):
+        return f"{self.prefix}/{kind}/{digest[:2]}/{digest}.{extension}"
+    
+    def lookup(self, kind, inputs, language, extension):
+        """(path, exists) for the artifact these inputs would produce"""
+        path = self.path(kind, artifact_digest(kind, inputs, language), extension)
+        return path, self._exists(path)
+    
+    def get_or_render(self, kind, inputs, language, extension, render):
+        """URL of the artifact, calling ``render()`` for bytes only on a miss"""
+        path, exists = self.lookup(kind, inputs, language, extension)
+        if not exists:
+            content = render()
+            if content is None:
+                return None
+            self.save(path, content)
+        return self.url(path)
+    
+    def save(self, path, content):
+        saved_path = self.storage.save(path, ContentFile(content))
+        if saved_path != path:
+            # Another worker stored the same artifact first; keep theirs
+            self.storage.delete(saved_path)
+        self._remember(path)
+        return path
+    
+    def url(self, path):
+        return self.storage.url(path)
+    
+    def _exists(self, path):
+        if path in self._known:
+            self._known.move_to_end(path)
+            return True
+        try:
+            exists = self.storage.exists(path)
+        except Exception as e:
+            logger.error(f"Error checking artifact {path}: {str(e)}")
+            return False
+        if exists:
+            self._remember(path)
+        return exists
+    
+    def _remember(self, path):
+        self._known[path] = True
+        self._known.move_to_end(path)
+        while len(self._known) > self.known_size:
+            self._known.popitem(last=False)
+
+
+_store = None
+
+
+def get_artifact_store():
+    global _store
+    if _store is None:
+        _store = ArtifactStore()
+    return _store
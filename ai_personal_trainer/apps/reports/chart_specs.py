@@ -0,0 +1,29 @@
+# apps/reports/chart_specs.py
+
+# Chart specs are plain data (ISO dates, numeric series, translated labels):
+# they pickle cheaply to render processes and feed either chart backend,
+# PNG (apps.reports.charts) or vector (apps.reports.vector_charts).
+
+
+def weight_chart_spec(entries, labels):
+    """Spec for the weight trend chart"""
+    return {
+        'kind': 'weight',
+        'dates': [entry.date_recorded.isoformat() for entry in entries],
+        'series': {'weight': [entry.weight for entry in entries]},
+        'labels': labels,
+    }
+
+
+def progress_chart_spec(entries, labels):
+    """Spec for the weekly adherence and energy chart"""
+    return {
+        'kind': 'progress',
+        'dates': [entry.week_start_date.isoformat() for entry in entries],
+        'series': {
+            'workout_adherence': [entry.workout_adherence or 0 for entry in entries],
+            'diet_adherence': [entry.diet_adherence or 0 for entry in entries],
+            'energy_level': [entry.energy_level or 0 for entry in entries],
+        },
+        'labels': labels,
+    }
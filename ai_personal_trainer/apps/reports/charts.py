@@ -0,0 +1,153 @@
+# apps/reports/charts.py
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.dates as mdates
+import matplotlib.style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+logger = logging.getLogger(__name__)
+
+CHART_STYLE = 'seaborn-v0_8'
+CHART_SIZE = (10, 6)
+CHART_DPI = 150
+
+# One warm figure per process; pyplot's global figure manager is never used
+_figure = None
+
+
+def _get_figure():
+    global _figure
+    if _figure is None:
+        try:
+            matplotlib.style.use(CHART_STYLE)
+        except (OSError, ValueError):
+            logger.warning(f"Matplotlib style {CHART_STYLE} unavailable, using defaults")
+        _figure = Figure(figsize=CHART_SIZE)
+        FigureCanvasAgg(_figure)
+        _figure.add_subplot(111)
+    return _figure
+
+
+def _init_worker():
+    _get_figure()
+
+
+def _draw_weight(ax, dates, spec):
+    labels = spec['labels']
+    ax.plot(dates, spec['series']['weight'], marker='o', linewidth=2, markersize=6)
+    ax.set_title(labels['title'], fontsize=16, fontweight='bold')
+    ax.set_xlabel(labels['x'], fontsize=12)
+    ax.set_ylabel(labels['y'], fontsize=12)
+    ax.xaxis.set_major_locator(mdates.DayLocator(interval=7))
+
+
+def _draw_progress(ax, dates, spec):
+    labels = spec['labels']
+    series = spec['series']
+    ax.plot(dates, series['workout_adherence'], marker='o', label=labels['workout_adherence'], linewidth=2)
+    ax.plot(dates, series['diet_adherence'], marker='s', label=labels['diet_adherence'], linewidth=2)
+    ax.plot(dates, series['energy_level'], marker='^', label=labels['energy_level'], linewidth=2)
+    ax.set_title(labels['title'], fontsize=16, fontweight='bold')
+    ax.set_xlabel(labels['x'], fontsize=12)
+    ax.set_ylabel(labels['y'], fontsize=12)
+    ax.set_ylim(0, 5)
+    ax.legend()
+
+
+DRAWERS = {
+    'weight': _draw_weight,
+    'progress': _draw_progress,
+}
+
+
+def render_chart(spec):
+    """Render one chart spec to PNG bytes on this process's warm figure"""
+    figure = _get_figure()
+    ax = figure.axes[0]
+    ax.clear()
+    
+    dates = [date.fromisoformat(value) for value in spec['dates']]
+    DRAWERS[spec['kind']](ax, dates, spec)
+    
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%m/%d'))
+    for tick in ax.get_xticklabels():
+        tick.set_rotation(45)
+    ax.grid(True, alpha=0.3)
+    figure.tight_layout()
+    
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png', dpi=CHART_DPI, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def render_batch(specs):
+    """Render a list of specs in this process; failed charts come back as None"""
+    rendered = []
+    for spec in specs:
+        try:
+            rendered.append(render_chart(spec))
+        except Exception as e:
+            logger.error(f"Error rendering {spec.get('kind')} chart: {str(e)}")
+            rendered.append(None)
+    return rendered
+
+
+class ChartRenderer:
+    """Render chart specs to PNG bytes across a pool of processes.
+
+    Each worker process keeps one warm Agg figure and reuses it for every
+    chart, so there is no per-chart figure/canvas setup and no shared pyplot
+    state. Inside daemonic processes (Celery prefork workers), which cannot
+    start children, charts render in-process on the same warm figure; there
+    the worker pool itself supplies the parallelism.
+    """
+    
+    def __init__(self, processes=None, batch_size=16):
+        self.processes = processes if processes is not None else (os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self._pool = None
+    
+    @property
+    def uses_pool(self):
+        return self.processes > 1 and not multiprocessing.current_process().daemon
+    
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker)
+        return self._pool
+    
+    def render_many(self, specs):
+        """PNG bytes (or None on failure) for each spec, in order"""
+        specs = list(specs)
+        if not specs:
+            return []
+        if not self.uses_pool or len(specs) <= self.batch_size:
+            return render_batch(specs)
+        
+        batches = [specs[i:i + self.batch_size] for i in range(0, len(specs), self.batch_size)]
+        rendered = []
+        for result in self._get_pool().map(render_batch, batches):
+            rendered.extend(result)
+        return rendered
+    
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+_renderer = None
+
+
+def get_chart_renderer():
+    global _renderer
+    if _renderer is None:
+        _renderer = ChartRenderer()
+    return _renderer
@@ -178,61 +178,95 @@ from datetime import timedelta, datetime
 from django.utils import timezone
 from django.utils.translation import gettext as _
 from django.utils.translation import activate
+from django.utils import translation
 from django.conf import settings
 from django.template.loader import render_to_string
-from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics.charts.linecharts import HorizontalLineChart
-from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.platypus import SimpleDocTemplate, Paragraph
 from apps.users.models import User, WeightEntry, ProgressEntry
-from apps.reports.models import WeeklyReport
+from apps.reports.models import WeeklyReport, MonthlyReport
+from apps.core.db_routers import replica_reads
+from apps.reports.loaders import ReportDataLoader, WEIGHT_HISTORY_DAYS, PROGRESS_HISTORY_DAYS
+from apps.reports.metrics import load_dataframes, monthly_metrics, to_report_data
+from apps.reports.chart_specs import weight_chart_spec, progress_chart_spec
+from apps.reports.vector_charts import chart_drawing
+from apps.reports.artifacts import get_artifact_store
+from apps.reports.pdf_template import get_report_template
+from apps.reports.html import render_weekly_report_html
 import io
 import os
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from django.core.files.base import ContentFile
-from django.core.files.storage import default_storage
-import pandas as pd
 
 logger = logging.getLogger(__name__)
 
 class WeeklyReportGenerator:
     """Generate comprehensive weekly reports for users"""
     
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+    def __init__(self, chart_renderer=None, png_charts=None, artifacts=None, template=None):
+        # Styles and static flowables are compiled once per process
+        self.template = template or get_report_template()
+        self.styles = self.template.styles
+        self.artifacts = artifacts or get_artifact_store()
+        # Charts are drawn as vectors inside the PDF; PNG uploads are opt-in
+        self.png_charts = getattr(settings, 'REPORT_PNG_CHARTS', False) if png_charts is None else png_charts
+        self._chart_renderer = chart_renderer
     
-    def generate_report(self, user, week_start=None):
-        """Generate comprehensive weekly report data"""
+    @property
+    def chart_renderer(self):
+        # matplotlib is only imported when PNG charts are enabled
+        if self._chart_renderer is None:
+            from apps.reports.charts import get_chart_renderer
+            self._chart_renderer = get_chart_renderer()
+        return self._chart_renderer
+    
+    @staticmethod
+    def default_week_start():
+        return timezone.now().date() - timedelta(days=7)
+    
+    def generate_report(self, user, week_start=None, frame=None, metrics=None, charts=None):
+        """Generate comprehensive weekly report data.
+        
+        ``frame`` is the user's preloaded ``UserReportFrame`` (see
+        ``ReportDataLoader``); without one the data is loaded here.
+        ``metrics`` is the user's row from ``weekly_report_metrics`` and is
+        stored with the report. ``charts`` are already rendered PNG chart URLs
+        (see ``render_charts``); without them, and with PNG charts enabled,
+        they are rendered here. Chart specs are always kept in the report
+        data so the PDF can draw them as vectors.
+        """
         try:
             activate(user.preferred_language)
             
             if not week_start:
-                week_start = timezone.now().date() - timedelta(days=7)
+                week_start = self.default_week_start()
             
             week_end = week_start + timedelta(days=6)
             
-            # Collect data for the week
-            report_data = {
-                'user': user,
-                'week_start': week_start,
-                'week_end': week_end,
-                'weight_data': self._get_weight_data(user, week_start, week_end),
-                'progress_data': self._get_progress_data(user, week_start),
-                'workout_data': self._get_workout_data(user, week_start, week_end),
-                'nutrition_data': self._get_nutrition_data(user, week_start, week_end),
-                'overall_analysis': self._analyze_overall_progress(user, week_start, week_end),
-                'recommendations': self._generate_recommendations(user, week_start, week_end),
-                'charts': self._generate_charts(user, week_start, week_end)
-            }
+            # Collect data for the week (read-only, served by the replica)
+            with replica_reads():
+                if frame is None:
+                    frame = ReportDataLoader.for_week(week_start).load([user.id])[user.id]
+                
+                weight_data = self._get_weight_data(frame, week_start, week_end)
+                progress_data = self._get_progress_data(frame, week_start)
+                
+                report_data = {
+                    'user': user,
+                    'week_start': week_start,
+                    'week_end': week_end,
+                    'weight_data': weight_data,
+                    'progress_data': progress_data,
+                    'workout_data': self._get_workout_data(progress_data),
+                    'nutrition_data': self._get_nutrition_data(progress_data),
+                    'overall_analysis': self._analyze_overall_progress(user, weight_data, progress_data, frame.rollup),
+                    'recommendations': self._generate_recommendations(weight_data, progress_data),
+                    'chart_specs': self._chart_specs(frame, week_start, week_end)
+                }
+                report_data['charts'] = (
+                    charts if charts is not None else self._generate_charts(report_data['chart_specs'], user.id)
+                )
             
             # Save report to database
-            self._save_report(user, report_data)
+            self._save_report(user, report_data, metrics)
             
             return report_data
             
@@ -241,100 +275,148 @@ class WeeklyReportGenerator:
             return None
     
     def generate_pdf_report(self, user, report_data):
-        """Generate PDF version of the weekly report"""
+        """Generate PDF version of the weekly report.
+        
+        The PDF is content addressed: when one with identical inputs already
+        exists in storage its URL is returned without building it again.
+        """
         try:
             activate(user.preferred_language)
             
-            # Create buffer for PDF
-            buffer = io.BytesIO()
-            
-            # Create PDF document
-            doc = SimpleDocTemplate(
-                buffer,
-                pagesize=A4,
-                rightMargin=72,
-                leftMargin=72,
-                topMargin=72,
-                bottomMargin=18
+            return self.artifacts.get_or_render(
+                'pdf',
+                self._report_inputs(user, report_data),
+                user.preferred_language,
+                'pdf',
+                lambda: self._build_pdf(user, report_data)
             )
             
-            # Build PDF content
-            content = []
-            
-            # Title
-            title = Paragraph(
-                f"{_('Weekly Progress Report')} - {report_data['week_start']} to {report_data['week_end']}",
-                self.styles['title']
-            )
-            content.append(title)
-            content.append(Spacer(1, 20))
-            
-            # User info section
-            user_info = self._build_user_info_section(user)
-            content.extend(user_info)
-            content.append(Spacer(1, 20))
-            
-            # Weight progress section
-            weight_section = self._build_weight_section(report_data['weight_data'])
-            content.extend(weight_section)
-            content.append(Spacer(1, 20))
-            
-            # Workout progress section
-            workout_section = self._build_workout_section(report_data['workout_data'])
-            content.extend(workout_section)
-            content.append(Spacer(1, 20))
-            
-            # Overall analysis section
-            analysis_section = self._build_analysis_section(report_data['overall_analysis'])
-            content.extend(analysis_section)
-            content.append(Spacer(1, 20))
-            
-            # Recommendations section
-            recommendations_section = self._build_recommendations_section(report_data['recommendations'])
-            content.extend(recommendations_section)
-            
-            # Build PDF
-            doc.build(content)
-            
-            # Save PDF to storage
-            buffer.seek(0)
-            filename = f"weekly_report_{user.id}_{timezone.now().strftime('%Y%m%d')}.pdf"
+        except Exception as e:
+            logger.error(f"Error generating PDF report for user {user.id}: {str(e)}")
+            return None
+    
+    def generate_html_report(self, user, report_data):
+        """Generate the lightweight HTML version of the weekly report.
+        
+        Rendered from the same report data as the PDF with a precompiled
+        Jinja2 template and inline SVG sparklines, and content addressed the
+        same way. Returns the report's URL.
+        """
+        try:
+            activate(user.preferred_language)
             
-            # Save to media storage
-            saved_path = default_storage.save(
-                f"reports/{filename}",
-                ContentFile(buffer.getvalue())
+            return self.artifacts.get_or_render(
+                'html',
+                self._report_inputs(user, report_data),
+                user.preferred_language,
+                'html',
+                lambda: render_weekly_report_html(user, report_data)
             )
             
-            # Return URL
-            if hasattr(settings, 'MEDIA_URL'):
-                return f"{settings.MEDIA_URL}{saved_path}"
-            else:
-                return default_storage.url(saved_path)
-            
         except Exception as e:
-            logger.error(f"Error generating PDF report for user {user.id}: {str(e)}")
+            logger.error(f"Error generating HTML report for user {user.id}: {str(e)}")
             return None
     
+    def _report_inputs(self, user, report_data):
+        """Everything the report's content depends on, as JSON-able data"""
+        weight_data = report_data['weight_data']
+        return {
+            'user': [
+                user.first_name or user.username, user.age, user.current_weight,
+                user.target_weight, user.bmi, user.activity_level
+            ],
+            'week': [report_data['week_start'], report_data['week_end']],
+            'weight_data': {k: v for k, v in weight_data.items() if k != 'entries'} if weight_data else None,
+            'workout_data': report_data['workout_data'],
+            'overall_analysis': report_data['overall_analysis'],
+            'recommendations': report_data['recommendations'],
+            'chart_specs': report_data.get('chart_specs'),
+        }
+    
+    def _build_pdf(self, user, report_data):
+        """Build the weekly report PDF and return its bytes"""
+        # Create buffer for PDF
+        buffer = io.BytesIO()
+        
+        # Create PDF document
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=18
+        )
+        
+        # Build PDF content
+        content = []
+        
+        # Title
+        title = Paragraph(
+            f"{_('Weekly Progress Report')} - {report_data['week_start']} to {report_data['week_end']}",
+            self.styles['title']
+        )
+        content.append(title)
+        content.append(self.template.spacer(20))
+        
+        # User info section
+        user_info = self._build_user_info_section(user)
+        content.extend(user_info)
+        content.append(self.template.spacer(20))
+        
+        # Weight progress section
+        weight_section = self._build_weight_section(report_data['weight_data'])
+        content.extend(weight_section)
+        content.append(self.template.spacer(20))
+        
+        # Trend charts, drawn as vectors
+        if report_data.get('chart_specs'):
+            content.extend(self._build_charts_section(report_data['chart_specs']))
+            content.append(self.template.spacer(20))
+        
+        # Workout progress section
+        workout_section = self._build_workout_section(report_data['workout_data'])
+        content.extend(workout_section)
+        content.append(self.template.spacer(20))
+        
+        # Overall analysis section
+        analysis_section = self._build_analysis_section(report_data['overall_analysis'])
+        content.extend(analysis_section)
+        content.append(self.template.spacer(20))
+        
+        # Recommendations section
+        recommendations_section = self._build_recommendations_section(report_data['recommendations'])
+        content.extend(recommendations_section)
+        
+        # Build PDF
+        doc.build(content)
+        
+        return buffer.getvalue()
+    
+    @staticmethod
+    def month_bounds(day=None):
+        month_start = (day or timezone.now().date()).replace(day=1)
+        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        return month_start, month_end
+    
     def generate_monthly_report(self, user):
         """Generate monthly summary report"""
         try:
             activate(user.preferred_language)
             
-            month_start = timezone.now().date().replace(day=1)
-            month_end = month_start + timedelta(days=32)
-            month_end = month_end.replace(day=1) - timedelta(days=1)
+            month_start, month_end = self.month_bounds()
             
             # Collect monthly data
-            monthly_data = {
+            with replica_reads():
+                weights, progress = load_dataframes([user.id], month_start, month_end)
+            metrics = to_report_data(monthly_metrics(weights, progress, month_start, month_end)).get(user.id, {})
+            
+            monthly_data = self._build_monthly_data(user, metrics)
+            monthly_data.update({
                 'user': user,
                 'month_start': month_start,
                 'month_end': month_end,
-                'weight_trend': self._get_monthly_weight_trend(user, month_start, month_end),
-                'workout_summary': self._get_monthly_workout_summary(user, month_start, month_end),
-                'progress_summary': self._get_monthly_progress_summary(user, month_start, month_end),
-                'achievements': self._get_monthly_achievements(user, month_start, month_end)
-            }
+            })
             
             return monthly_data
             
@@ -342,25 +424,86 @@ class WeeklyReportGenerator:
             logger.error(f"Error generating monthly report for user {user.id}: {str(e)}")
             return None
     
-    def _get_weight_data(self, user, week_start, week_end):
+    def generate_monthly_reports(self, users, month_start=None):
+        """Compute and store MonthlyReport rows for a chunk of users at once.
+        
+        All metrics come from one vectorized pass over the chunk's weight and
+        progress rows; only the per-user achievement text is built per user.
+        """
+        month_start, month_end = self.month_bounds(month_start)
+        users = list(users)
+        
+        with replica_reads():
+            weights, progress = load_dataframes([user.id for user in users], month_start, month_end)
+        metrics_by_user = to_report_data(monthly_metrics(weights, progress, month_start, month_end))
+        
+        saved = 0
+        for user in users:
+            try:
+                activate(user.preferred_language)
+                monthly_data = self._build_monthly_data(user, metrics_by_user.get(user.id, {}))
+                MonthlyReport.objects.update_or_create(
+                    user=user,
+                    month_year=month_start,
+                    defaults={
+                        'report_data': {**metrics_by_user.get(user.id, {}), 'achievements': monthly_data['achievements']},
+                        'is_generated': True,
+                        'generated_at': timezone.now(),
+                    }
+                )
+                saved += 1
+            except Exception as e:
+                logger.error(f"Error saving monthly report for user {user.id}: {str(e)}")
+        
+        return saved
+    
+    def _build_monthly_data(self, user, metrics):
+        """Shape one user's monthly metrics into the report sections"""
+        weight_trend = None
+        if metrics.get('start_weight') is not None:
+            weight_trend = {
+                'start_weight': metrics['start_weight'],
+                'end_weight': metrics['end_weight'],
+                'total_change': metrics['total_change'],
+                'average_weekly_change': metrics['average_weekly_change']
+            }
+        
+        workout_summary = None
+        if metrics.get('workout_weeks'):
+            workout_summary = {
+                'weeks_tracked': int(metrics['workout_weeks']),
+                'average_adherence': metrics['average_adherence'],
+                'estimated_workouts': int(metrics['estimated_workouts'])
+            }
+        
+        progress_summary = None
+        if metrics.get('weeks_tracked'):
+            progress_summary = {
+                'weeks_tracked': int(metrics['weeks_tracked']),
+                'avg_energy': metrics['avg_energy'],
+                'avg_workout_adherence': metrics['avg_workout_adherence'],
+                'avg_diet_adherence': metrics['avg_diet_adherence']
+            }
+        
+        return {
+            'weight_trend': weight_trend,
+            'workout_summary': workout_summary,
+            'progress_summary': progress_summary,
+            'achievements': self._get_monthly_achievements(weight_trend, workout_summary, progress_summary)
+        }
+    
+    def _get_weight_data(self, frame, week_start, week_end):
         """Get weight data for the week"""
-        entries = WeightEntry.objects.filter(
-            user=user,
-            date_recorded__range=[week_start, week_end]
-        ).order_by('date_recorded')
+        entries = frame.weights_between(week_start, week_end)
         
         if not entries:
             return None
         
-        # Get previous week's data for comparison
-        prev_week_start = week_start - timedelta(days=7)
-        prev_entry = WeightEntry.objects.filter(
-            user=user,
-            date_recorded__lt=week_start
-        ).order_by('-date_recorded').first()
+        # Latest weight before this week for comparison
+        prev_weight = frame.last_weight_before(week_start)
         
-        current_weight = entries.last().weight
-        previous_weight = prev_entry.weight if prev_entry else current_weight
+        current_weight = entries[-1].weight
+        previous_weight = prev_weight if prev_weight is not None else current_weight
         
         return {
             'entries': entries,
@@ -370,18 +513,14 @@ class WeeklyReportGenerator:
             'change_percentage': ((current_weight - previous_weight) / previous_weight * 100) if previous_weight else 0
         }
     
-    def _get_progress_data(self, user, week_start):
+    def _get_progress_data(self, frame, week_start):
         """Get progress entry data for the week"""
-        return ProgressEntry.objects.filter(
-            user=user,
-            week_start_date=week_start
-        ).first()
+        return frame.progress_for_week(week_start)
     
-    def _get_workout_data(self, user, week_start, week_end):
+    def _get_workout_data(self, progress_entry):
         """Get workout data for the week"""
         # This would be implemented based on workout tracking
         # For now, return mock data based on progress entry
-        progress_entry = self._get_progress_data(user, week_start)
         
         if progress_entry and progress_entry.workout_adherence:
             adherence_score = progress_entry.workout_adherence
@@ -401,10 +540,8 @@ class WeeklyReportGenerator:
             'missed_workouts': 7
         }
     
-    def _get_nutrition_data(self, user, week_start, week_end):
+    def _get_nutrition_data(self, progress_entry):
         """Get nutrition data for the week"""
-        progress_entry = self._get_progress_data(user, week_start)
-        
         if progress_entry and progress_entry.diet_adherence:
             return {
                 'diet_adherence': progress_entry.diet_adherence,
@@ -416,11 +553,8 @@ class WeeklyReportGenerator:
             'adherence_percentage': 0
         }
     
-    def _analyze_overall_progress(self, user, week_start, week_end):
+    def _analyze_overall_progress(self, user, weight_data, progress_data, rollup=None):
         """Analyze overall progress for the week"""
-        weight_data = self._get_weight_data(user, week_start, week_end)
-        progress_data = self._get_progress_data(user, week_start)
-        
         analysis = {
             'overall_rating': _('Good Progress'),
             'summary': _('You\'re making steady progress towards your goals!'),
@@ -456,15 +590,23 @@ class WeeklyReportGenerator:
             elif progress_data.energy_level <= 2:
                 analysis['areas_for_improvement'].append(_('Energy levels could be better'))
         
+        # Longer-running trends come straight from the rollup
+        if rollup:
+            streak = rollup.current_streak()
+            if streak >= 7:
+                analysis['key_wins'].append(_('%(days)d-day workout streak') % {'days': streak})
+            monthly_change = rollup.weight_change_30d
+            if monthly_change is not None and user.target_weight and abs(monthly_change) >= 1:
+                target_direction = 1 if user.target_weight > user.current_weight else -1
+                if monthly_change * target_direction > 0:
+                    analysis['key_wins'].append(_('%(change).1fkg progress over the last 30 days') % {'change': abs(monthly_change)})
+        
         return analysis
     
-    def _generate_recommendations(self, user, week_start, week_end):
+    def _generate_recommendations(self, weight_data, progress_data):
         """Generate personalized recommendations"""
         recommendations = []
         
-        weight_data = self._get_weight_data(user, week_start, week_end)
-        progress_data = self._get_progress_data(user, week_start)
-        
         # Weight-based recommendations
         if weight_data:
             weight_change = weight_data['change']
@@ -511,182 +653,135 @@ class WeeklyReportGenerator:
         
         return recommendations
     
-    def _generate_charts(self, user, week_start, week_end):
-        """Generate charts for the report"""
-        charts = {}
+    def _generate_charts(self, specs, user_id):
+        """Render and upload PNG charts for the report (when enabled)"""
+        if not self.png_charts or not specs:
+            return {}
         
         try:
-            # Weight trend chart
-            weight_entries = WeightEntry.objects.filter(
-                user=user,
-                date_recorded__gte=week_start - timedelta(days=30),
-                date_recorded__lte=week_end
-            ).order_by('date_recorded')
-            
-            if weight_entries.count() > 1:
-                charts['weight_trend'] = self._create_weight_chart(weight_entries)
-            
-            # Progress chart
-            progress_entries = ProgressEntry.objects.filter(
-                user=user,
-                week_start_date__gte=week_start - timedelta(days=28),
-                week_start_date__lte=week_start
-            ).order_by('week_start_date')
-            
-            if progress_entries.count() > 1:
-                charts['progress_trend'] = self._create_progress_chart(progress_entries)
-                
+            language = translation.get_language()
+            entries = [(user_id, name, spec, language) for name, spec in specs.items()]
+            return self._chart_urls(entries).get(user_id, {})
         except Exception as e:
             logger.error(f"Error generating charts: {str(e)}")
-        
-        return charts
+            return {}
     
-    def _create_weight_chart(self, weight_entries):
-        """Create weight trend chart"""
+    def render_charts(self, users, frames, week_start):
+        """Render every chart for a batch of users in one pass over the pool.
+        
+        Returns ``{user_id: charts}`` to pass to ``generate_report``; chart
+        labels are translated into each user's language before rendering.
+        Empty when PNG charts are disabled.
+        """
+        if not self.png_charts:
+            return {}
+        
+        week_end = week_start + timedelta(days=6)
+        entries = []
+        
+        for user_id, language in users:
+            frame = frames.get(user_id)
+            if frame is None:
+                continue
+            with translation.override(language):
+                for name, spec in self._chart_specs(frame, week_start, week_end).items():
+                    entries.append((user_id, name, spec, language))
+        
         try:
-            plt.style.use('seaborn-v0_8')
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            dates = [entry.date_recorded for entry in weight_entries]
-            weights = [entry.weight for entry in weight_entries]
-            
-            ax.plot(dates, weights, marker='o', linewidth=2, markersize=6)
-            ax.set_title(_('Weight Trend (Last 30 Days)'), fontsize=16, fontweight='bold')
-            ax.set_xlabel(_('Date'), fontsize=12)
-            ax.set_ylabel(_('Weight (kg)'), fontsize=12)
-            
-            # Format x-axis
-            ax.xaxis.set_major_formatter(mdates.DateFormatter('%m/%d'))
-            ax.xaxis.set_major_locator(mdates.DayLocator(interval=7))
-            plt.xticks(rotation=45)
-            
-            # Add grid
-            ax.grid(True, alpha=0.3)
-            
-            # Tight layout
-            plt.tight_layout()
-            
-            # Save to buffer
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-            buffer.seek(0)
-            
-            # Save to storage
-            filename = f"weight_chart_{timezone.now().strftime('%Y%m%d_%H%M%S')}.png"
-            saved_path = default_storage.save(f"charts/{filename}", ContentFile(buffer.getvalue()))
-            
-            plt.close()
-            
-            return default_storage.url(saved_path)
-            
+            return self._chart_urls(entries)
         except Exception as e:
-            logger.error(f"Error creating weight chart: {str(e)}")
-            return None
+            logger.error(f"Error rendering report charts: {str(e)}")
+            return {}
     
-    def _create_progress_chart(self, progress_entries):
-        """Create progress trend chart"""
-        try:
-            plt.style.use('seaborn-v0_8')
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            dates = [entry.week_start_date for entry in progress_entries]
-            workout_adherence = [entry.workout_adherence or 0 for entry in progress_entries]
-            diet_adherence = [entry.diet_adherence or 0 for entry in progress_entries]
-            energy_levels = [entry.energy_level or 0 for entry in progress_entries]
-            
-            ax.plot(dates, workout_adherence, marker='o', label=_('Workout Adherence'), linewidth=2)
-            ax.plot(dates, diet_adherence, marker='s', label=_('Diet Adherence'), linewidth=2)
-            ax.plot(dates, energy_levels, marker='^', label=_('Energy Level'), linewidth=2)
-            
-            ax.set_title(_('Progress Trends'), fontsize=16, fontweight='bold')
-            ax.set_xlabel(_('Week'), fontsize=12)
-            ax.set_ylabel(_('Rating (1-5)'), fontsize=12)
-            ax.set_ylim(0, 5)
-            
-            # Format x-axis
-            ax.xaxis.set_major_formatter(mdates.DateFormatter('%m/%d'))
-            plt.xticks(rotation=45)
-            
-            # Add legend
-            ax.legend()
-            
-            # Add grid
-            ax.grid(True, alpha=0.3)
-            
-            # Tight layout
-            plt.tight_layout()
-            
-            # Save to buffer
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-            buffer.seek(0)
-            
-            # Save to storage
-            filename = f"progress_chart_{timezone.now().strftime('%Y%m%d_%H%M%S')}.png"
-            saved_path = default_storage.save(f"charts/{filename}", ContentFile(buffer.getvalue()))
-            
-            plt.close()
-            
-            return default_storage.url(saved_path)
-            
-        except Exception as e:
-            logger.error(f"Error creating progress chart: {str(e)}")
-            return None
+    def _chart_urls(self, entries):
+        """{user_id: {name: url}} for (user_id, name, spec, language) entries.
+        
+        Charts are content addressed, so only specs without a stored PNG are
+        rendered, each distinct spec once.
+        """
+        charts, missing = {}, {}
+        
+        for user_id, name, spec, language in entries:
+            path, exists = self.artifacts.lookup('chart', spec, language, 'png')
+            if exists:
+                charts.setdefault(user_id, {})[name] = self.artifacts.url(path)
+            else:
+                missing.setdefault(path, (spec, []))[1].append((user_id, name))
+        
+        if not missing:
+            return charts
+        
+        paths = list(missing)
+        rendered = self.chart_renderer.render_many([missing[path][0] for path in paths])
+        for path, png in zip(paths, rendered):
+            if png is None:
+                continue
+            try:
+                self.artifacts.save(path, png)
+            except Exception as e:
+                logger.error(f"Error saving chart {path}: {str(e)}")
+                continue
+            for user_id, name in missing[path][1]:
+                charts.setdefault(user_id, {})[name] = self.artifacts.url(path)
+        
+        return charts
+    
+    def _chart_specs(self, frame, week_start, week_end):
+        """Chart specs (data plus translated labels) for one user's report"""
+        specs = {}
+        
+        # Weight trend chart
+        weight_entries = frame.weights_between(week_start - timedelta(days=WEIGHT_HISTORY_DAYS), week_end)
+        
+        if len(weight_entries) > 1:
+            specs['weight_trend'] = weight_chart_spec(weight_entries, {
+                'title': _('Weight Trend (Last 30 Days)'),
+                'x': _('Date'),
+                'y': _('Weight (kg)'),
+            })
+        
+        # Progress chart
+        progress_entries = frame.progress_between(week_start - timedelta(days=PROGRESS_HISTORY_DAYS), week_start)
+        
+        if len(progress_entries) > 1:
+            specs['progress_trend'] = progress_chart_spec(progress_entries, {
+                'title': _('Progress Trends'),
+                'x': _('Week'),
+                'y': _('Rating (1-5)'),
+                'workout_adherence': _('Workout Adherence'),
+                'diet_adherence': _('Diet Adherence'),
+                'energy_level': _('Energy Level'),
+            })
+        
+        return specs
     
-    def _save_report(self, user, report_data):
+    def _save_report(self, user, report_data, metrics=None):
         """Save report data to database"""
         try:
+            data = {
+                'weight_change': report_data['weight_data']['change'] if report_data['weight_data'] else 0,
+                'workout_adherence': report_data['progress_data'].workout_adherence if report_data['progress_data'] else 0,
+                'diet_adherence': report_data['progress_data'].diet_adherence if report_data['progress_data'] else 0,
+                'overall_rating': report_data['overall_analysis']['overall_rating'],
+                'recommendations_count': len(report_data['recommendations'])
+            }
+            if metrics:
+                data['metrics'] = metrics
+            
             WeeklyReport.objects.update_or_create(
                 user=user,
                 week_start_date=report_data['week_start'],
-                defaults={
-                    'report_data': {
-                        'weight_change': report_data['weight_data']['change'] if report_data['weight_data'] else 0,
-                        'workout_adherence': report_data['progress_data'].workout_adherence if report_data['progress_data'] else 0,
-                        'diet_adherence': report_data['progress_data'].diet_adherence if report_data['progress_data'] else 0,
-                        'overall_rating': report_data['overall_analysis']['overall_rating'],
-                        'recommendations_count': len(report_data['recommendations'])
-                    }
-                }
+                defaults={'report_data': data}
             )
         except Exception as e:
             logger.error(f"Error saving report to database: {str(e)}")
     
-    def _setup_custom_styles(self):
-        """Setup custom styles for PDF generation"""
-        self.styles['title'] = ParagraphStyle(
-            'CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30,
-            textColor=colors.HexColor('#2E86AB'),
-            alignment=1  # Center alignment
-        )
-        
-        self.styles['section_header'] = ParagraphStyle(
-            'SectionHeader',
-            parent=self.styles['Heading2'],
-            fontSize=14,
-            spaceAfter=12,
-            textColor=colors.HexColor('#A23B72'),
-            borderWidth=1,
-            borderColor=colors.HexColor('#A23B72'),
-            borderPadding=5
-        )
-        
-        self.styles['normal_text'] = ParagraphStyle(
-            'NormalText',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            spaceAfter=6
-        )
-    
     def _build_user_info_section(self, user):
         """Build user information section for PDF"""
         content = []
         
         # Section header
-        header = Paragraph(_("User Information"), self.styles['section_header'])
+        header = self.template.header(_("User Information"))
         content.append(header)
         
         # User details table
@@ -699,14 +794,7 @@ class WeeklyReportGenerator:
             [_("Activity Level:"), user.get_activity_level_display() if user.activity_level else _("Not specified")]
         ]
         
-        user_table = Table(user_data, colWidths=[2*inch, 3*inch])
-        user_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.lightgrey]),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        user_table = self.template.summary_table(user_data)
         
         content.append(user_table)
         return content
@@ -716,7 +804,7 @@ class WeeklyReportGenerator:
         content = []
         
         # Section header
-        header = Paragraph(_("Weight Progress"), self.styles['section_header'])
+        header = self.template.header(_("Weight Progress"))
         content.append(header)
         
         if weight_data:
@@ -730,28 +818,31 @@ class WeeklyReportGenerator:
                 [_("Change:"), f"{change_text} {percentage_text}"]
             ]
             
-            weight_table = Table(weight_summary, colWidths=[2*inch, 3*inch])
-            weight_table.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.lightgrey]),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            weight_table = self.template.summary_table(weight_summary)
             
             content.append(weight_table)
         else:
-            no_data_text = Paragraph(_("No weight data recorded this week."), self.styles['normal_text'])
+            no_data_text = self.template.static_paragraph(_("No weight data recorded this week."))
             content.append(no_data_text)
         
         return content
     
+    def _build_charts_section(self, chart_specs):
+        """Build trend charts section for PDF"""
+        content = [self.template.header(_("Progress Charts"))]
+        
+        for spec in chart_specs.values():
+            content.append(chart_drawing(spec))
+            content.append(self.template.spacer(12))
+        
+        return content
+    
     def _build_workout_section(self, workout_data):
         """Build workout progress section for PDF"""
         content = []
         
         # Section header
-        header = Paragraph(_("Workout Progress"), self.styles['section_header'])
+        header = self.template.header(_("Workout Progress"))
         content.append(header)
         
         if workout_data:
@@ -762,18 +853,11 @@ class WeeklyReportGenerator:
                 [_("Missed Workouts:"), str(workout_data['missed_workouts'])]
             ]
             
-            workout_table = Table(workout_summary, colWidths=[2*inch, 3*inch])
-            workout_table.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.lightgrey]),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            workout_table = self.template.summary_table(workout_summary)
             
             content.append(workout_table)
         else:
-            no_data_text = Paragraph(_("No workout data available."), self.styles['normal_text'])
+            no_data_text = self.template.static_paragraph(_("No workout data available."))
             content.append(no_data_text)
         
         return content
@@ -783,18 +867,18 @@ class WeeklyReportGenerator:
         content = []
         
         # Section header
-        header = Paragraph(_("Weekly Analysis"), self.styles['section_header'])
+        header = self.template.header(_("Weekly Analysis"))
         content.append(header)
         
         # Overall rating
         rating_text = Paragraph(f"<b>{_('Overall Rating:')} {analysis_data['overall_rating']}</b>", self.styles['normal_text'])
         content.append(rating_text)
-        content.append(Spacer(1, 6))
+        content.append(self.template.spacer(6))
         
         # Summary
         summary_text = Paragraph(analysis_data['summary'], self.styles['normal_text'])
         content.append(summary_text)
-        content.append(Spacer(1, 12))
+        content.append(self.template.spacer(12))
         
         # Key wins
         if analysis_data['key_wins']:
@@ -805,7 +889,7 @@ class WeeklyReportGenerator:
                 win_item = Paragraph(f"• {win}", self.styles['normal_text'])
                 content.append(win_item)
             
-            content.append(Spacer(1, 6))
+            content.append(self.template.spacer(6))
         
         # Areas for improvement
         if analysis_data['areas_for_improvement']:
@@ -823,7 +907,7 @@ class WeeklyReportGenerator:
         content = []
         
         # Section header
-        header = Paragraph(_("Recommendations"), self.styles['section_header'])
+        header = self.template.header(_("Recommendations"))
         content.append(header)
         
         if recommendations:
@@ -841,80 +925,18 @@ class WeeklyReportGenerator:
                     rec_action = Paragraph(f"<i>{_('Action:')} {rec['action']}</i>", self.styles['normal_text'])
                     content.append(rec_action)
                 
-                content.append(Spacer(1, 12))
+                content.append(self.template.spacer(12))
         else:
-            no_recommendations = Paragraph(_("Keep up the great work! You're on the right track."), self.styles['normal_text'])
+            no_recommendations = self.template.static_paragraph(_("Keep up the great work! You're on the right track."))
             content.append(no_recommendations)
         
         return content
     
-    def _get_monthly_weight_trend(self, user, month_start, month_end):
-        """Get monthly weight trend data"""
-        entries = WeightEntry.objects.filter(
-            user=user,
-            date_recorded__range=[month_start, month_end]
-        ).order_by('date_recorded')
-        
-        if not entries:
-            return None
-        
-        first_weight = entries.first().weight
-        last_weight = entries.last().weight
-        
-        return {
-            'entries': entries,
-            'start_weight': first_weight,
-            'end_weight': last_weight,
-            'total_change': last_weight - first_weight,
-            'average_weekly_change': (last_weight - first_weight) / 4  # Approximate
-        }
-    
-    def _get_monthly_workout_summary(self, user, month_start, month_end):
-        """Get monthly workout summary"""
-        progress_entries = ProgressEntry.objects.filter(
-            user=user,
-            week_start_date__range=[month_start, month_end]
-        )
-        
-        if not progress_entries:
-            return None
-        
-        adherence_scores = [entry.workout_adherence for entry in progress_entries if entry.workout_adherence]
-        
-        if adherence_scores:
-            avg_adherence = sum(adherence_scores) / len(adherence_scores)
-            return {
-                'weeks_tracked': len(adherence_scores),
-                'average_adherence': avg_adherence,
-                'estimated_workouts': int(avg_adherence * len(adherence_scores) * 1.4)
-            }
-        
-        return None
-    
-    def _get_monthly_progress_summary(self, user, month_start, month_end):
-        """Get monthly progress summary"""
-        progress_entries = ProgressEntry.objects.filter(
-            user=user,
-            week_start_date__range=[month_start, month_end]
-        ).order_by('week_start_date')
-        
-        if not progress_entries:
-            return None
-        
-        return {
-            'entries': progress_entries,
-            'weeks_tracked': progress_entries.count(),
-            'avg_energy': sum(entry.energy_level for entry in progress_entries if entry.energy_level) / progress_entries.count() if progress_entries else 0,
-            'avg_workout_adherence': sum(entry.workout_adherence for entry in progress_entries if entry.workout_adherence) / progress_entries.count() if progress_entries else 0,
-            'avg_diet_adherence': sum(entry.diet_adherence for entry in progress_entries if entry.diet_adherence) / progress_entries.count() if progress_entries else 0
-        }
-    
-    def _get_monthly_achievements(self, user, month_start, month_end):
+    def _get_monthly_achievements(self, weight_trend, workout_summary, progress_summary):
         """Get monthly achievements"""
         achievements = []
         
         # Weight-related achievements
-        weight_trend = self._get_monthly_weight_trend(user, month_start, month_end)
         if weight_trend and abs(weight_trend['total_change']) >= 2:
             if weight_trend['total_change'] < 0:
                 achievements.append(_("Lost {:.1f}kg this month!").format(abs(weight_trend['total_change'])))
@@ -922,12 +944,10 @@ class WeeklyReportGenerator:
                 achievements.append(_("Gained {:.1f}kg this month!").format(weight_trend['total_change']))
         
         # Consistency achievements
-        workout_summary = self._get_monthly_workout_summary(user, month_start, month_end)
         if workout_summary and workout_summary['average_adherence'] >= 4:
             achievements.append(_("Excellent workout consistency!"))
         
         # Progress achievements
-        progress_summary = self._get_monthly_progress_summary(user, month_start, month_end)
         if progress_summary and progress_summary['avg_energy'] >= 4:
             achievements.append(_("Maintained high energy levels!"))
         
@@ -0,0 +1,91 @@
+# apps/reports/html.py
+import logging
+import os
+import tempfile
+from pathlib import Path
+from django.conf import settings
+from django.utils.translation import gettext, ngettext
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / 'templates'
+WEEKLY_REPORT_TEMPLATE = 'reports/weekly_report.html'
+
+
+def sparkline_svg(values, width=160, height=36, stroke='#2E86AB'):
+    """Inline SVG polyline for a short numeric series (empty for < 2 points)"""
+    values = [float(value) for value in values or [] if value is not None]
+    if len(values) < 2:
+        return Markup('')
+    
+    low, high = min(values), max(values)
+    spread = (high - low) or 1.0
+    pad = 3
+    step = (width - 2 * pad) / (len(values) - 1)
+    points = ' '.join(
+        f"{pad + i * step:.1f},{height - pad - (value - low) / spread * (height - 2 * pad):.1f}"
+        for i, value in enumerate(values)
+    )
+    last_x, last_y = points.rsplit(' ', 1)[-1].split(',')
+    return Markup(
+        f'<svg class="sparkline" width="{width}" height="{height}" viewBox="0 0 {width} {height}" '
+        f'xmlns="http://www.w3.org/2000/svg" role="img">'
+        f'<polyline fill="none" stroke="{stroke}" stroke-width="2" stroke-linejoin="round" points="{points}"/>'
+        f'<circle cx="{last_x}" cy="{last_y}" r="2.5" fill="{stroke}"/></svg>'
+    )
+
+
+_env = None
+
+
+def get_jinja_env():
+    """Process-wide Jinja2 environment for report templates.
+
+    Templates compile once per process (``auto_reload`` is off) and their
+    compiled bytecode is shared between processes and restarts through a
+    filesystem bytecode cache. Strings are translated with Django's gettext
+    for the active language.
+    """
+    global _env
+    if _env is None:
+        cache_dir = getattr(settings, 'REPORT_TEMPLATE_CACHE_DIR', None) or os.path.join(
+            tempfile.gettempdir(), 'report_template_cache'
+        )
+        os.makedirs(cache_dir, exist_ok=True)
+        
+        env = Environment(
+            loader=FileSystemLoader(str(TEMPLATE_DIR)),
+            bytecode_cache=FileSystemBytecodeCache(cache_dir),
+            autoescape=select_autoescape(['html']),
+            auto_reload=False,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            extensions=['jinja2.ext.i18n']
+        )
+        env.install_gettext_callables(gettext, ngettext, newstyle=True)
+        env.globals['sparkline'] = sparkline_svg
+        _env = env
+    return _env
+
+
+def render_weekly_report_html(user, report_data):
+    """Weekly report as UTF-8 HTML bytes, from the same data as the PDF"""
+    specs = report_data.get('chart_specs') or {}
+    weight_spec = specs.get('weight_trend')
+    progress_spec = specs.get('progress_trend')
+    
+    template = get_jinja_env().get_template(WEEKLY_REPORT_TEMPLATE)
+    return template.render(
+        user=user,
+        language=user.preferred_language,
+        week_start=report_data['week_start'],
+        week_end=report_data['week_end'],
+        weight_data=report_data['weight_data'],
+        workout_data=report_data['workout_data'],
+        analysis=report_data['overall_analysis'],
+        recommendations=report_data['recommendations'],
+        weight_series=weight_spec['series']['weight'] if weight_spec else [],
+        progress_series=progress_spec['series'] if progress_spec else {},
+    ).encode('utf-8')
@@ -0,0 +1,151 @@
+# apps/reports/loaders.py
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from apps.users.models import User, WeightEntry, ProgressEntry, UserRollup
+from apps.core.query_shapes import hot_query
+from apps.core.sharding import partition_by_shard, sharding_enabled
+
+logger = logging.getLogger(__name__)
+
+# Weight history shown in the trend chart, and progress weeks in the progress chart
+WEIGHT_HISTORY_DAYS = 30
+PROGRESS_HISTORY_DAYS = 28
+
+
+def iter_partitions(user_ids):
+    """(alias, ids) groups to query; alias is None when not sharded"""
+    if sharding_enabled():
+        return list(partition_by_shard(user_ids).items())
+    return [(None, list(user_ids))]
+
+
+def manager_for(model, alias):
+    # No explicit alias keeps default routing (and replica_reads) in play
+    return model.objects.using(alias) if alias else model.objects.all()
+
+
+class UserReportFrame:
+    """One user's weight and progress history for a report window, in memory.
+
+    Every report section reads from the same frame, so building a full
+    weekly report no longer issues any per-section queries.
+    """
+    
+    def __init__(self, user_id, weight_entries=None, progress_entries=None, weight_before_window=None, rollup=None):
+        self.user_id = user_id
+        self.weight_entries = weight_entries or []  # ascending by date_recorded
+        self.progress_entries = progress_entries or []  # ascending by week_start_date
+        self.weight_before_window = weight_before_window
+        self.rollup = rollup  # UserRollup, None until the user's first write
+    
+    def weights_between(self, start, end):
+        return [entry for entry in self.weight_entries if start <= entry.date_recorded <= end]
+    
+    def last_weight_before(self, day):
+        """Latest weight recorded strictly before ``day`` (None if never)"""
+        previous = [entry.weight for entry in self.weight_entries if entry.date_recorded < day]
+        return previous[-1] if previous else self.weight_before_window
+    
+    def progress_between(self, start, end):
+        return [entry for entry in self.progress_entries if start <= entry.week_start_date <= end]
+    
+    def progress_for_week(self, week_start):
+        for entry in self.progress_entries:
+            if entry.week_start_date == week_start:
+                return entry
+        return None
+
+
+class ReportDataLoader:
+    """Load report frames for a chunk of users with one query per model.
+
+    ``WeightEntry`` and ``ProgressEntry`` rows for every user in the chunk
+    come back in a single query each (per shard when sharded), plus one
+    query for each user's last weight before the window and one for the
+    users' rollup rows.
+    """
+    
+    def __init__(self, window_start, window_end):
+        self.window_start = window_start
+        self.window_end = window_end
+    
+    @classmethod
+    def for_week(cls, week_start):
+        """Window covering a weekly report, including its chart history"""
+        week_end = week_start + timedelta(days=6)
+        return cls(week_start - timedelta(days=WEIGHT_HISTORY_DAYS), week_end)
+    
+    def load(self, user_ids):
+        """{user_id: UserReportFrame} for every id in ``user_ids``"""
+        user_ids = list(user_ids)
+        frames = {user_id: UserReportFrame(user_id) for user_id in user_ids}
+        if not user_ids:
+            return frames
+        
+        for alias, ids in iter_partitions(user_ids):
+            self._load_partition(alias, ids, frames)
+        return frames
+    
+    def _load_partition(self, alias, user_ids, frames):
+        grouped = defaultdict(list)
+        for entry in report_weights(alias, user_ids, self.window_start, self.window_end):
+            grouped[entry.user_id].append(entry)
+        for user_id, entries in grouped.items():
+            frames[user_id].weight_entries = entries
+        
+        grouped = defaultdict(list)
+        for entry in report_progress(alias, user_ids, self.window_start, self.window_end):
+            grouped[entry.user_id].append(entry)
+        for user_id, entries in grouped.items():
+            frames[user_id].progress_entries = entries
+        
+        # Baseline weight for users whose window starts without history
+        for user_id, weight in report_baselines(alias, user_ids, self.window_start):
+            frames[user_id].weight_before_window = weight
+        
+        for rollup in report_rollups(alias, user_ids):
+            frames[rollup.user_id].rollup = rollup
+
+
+def _sample_window(user_id, conversation_id):
+    loader = ReportDataLoader.for_week(timezone.now().date() - timedelta(days=7))
+    return None, [user_id], loader.window_start, loader.window_end
+
+
+# Per-partition queries behind ``ReportDataLoader``; ``alias`` None means not sharded
+
+@hot_query('report_weights', sample=_sample_window)
+def report_weights(alias, user_ids, start, end):
+    return manager_for(WeightEntry, alias).filter(
+        user_id__in=user_ids,
+        date_recorded__range=[start, end]
+    ).order_by('user_id', 'date_recorded')
+
+
+@hot_query('report_progress', sample=_sample_window)
+def report_progress(alias, user_ids, start, end):
+    return manager_for(ProgressEntry, alias).filter(
+        user_id__in=user_ids,
+        week_start_date__range=[start, end]
+    ).order_by('user_id', 'week_start_date')
+
+
+@hot_query('report_baselines', sample=lambda user_id, conversation_id: _sample_window(user_id, conversation_id)[:3])
+def report_baselines(alias, user_ids, window_start):
+    """(user_id, last weight before ``window_start``) pairs"""
+    last_before = WeightEntry.objects.filter(
+        user_id=OuterRef('pk'),
+        date_recorded__lt=window_start
+    ).order_by('-date_recorded').values('weight')[:1]
+    
+    return manager_for(User, alias).filter(pk__in=user_ids).annotate(
+        weight_before_window=Subquery(last_before)
+    ).values_list('pk', 'weight_before_window')
+
+
+@hot_query('report_rollups', sample=lambda user_id, conversation_id: (None, [user_id]))
+def report_rollups(alias, user_ids):
+    return manager_for(UserRollup, alias).filter(user_id__in=user_ids)
@@ -0,0 +1,83 @@
+# apps/reports/management/commands/benchmark_chart_rendering.py
+import io
+import os
+import random
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from apps.reports.charts import ChartRenderer, CHART_DPI, CHART_SIZE, CHART_STYLE
+
+
+class Command(BaseCommand):
+    help = 'Compare pyplot chart rendering with the warm-figure process pool (charts per second)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--charts', type=int, default=400, help='How many synthetic charts to render')
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--batch-size', type=int, default=16)
+    
+    def handle(self, *args, **options):
+        specs = [self._weight_spec(i) for i in range(options['charts'])]
+        
+        results = [('pyplot', self._time(lambda: [self._render_pyplot(spec) for spec in specs]))]
+        
+        for processes in self._process_counts(options['processes']):
+            renderer = ChartRenderer(processes=processes, batch_size=options['batch_size'])
+            try:
+                # Warm the pool so process start-up is not counted
+                renderer.render_many(specs[:options['batch_size'] * processes])
+                results.append((f"pool x{processes}", self._time(lambda: renderer.render_many(specs))))
+            finally:
+                renderer.close()
+        
+        baseline = results[0][1]
+        self.stdout.write(f"Rendered {len(specs)} charts per run")
+        for name, elapsed in results:
+            self.stdout.write(
+                f"{name:>10}: {elapsed:.2f}s, {len(specs) / elapsed:.1f} charts/s, "
+                f"{baseline / elapsed:.1f}x pyplot"
+            )
+    
+    def _process_counts(self, maximum):
+        # 1, 2, 4, ... up to and including the maximum
+        counts, processes = [], 1
+        while processes < maximum:
+            counts.append(processes)
+            processes *= 2
+        return counts + [maximum]
+    
+    def _time(self, run):
+        started = time.perf_counter()
+        run()
+        return time.perf_counter() - started
+    
+    def _weight_spec(self, seed):
+        rng = random.Random(seed)
+        start = date.today() - timedelta(days=30)
+        days = sorted(rng.sample(range(31), 8))
+        weight = rng.uniform(60, 110)
+        return {
+            'kind': 'weight',
+            'dates': [(start + timedelta(days=day)).isoformat() for day in days],
+            'series': {'weight': [round(weight - day * rng.uniform(0, 0.1), 1) for day in days]},
+            'labels': {'title': 'Weight Trend (Last 30 Days)', 'x': 'Date', 'y': 'Weight (kg)'},
+        }
+    
+    def _render_pyplot(self, spec):
+        # The previous per-chart path: new pyplot figure, render, close
+        import matplotlib.pyplot as plt
+        import matplotlib.dates as mdates
+        
+        plt.style.use(CHART_STYLE)
+        fig, ax = plt.subplots(figsize=CHART_SIZE)
+        dates = [date.fromisoformat(value) for value in spec['dates']]
+        ax.plot(dates, spec['series']['weight'], marker='o', linewidth=2, markersize=6)
+        ax.set_title(spec['labels']['title'], fontsize=16, fontweight='bold')
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%m/%d'))
+        plt.xticks(rotation=45)
+        ax.grid(True, alpha=0.3)
+        plt.tight_layout()
+        buffer = io.BytesIO()
+        plt.savefig(buffer, format='png', dpi=CHART_DPI, bbox_inches='tight')
+        plt.close(fig)
+        return buffer.getvalue()
@@ -0,0 +1,91 @@
+# apps/reports/management/commands/benchmark_report_pdf.py
+import io
+import random
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
+from apps.reports.vector_charts import chart_drawing, CHART_WIDTH, CHART_HEIGHT
+
+
+class Command(BaseCommand):
+    help = 'Compare PDF build time and size with vector charts versus embedded matplotlib PNGs'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=200, help='How many synthetic reports to build')
+        parser.add_argument('--skip-png', action='store_true', help='Only measure the vector path')
+    
+    def handle(self, *args, **options):
+        reports = [self._report_specs(seed) for seed in range(options['reports'])]
+        styles = getSampleStyleSheet()
+        
+        paths = [('vector', lambda specs: [chart_drawing(spec) for spec in specs])]
+        if not options['skip_png']:
+            from apps.reports.charts import render_chart
+            
+            def png_flowables(specs):
+                # What embedding the PNG path costs: render, encode, decode into the PDF
+                return [
+                    Image(io.BytesIO(render_chart(spec)), width=CHART_WIDTH, height=CHART_HEIGHT)
+                    for spec in specs
+                ]
+            paths.append(('png', png_flowables))
+        
+        results = []
+        for name, flowables in paths:
+            total_bytes = 0
+            started = time.perf_counter()
+            for specs in reports:
+                total_bytes += len(self._build_pdf(styles, flowables(specs)))
+            results.append((name, time.perf_counter() - started, total_bytes))
+        
+        self.stdout.write(f"Built {len(reports)} reports with 2 charts each per path")
+        for name, elapsed, total_bytes in results:
+            self.stdout.write(
+                f"{name:>7}: {elapsed / len(reports) * 1000:.1f}ms per PDF, "
+                f"{total_bytes / len(reports) / 1024:.1f}KiB per PDF"
+            )
+        
+        if len(results) == 2 and results[0][1]:
+            speedup = results[1][1] / results[0][1]
+            self.stdout.write(self.style.SUCCESS(f"Vector charts build {speedup:.1f}x faster than PNGs"))
+    
+    def _build_pdf(self, styles, charts):
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+        content = [Paragraph('Weekly Progress Report', styles['Heading1']), Spacer(1, 0.25 * inch)]
+        for chart in charts:
+            content.extend([chart, Spacer(1, 12)])
+        doc.build(content)
+        return buffer.getvalue()
+    
+    def _report_specs(self, seed):
+        rng = random.Random(seed)
+        today = date.today()
+        days = sorted(rng.sample(range(31), 8))
+        weight = rng.uniform(60, 110)
+        weeks = [today - timedelta(days=7 * i) for i in range(4, 0, -1)]
+        return [
+            {
+                'kind': 'weight',
+                'dates': [(today - timedelta(days=30 - day)).isoformat() for day in days],
+                'series': {'weight': [round(weight - day * rng.uniform(0, 0.1), 1) for day in days]},
+                'labels': {'title': 'Weight Trend (Last 30 Days)', 'x': 'Date', 'y': 'Weight (kg)'},
+            },
+            {
+                'kind': 'progress',
+                'dates': [week.isoformat() for week in weeks],
+                'series': {
+                    name: [rng.randint(1, 5) for week in weeks]
+                    for name in ('workout_adherence', 'diet_adherence', 'energy_level')
+                },
+                'labels': {
+                    'title': 'Progress Trends', 'x': 'Week', 'y': 'Rating (1-5)',
+                    'workout_adherence': 'Workout Adherence', 'diet_adherence': 'Diet Adherence',
+                    'energy_level': 'Energy Level',
+                },
+            },
+        ]
@@ -0,0 +1,89 @@
+# apps/reports/management/commands/benchmark_report_templates.py
+import random
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from apps.users.models import User
+from apps.reports.generators import WeeklyReportGenerator
+from apps.reports.pdf_template import ReportTemplate
+from apps.reports.html import render_weekly_report_html
+
+
+class Command(BaseCommand):
+    help = 'Time weekly report rendering per 1k users: PDF with a fresh or cached template, and HTML'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='How many synthetic reports to build')
+    
+    def handle(self, *args, **options):
+        reports = [self._synthetic_report(seed) for seed in range(options['users'])]
+        
+        # Before: a new generator (stylesheet, styles, table styles) per user
+        fresh = self._time(reports, lambda: WeeklyReportGenerator(template=ReportTemplate()))
+        
+        # After: one compiled template shared by every generator in the process
+        template = ReportTemplate()
+        cached = self._time(reports, lambda: WeeklyReportGenerator(template=template))
+        
+        # The lightweight HTML report from the same data
+        render_weekly_report_html(*reports[0])
+        started = time.perf_counter()
+        for user, report_data in reports:
+            render_weekly_report_html(user, report_data)
+        html = time.perf_counter() - started
+        
+        per_thousand = 1000 / len(reports)
+        self.stdout.write(f"Rendered {len(reports)} reports per run (no charts)")
+        for name, elapsed in (('fresh', fresh), ('cached', cached), ('html', html)):
+            self.stdout.write(f"{name:>7}: {elapsed * per_thousand:.2f}s per 1k users")
+        if cached:
+            self.stdout.write(self.style.SUCCESS(f"Cached template is {fresh / cached:.1f}x faster"))
+    
+    def _time(self, reports, make_generator):
+        started = time.perf_counter()
+        for user, report_data in reports:
+            make_generator()._build_pdf(user, report_data)
+        return time.perf_counter() - started
+    
+    def _synthetic_report(self, seed):
+        rng = random.Random(seed)
+        current = round(rng.uniform(60, 110), 1)
+        previous = round(current + rng.uniform(-1.5, 1.5), 1)
+        week_start = date.today() - timedelta(days=7)
+        # Unsaved user: the PDF only reads profile fields
+        user = User(
+            username=f"benchmark_{seed}",
+            first_name=f"User {seed}",
+            date_of_birth=date.today() - timedelta(days=rng.randint(18, 70) * 365),
+            current_weight=current,
+            target_weight=round(current - rng.uniform(-5, 10), 1),
+            activity_level='moderately_active'
+        )
+        planned = rng.randint(3, 5)
+        completed = rng.randint(0, planned)
+        return user, {
+            'week_start': week_start,
+            'week_end': week_start + timedelta(days=6),
+            'weight_data': {
+                'current_weight': current,
+                'previous_weight': previous,
+                'change': current - previous,
+                'change_percentage': (current - previous) / previous * 100,
+            },
+            'workout_data': {
+                'planned_workouts': planned,
+                'completed_workouts': completed,
+                'adherence_percentage': completed / planned * 100,
+                'missed_workouts': planned - completed,
+            },
+            'overall_analysis': {
+                'overall_rating': 'Good Progress',
+                'summary': "You're making steady progress towards your goals!",
+                'key_wins': ['Weight moving in right direction'],
+                'areas_for_improvement': ['Energy levels could be better'],
+            },
+            'recommendations': [
+                {'title': 'Stay consistent', 'description': 'Keep your workout schedule.', 'action': 'Plan your week'}
+            ],
+            'chart_specs': None,
+        }
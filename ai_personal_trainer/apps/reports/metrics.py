@@ -0,0 +1,130 @@
+# apps/reports/metrics.py
+import logging
+import pandas as pd
+from apps.users.models import WeightEntry, ProgressEntry
+from apps.reports.loaders import iter_partitions, manager_for
+
+logger = logging.getLogger(__name__)
+
+WEIGHT_COLUMNS = ['user_id', 'date_recorded', 'weight']
+PROGRESS_COLUMNS = ['user_id', 'week_start_date', 'energy_level', 'workout_adherence', 'diet_adherence']
+
+
+def _weights_frame(rows):
+    weights = pd.DataFrame(rows, columns=WEIGHT_COLUMNS)
+    weights['date_recorded'] = pd.to_datetime(weights['date_recorded'])
+    weights['weight'] = weights['weight'].astype(float)
+    return weights.sort_values(['user_id', 'date_recorded'], kind='stable')
+
+
+def _progress_frame(rows):
+    progress = pd.DataFrame(rows, columns=PROGRESS_COLUMNS)
+    progress['week_start_date'] = pd.to_datetime(progress['week_start_date'])
+    for column in PROGRESS_COLUMNS[2:]:
+        progress[column] = progress[column].astype(float)
+    return progress.sort_values(['user_id', 'week_start_date'], kind='stable')
+
+
+def load_dataframes(user_ids, start, end):
+    """Weight and progress rows for a chunk of users as two DataFrames"""
+    weight_rows, progress_rows = [], []
+    
+    for alias, ids in iter_partitions(user_ids):
+        weight_rows.extend(
+            manager_for(WeightEntry, alias)
+            .filter(user_id__in=ids, date_recorded__range=[start, end])
+            .values_list(*WEIGHT_COLUMNS)
+        )
+        progress_rows.extend(
+            manager_for(ProgressEntry, alias)
+            .filter(user_id__in=ids, week_start_date__range=[start, end])
+            .values_list(*PROGRESS_COLUMNS)
+        )
+    
+    return _weights_frame(weight_rows), _progress_frame(progress_rows)
+
+
+def dataframes_from_frames(frames):
+    """DataFrames (plus baseline weights) from already loaded report frames"""
+    weight_rows, progress_rows, baselines = [], [], {}
+    
+    for user_id, frame in frames.items():
+        weight_rows.extend((user_id, e.date_recorded, e.weight) for e in frame.weight_entries)
+        progress_rows.extend(
+            (user_id, e.week_start_date, e.energy_level, e.workout_adherence, e.diet_adherence)
+            for e in frame.progress_entries
+        )
+        if frame.weight_before_window is not None:
+            baselines[user_id] = frame.weight_before_window
+    
+    return _weights_frame(weight_rows), _progress_frame(progress_rows), pd.Series(baselines, dtype=float)
+
+
+def weekly_metrics(weights, progress, week_start, week_end, baselines=None):
+    """Per-user weekly weight change and adherence, one row per user_id"""
+    week_start, week_end = pd.Timestamp(week_start), pd.Timestamp(week_end)
+    
+    in_week = weights[weights['date_recorded'].between(week_start, week_end)]
+    current = in_week.groupby('user_id')['weight'].last()
+    
+    before = weights[weights['date_recorded'] < week_start].groupby('user_id')['weight'].last()
+    if baselines is not None and not baselines.empty:
+        before = before.combine_first(baselines)
+    previous = before.reindex(current.index).fillna(current)
+    
+    change = current - previous
+    metrics = pd.DataFrame({
+        'current_weight': current,
+        'previous_weight': previous,
+        'weight_change': change,
+        'change_percentage': (change / previous * 100).where(previous != 0, 0.0),
+    })
+    
+    week_progress = (
+        progress[progress['week_start_date'] == week_start]
+        .groupby('user_id')[['workout_adherence', 'diet_adherence', 'energy_level']]
+        .last()
+    )
+    return metrics.join(week_progress, how='outer')
+
+
+def monthly_metrics(weights, progress, month_start, month_end):
+    """Per-user monthly weight trend, workout and progress summaries"""
+    month_start, month_end = pd.Timestamp(month_start), pd.Timestamp(month_end)
+    
+    in_month = weights[weights['date_recorded'].between(month_start, month_end)]
+    by_user = in_month.groupby('user_id')['weight']
+    trend = pd.DataFrame({'start_weight': by_user.first(), 'end_weight': by_user.last()})
+    trend['total_change'] = trend['end_weight'] - trend['start_weight']
+    trend['average_weekly_change'] = trend['total_change'] / 4  # Approximate
+    
+    weeks = progress[progress['week_start_date'].between(month_start, month_end)]
+    grouped = weeks.groupby('user_id')
+    tracked = grouped.size()
+    summary = pd.DataFrame({
+        'weeks_tracked': tracked,
+        'workout_weeks': grouped['workout_adherence'].count(),
+        'average_adherence': grouped['workout_adherence'].mean(),
+        # Missing ratings count as zero, as in the per-user summary
+        'avg_energy': grouped['energy_level'].sum() / tracked,
+        'avg_workout_adherence': grouped['workout_adherence'].sum() / tracked,
+        'avg_diet_adherence': grouped['diet_adherence'].sum() / tracked,
+    })
+    summary['estimated_workouts'] = (
+        summary['average_adherence'] * summary['workout_weeks'] * 1.4
+    ).fillna(0).astype(int)
+    
+    return trend.join(summary, how='outer')
+
+
+def weekly_report_metrics(frames, week_start, week_end):
+    """{user_id: weekly metrics} for a batch of preloaded report frames"""
+    weights, progress, baselines = dataframes_from_frames(frames)
+    return to_report_data(weekly_metrics(weights, progress, week_start, week_end, baselines))
+
+
+def to_report_data(metrics):
+    """{user_id: JSON-safe dict} with NaN as None and floats rounded"""
+    metrics = metrics.round(2).astype(object)
+    metrics = metrics.where(metrics.notna(), None)
+    return {int(user_id): row for user_id, row in metrics.to_dict('index').items()}
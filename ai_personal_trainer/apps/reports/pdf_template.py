@@ -0,0 +1,86 @@
+# apps/reports/pdf_template.py
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import Table, TableStyle, Paragraph, Spacer
+
+
+class ReportTemplate:
+    """Compiled, reusable parts of the weekly report PDF.
+
+    Built once per process: the stylesheet and the summary table style.
+    Flowables are never shared: reportlab keeps layout state on them
+    (wrapped sizes, split/postponed flags), so a cached ``Paragraph`` or
+    ``Spacer`` reused across documents, or twice in one story, breaks
+    later builds. Every call below returns a new flowable.
+    """
+    
+    SUMMARY_COL_WIDTHS = [2 * inch, 3 * inch]
+    
+    def __init__(self):
+        self.styles = getSampleStyleSheet()
+        self._setup_custom_styles()
+        
+        self.summary_table_style = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.lightgrey]),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+    
+    def _setup_custom_styles(self):
+        """Setup custom styles for PDF generation"""
+        self.styles['title'] = ParagraphStyle(
+            'CustomTitle',
+            parent=self.styles['Heading1'],
+            fontSize=18,
+            spaceAfter=30,
+            textColor=colors.HexColor('#2E86AB'),
+            alignment=1  # Center alignment
+        )
+        
+        self.styles['section_header'] = ParagraphStyle(
+            'SectionHeader',
+            parent=self.styles['Heading2'],
+            fontSize=14,
+            spaceAfter=12,
+            textColor=colors.HexColor('#A23B72'),
+            borderWidth=1,
+            borderColor=colors.HexColor('#A23B72'),
+            borderPadding=5
+        )
+        
+        self.styles['normal_text'] = ParagraphStyle(
+            'NormalText',
+            parent=self.styles['Normal'],
+            fontSize=10,
+            spaceAfter=6
+        )
+    
+    def header(self, text):
+        """Section header paragraph for already translated ``text``"""
+        return self.static_paragraph(text, 'section_header')
+    
+    def static_paragraph(self, text, style='normal_text'):
+        """Paragraph in one of the template's compiled styles"""
+        return Paragraph(text, self.styles[style])
+    
+    def spacer(self, height):
+        return Spacer(1, height)
+    
+    def summary_table(self, rows):
+        """Two-column label/value table in the report's summary style"""
+        table = Table(rows, colWidths=self.SUMMARY_COL_WIDTHS)
+        table.setStyle(self.summary_table_style)
+        return table
+
+
+_template = None
+
+
+def get_report_template():
+    global _template
+    if _template is None:
+        _template = ReportTemplate()
+    return _template
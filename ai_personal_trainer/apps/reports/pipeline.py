@@ -0,0 +1,339 @@
+# apps/reports/pipeline.py
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.translation import activate
+from apps.users.models import User
+from apps.chatbot.whatsapp_handler import WhatsAppClient
+from apps.core.db_routers import replica_reads
+from apps.core.instrumentation import current_measurement, run_attached
+from apps.reports.generators import WeeklyReportGenerator
+from apps.reports.html import render_weekly_report_html
+from apps.reports.loaders import ReportDataLoader
+from apps.reports.metrics import weekly_report_metrics
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = 'reports:pipeline:metrics'
+
+# Sentinel passed down the queues once a stage has drained
+_DONE = object()
+
+REPORT_FORMATS = {
+    'html': ('html',),
+    'pdf': ('pdf',),
+    'both': ('html', 'pdf'),
+}
+
+
+def report_kinds():
+    return REPORT_FORMATS.get(getattr(settings, 'WEEKLY_REPORT_FORMAT', 'both'), ('html', 'pdf'))
+
+
+_render_pool = None
+
+
+def get_render_pool(processes):
+    """Process pool shared by every pipeline run in this process.
+
+    Starting worker processes (and ``django.setup()`` in each) per batch
+    would cost more than rendering a small batch, so the pool outlives runs.
+    """
+    global _render_pool
+    if _render_pool is not None and _render_pool._max_workers != processes:
+        _render_pool.shutdown()
+        _render_pool = None
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_render_worker)
+        atexit.register(_render_pool.shutdown)
+    return _render_pool
+
+
+def _thread_job(measurement, func, *args):
+    """One executor job: counted against the calling task, DB connections closed after"""
+    try:
+        return run_attached(measurement, func, *args)
+    finally:
+        # Executor threads each open their own connections; don't leave them behind
+        connections.close_all()
+
+
+def _init_render_worker():
+    # Spawned workers need the app registry; forked ones already have it
+    import django
+    django.setup()
+
+
+def render_artifact(kind, user, report_data):
+    """Bytes of one report artifact; runs in a render process"""
+    activate(user.preferred_language)
+    if kind == 'html':
+        return render_weekly_report_html(user, report_data)
+    return WeeklyReportGenerator()._build_pdf(user, report_data)
+
+
+class StageMetrics:
+    """Throughput counters for one pipeline stage"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.failed = 0
+        self.busy = 0.0
+        self.started_at = None
+        self.finished_at = None
+    
+    def record(self, elapsed, items=1, failed=False):
+        if self.started_at is None:
+            self.started_at = time.monotonic() - elapsed
+        self.items += items
+        self.busy += elapsed
+        if failed:
+            self.failed += items
+    
+    def as_dict(self):
+        wall = (self.finished_at or time.monotonic()) - (self.started_at or time.monotonic())
+        return {
+            'items': self.items,
+            'failed': self.failed,
+            'busy_seconds': round(self.busy, 3),
+            'wall_seconds': round(wall, 3),
+            'items_per_second': round(self.items / wall, 2) if wall > 0 else None,
+        }
+
+
+class WeeklyReportPipeline:
+    """Weekly reports as overlapping stages: load → compute → render → upload → send.
+
+    Chunks of user ids flow through bounded asyncio queues, so a slow stage
+    applies backpressure instead of letting work pile up in memory, and every
+    stage is busy at once: while one chunk renders, the next is loading and
+    the previous one is being uploaded and sent.
+
+    * load and compute (DB reads, metrics, report data) run in threads,
+    * render builds PDF/HTML bytes in a process pool shared across runs,
+      and only for artifacts not already in storage (batch tasks go to the
+      'reports' queue, whose non-prefork worker can own that pool),
+    * upload and send are async workers over blocking storage and WhatsApp
+      calls, ``upload_workers``/``send_workers`` of them in flight.
+
+    ``deliver(user, report_data, urls, whatsapp_client)`` sends one report
+    and returns False to mark it skipped. Per-stage metrics are returned
+    by ``run`` and published to the cache under ``METRICS_KEY``.
+    """
+    
+    STAGES = ('load', 'compute', 'render', 'upload', 'send')
+    
+    def __init__(self, deliver, week_start=None, queue_size=256, render_processes=None,
+                 io_workers=8, upload_workers=8, send_workers=16, generator=None, whatsapp_client=None):
+        self.deliver = deliver
+        self.week_start = week_start or WeeklyReportGenerator.default_week_start()
+        self.queue_size = queue_size
+        if render_processes is None:
+            render_processes = getattr(settings, 'REPORT_RENDER_PROCESSES', 0)
+        self.render_processes = render_processes or os.cpu_count() or 1
+        self.io_workers = io_workers
+        self.upload_workers = upload_workers
+        self.send_workers = send_workers
+        self.generator = generator or WeeklyReportGenerator()
+        self.whatsapp_client = whatsapp_client
+        self.kinds = report_kinds()
+        self.metrics = {name: StageMetrics(name) for name in self.STAGES}
+        self.counts = {'sent': 0, 'skipped': 0, 'failed': 0}
+        self._measurement = None
+    
+    def run(self, chunks):
+        """Push every chunk of user ids through the pipeline; returns counts and metrics"""
+        started = time.monotonic()
+        # Work runs on executor threads; count it against the calling task
+        self._measurement = current_measurement()
+        threads = ThreadPoolExecutor(max_workers=self.io_workers + self.upload_workers + self.send_workers)
+        # Chunk sources may query the DB (no ORM calls on the event loop) and
+        # hold context managers open, so they always resume on the same thread
+        feeder = ThreadPoolExecutor(max_workers=1)
+        processes = None
+        if self.render_processes > 1:
+            if multiprocessing.current_process().daemon:
+                logger.warning(
+                    "Weekly report pipeline is running in a daemonic (prefork) worker and cannot start "
+                    "render processes; rendering in threads. Serve the 'reports' queue with a non-prefork "
+                    "worker (celery worker -Q reports -P solo)."
+                )
+            else:
+                processes = get_render_pool(self.render_processes)
+        
+        try:
+            asyncio.run(self._run(chunks, feeder, threads, processes or threads))
+        finally:
+            feeder.shutdown()
+            threads.shutdown()
+        
+        summary = dict(self.counts)
+        summary['seconds'] = round(time.monotonic() - started, 3)
+        summary['stages'] = {name: stage.as_dict() for name, stage in self.metrics.items()}
+        try:
+            cache.set(METRICS_KEY, summary, timeout=60 * 60 * 24 * 7)
+        except Exception as e:
+            logger.error(f"Error publishing report pipeline metrics: {str(e)}")
+        logger.info(f"Weekly report pipeline finished: {summary}")
+        return summary
+    
+    async def _run(self, chunks, feeder, threads, render_executor):
+        loop = asyncio.get_running_loop()
+        self._threads = threads
+        self._render_executor = render_executor
+        if self.whatsapp_client is None:
+            self.whatsapp_client = WhatsAppClient()
+        
+        # Chunk-level queues stay short; per-user queues hold up to queue_size reports
+        chunk_queue = asyncio.Queue(maxsize=4)
+        loaded = asyncio.Queue(maxsize=2)
+        computed = asyncio.Queue(maxsize=self.queue_size)
+        rendered = asyncio.Queue(maxsize=self.queue_size)
+        uploaded = asyncio.Queue(maxsize=self.queue_size)
+        
+        async def feed():
+            iterator = iter(chunks)
+            try:
+                while True:
+                    chunk = await loop.run_in_executor(feeder, run_attached, self._measurement, next, iterator, _DONE)
+                    if chunk is _DONE:
+                        break
+                    await chunk_queue.put(list(chunk))
+            finally:
+                # The source streams from a cursor across calls, so close only once it is done
+                await loop.run_in_executor(feeder, connections.close_all)
+            await chunk_queue.put(_DONE)
+        
+        await asyncio.gather(
+            feed(),
+            self._stage('load', chunk_queue, loaded, self._load, 1, loop),
+            self._stage('compute', loaded, computed, self._compute, 1, loop, fan_out=True),
+            self._stage('render', computed, rendered, self._render, self.render_processes, loop),
+            self._stage('upload', rendered, uploaded, self._upload, self.upload_workers, loop),
+            self._stage('send', uploaded, None, self._send, self.send_workers, loop),
+        )
+    
+    async def _stage(self, name, inbox, outbox, handler, workers, loop, fan_out=False):
+        """Run ``workers`` consumers of ``inbox`` and signal ``outbox`` when drained"""
+        metrics = self.metrics[name]
+        
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    # Let sibling workers see the sentinel too
+                    await inbox.put(_DONE)
+                    return
+                
+                started = time.monotonic()
+                try:
+                    result = await handler(item, loop)
+                except Exception as e:
+                    metrics.record(time.monotonic() - started, failed=True)
+                    self._fail(item, name, e)
+                    continue
+                metrics.record(time.monotonic() - started)
+                
+                if outbox is None or result is None:
+                    continue
+                for output in (result if fan_out else [result]):
+                    await outbox.put(output)
+        
+        await asyncio.gather(*[worker() for i in range(max(1, workers))])
+        metrics.finished_at = time.monotonic()
+        if outbox is not None:
+            await outbox.put(_DONE)
+    
+    def _fail(self, item, stage, error):
+        # A failed chunk (ids, or loaded users) fails every user in it
+        if isinstance(item, list):
+            failed = len(item)
+        elif isinstance(item[0], list):
+            failed = len(item[0])
+        else:
+            failed = 1
+        self.counts['failed'] += failed
+        logger.error(f"Error in weekly report {stage} stage: {str(error)}")
+    
+    def _in_thread(self, loop, func, *args):
+        return loop.run_in_executor(self._threads, _thread_job, self._measurement, func, *args)
+    
+    # Counters are only updated on the event loop, never from worker threads
+    
+    async def _load(self, user_ids, loop):
+        users, frames = await self._in_thread(loop, self._load_chunk, user_ids)
+        # Users deleted between selection and delivery
+        self.counts['skipped'] += len(user_ids) - len(users)
+        return users, frames
+    
+    def _load_chunk(self, user_ids):
+        with replica_reads():
+            users = list(User.objects.filter(id__in=user_ids).select_related('profile'))
+            frames = ReportDataLoader.for_week(self.week_start).load(user_ids)
+        return users, frames
+    
+    async def _compute(self, chunk, loop):
+        reports = await self._in_thread(loop, self._compute_chunk, chunk)
+        self.counts['skipped'] += len(chunk[0]) - len(reports)
+        return reports
+    
+    def _compute_chunk(self, chunk):
+        users, frames = chunk
+        metrics = weekly_report_metrics(frames, self.week_start, self.week_start + timedelta(days=6))
+        charts = self.generator.render_charts(
+            [(user.id, user.preferred_language) for user in users], frames, self.week_start
+        )
+        
+        reports = []
+        for user in users:
+            report_data = self.generator.generate_report(
+                user, self.week_start, frames.get(user.id), metrics.get(user.id), charts.get(user.id, {})
+            )
+            if report_data:
+                reports.append((user, report_data))
+        return reports
+    
+    async def _render(self, report, loop):
+        """Render only the artifacts that are not already in storage"""
+        user, report_data = report
+        inputs = self.generator._report_inputs(user, report_data)
+        artifacts = {}
+        
+        for kind in self.kinds:
+            path, exists = await self._in_thread(
+                loop, self.generator.artifacts.lookup, kind, inputs, user.preferred_language, kind
+            )
+            content = None
+            if not exists:
+                content = await loop.run_in_executor(self._render_executor, render_artifact, kind, user, report_data)
+            artifacts[kind] = (path, content)
+        return user, report_data, artifacts
+    
+    async def _upload(self, report, loop):
+        user, report_data, artifacts = report
+        store = self.generator.artifacts
+        urls = {}
+        
+        for kind, (path, content) in artifacts.items():
+            if content is not None:
+                await self._in_thread(loop, store.save, path, content)
+            urls[kind] = store.url(path)
+        return user, report_data, urls
+    
+    async def _send(self, report, loop):
+        user, report_data, urls = report
+        delivered = await self._in_thread(loop, self._deliver_one, user, report_data, urls)
+        self.counts['skipped' if delivered is False else 'sent'] += 1
+    
+    def _deliver_one(self, user, report_data, urls):
+        activate(user.preferred_language)
+        return self.deliver(user, report_data, urls, self.whatsapp_client)
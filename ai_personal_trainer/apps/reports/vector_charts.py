@@ -0,0 +1,111 @@
+# apps/reports/vector_charts.py
+from datetime import date
+from reportlab.lib import colors
+from reportlab.graphics.shapes import Drawing, Group, String
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.widgets.markers import makeMarker
+
+# Sized to the A4 frame used by generate_pdf_report (72pt side margins)
+CHART_WIDTH = 450
+CHART_HEIGHT = 250
+
+SERIES_COLORS = [colors.HexColor('#4C72B0'), colors.HexColor('#DD8452'), colors.HexColor('#55A868')]
+SERIES_MARKERS = ['FilledCircle', 'FilledSquare', 'FilledTriangle']
+
+
+def _format_day(value):
+    return date.fromordinal(int(value)).strftime('%m/%d')
+
+
+def _base_drawing(spec, plot):
+    """Drawing with title and axis labels around ``plot``"""
+    labels = spec['labels']
+    drawing = Drawing(CHART_WIDTH, CHART_HEIGHT)
+    drawing.add(plot)
+    drawing.add(String(
+        CHART_WIDTH / 2, CHART_HEIGHT - 16, labels['title'],
+        fontName='Helvetica-Bold', fontSize=12, textAnchor='middle'
+    ))
+    drawing.add(String(
+        plot.x + plot.width / 2, 4, labels['x'],
+        fontName='Helvetica', fontSize=9, textAnchor='middle'
+    ))
+    
+    y_label = Group(String(0, 0, labels['y'], fontName='Helvetica', fontSize=9, textAnchor='middle'))
+    y_label.translate(12, plot.y + plot.height / 2)
+    y_label.rotate(90)
+    drawing.add(y_label)
+    return drawing
+
+
+def _line_plot(days, series):
+    plot = LinePlot()
+    plot.x, plot.y = 50, 45
+    plot.width, plot.height = CHART_WIDTH - 70, CHART_HEIGHT - 80
+    plot.data = [list(zip(days, values)) for values in series]
+    
+    for i in range(len(series)):
+        plot.lines[i].strokeColor = SERIES_COLORS[i % len(SERIES_COLORS)]
+        plot.lines[i].strokeWidth = 1.5
+        plot.lines[i].symbol = makeMarker(SERIES_MARKERS[i % len(SERIES_MARKERS)], size=4)
+    
+    plot.xValueAxis.valueMin = days[0]
+    plot.xValueAxis.valueMax = days[-1]
+    plot.xValueAxis.labelTextFormat = _format_day
+    plot.xValueAxis.labels.angle = 45
+    plot.xValueAxis.labels.boxAnchor = 'ne'
+    plot.xValueAxis.labels.fontSize = 7
+    plot.yValueAxis.labels.fontSize = 7
+    plot.yValueAxis.visibleGrid = True
+    plot.yValueAxis.gridStrokeColor = colors.lightgrey
+    return plot
+
+
+def _weight_drawing(spec):
+    days = [date.fromisoformat(value).toordinal() for value in spec['dates']]
+    weights = spec['series']['weight']
+    plot = _line_plot(days, [weights])
+    
+    plot.xValueAxis.valueSteps = list(range(days[0], days[-1] + 1, 7))
+    padding = max((max(weights) - min(weights)) * 0.1, 0.5)
+    plot.yValueAxis.valueMin = min(weights) - padding
+    plot.yValueAxis.valueMax = max(weights) + padding
+    return _base_drawing(spec, plot)
+
+
+def _progress_drawing(spec):
+    labels = spec['labels']
+    names = ['workout_adherence', 'diet_adherence', 'energy_level']
+    days = [date.fromisoformat(value).toordinal() for value in spec['dates']]
+    plot = _line_plot(days, [spec['series'][name] for name in names])
+    
+    plot.xValueAxis.valueSteps = days
+    plot.yValueAxis.valueMin = 0
+    plot.yValueAxis.valueMax = 5
+    plot.yValueAxis.valueStep = 1
+    
+    drawing = _base_drawing(spec, plot)
+    legend = Legend()
+    legend.x, legend.y = plot.x + plot.width - 10, plot.y + plot.height - 4
+    legend.alignment = 'right'
+    legend.boxAnchor = 'ne'
+    legend.fontName = 'Helvetica'
+    legend.fontSize = 7
+    legend.dx = legend.dy = 6
+    legend.colorNamePairs = [
+        (SERIES_COLORS[i], labels[name]) for i, name in enumerate(names)
+    ]
+    drawing.add(legend)
+    return drawing
+
+
+DRAWINGS = {
+    'weight': _weight_drawing,
+    'progress': _progress_drawing,
+}
+
+
+def chart_drawing(spec):
+    """Vector reportlab Drawing for a chart spec, embeddable as a flowable"""
+    return DRAWINGS[spec['kind']](spec)
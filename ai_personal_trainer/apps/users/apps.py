@@ -0,0 +1,10 @@
+# apps/users/apps.py
+from django.apps import AppConfig
+
+
+class UsersConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.users'
+    
+    def ready(self):
+        from apps.users import signals  # noqa: F401
@@ -0,0 +1,28 @@
+# apps/users/management/commands/rebuild_rollups.py
+from django.core.management.base import BaseCommand
+from apps.users.models import User
+from apps.users.rollups import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-user progress rollup from history (backfill or repair)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only these user ids')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+        
+        rebuilt = failed = 0
+        for user_id in users.values_list('pk', flat=True).iterator(chunk_size=options['chunk_size']):
+            try:
+                rebuild_rollup(user_id)
+                rebuilt += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Error rebuilding rollup for user {user_id}: {str(e)}")
+        
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} rollups ({failed} failed)"))
@@ -0,0 +1,202 @@
+# apps/users/milestones.py
+import logging
+import threading
+from django.db import transaction
+from django.utils.translation import gettext as _
+from apps.core.models import Milestone
+from apps.core.sharding import shard_for_user
+
+logger = logging.getLogger(__name__)
+
+STREAK_MILESTONES = ((7, 'streak_7days'), (30, 'streak_30days'), (90, 'streak_90days'))
+WORKOUT_MILESTONES = ((1, 'first_workout'), (100, '100_workouts'))
+WEIGHT_MILESTONE_STEP = 5  # kg of progress between weight milestones
+TRANSFORMATION_RATIO = 0.10  # share of starting weight
+CONSISTENT_ADHERENCE = 4  # weekly workout adherence counted as consistent
+CONSISTENCY_WEEKS = 4
+
+MILESTONE_TITLES = dict(Milestone.MILESTONE_TYPES)
+
+
+def consistency_run(rollup):
+    """Consecutive high-adherence weeks ending at the latest check-in"""
+    current = 1 if (rollup.workout_adherence or 0) >= CONSISTENT_ADHERENCE else 0
+    return rollup.consistent_weeks + current if current else 0
+
+
+def snapshot(rollup):
+    """The rollup values the rules compare against, taken before an event"""
+    return {
+        'workouts': rollup.workouts_completed,
+        'streak': rollup.workout_streak,
+        'best_weight_delta': rollup.best_weight_delta,
+        'consistency': consistency_run(rollup),
+    }
+
+
+def _crossed(before, after, threshold):
+    return before < threshold <= after
+
+
+def evaluate(rollup, before, weighed=False, target_weight=None):
+    """Milestones reached by the event that turned ``before`` into ``rollup``.
+
+    Every rule compares a handful of rollup counters with the snapshot, so
+    the cost per event is constant no matter how long the user's history
+    is. Streak and consistency milestones can repeat with each new run;
+    the others are recorded in ``milestones_achieved`` and awarded once.
+    Weight rules only run for weigh-ins (``weighed``). Updates the rollup's
+    milestone state in place and returns ``[(milestone_type, value)]``.
+    """
+    reached = []
+    achieved = rollup.milestones_achieved
+    
+    for count, milestone_type in WORKOUT_MILESTONES:
+        if _crossed(before['workouts'], rollup.workouts_completed, count) and milestone_type not in achieved:
+            achieved.append(milestone_type)
+            reached.append((milestone_type, {'workouts': count}))
+    
+    for days, milestone_type in STREAK_MILESTONES:
+        if _crossed(before['streak'], rollup.workout_streak, days):
+            reached.append((milestone_type, {'streak': days}))
+    
+    if _crossed(before['consistency'], consistency_run(rollup), CONSISTENCY_WEEKS):
+        reached.append(('consistency', {'weeks': CONSISTENCY_WEEKS}))
+    
+    if weighed:
+        reached.extend(_evaluate_weight(rollup, before, target_weight, achieved))
+    return reached
+
+
+def seed(rollup, target_weight=None):
+    """Mark the one-off milestones a rebuilt rollup already satisfies, without awarding them"""
+    rollup.milestones_achieved = []
+    evaluate(rollup, snapshot(rollup), True, target_weight)
+    for count, milestone_type in WORKOUT_MILESTONES:
+        if rollup.workouts_completed >= count:
+            rollup.milestones_achieved.append(milestone_type)
+
+
+def _evaluate_weight(rollup, before, target_weight, achieved):
+    start, latest = rollup.starting_weight, rollup.latest_weight
+    if start is None or latest is None:
+        return []
+    
+    # Progress is measured towards the goal; without one, as weight lost
+    direction = 1 if target_weight and target_weight > start else -1
+    progress = (latest - start) * direction
+    rollup.best_weight_delta = max(rollup.best_weight_delta, progress)
+    
+    reached = []
+    level = int(rollup.best_weight_delta // WEIGHT_MILESTONE_STEP)
+    if level > int(before['best_weight_delta'] // WEIGHT_MILESTONE_STEP):
+        reached.append(('weight_milestone', {'amount': level * WEIGHT_MILESTONE_STEP}))
+    
+    if target_weight and target_weight != start and (latest - target_weight) * direction >= 0:
+        key = f'weight_goal:{target_weight:g}'
+        if key not in achieved:
+            achieved.append(key)
+            reached.append(('weight_goal', {'target': target_weight, 'current': latest}))
+    
+    if rollup.best_weight_delta >= start * TRANSFORMATION_RATIO and 'transformation' not in achieved:
+        achieved.append('transformation')
+        reached.append(('transformation', {'amount': round(rollup.best_weight_delta, 1)}))
+    
+    return reached
+
+
+def _description(milestone_type, value):
+    descriptions = {
+        'weight_goal': _('Reached the target weight of %(target)skg'),
+        'weight_milestone': _('%(amount)skg of progress towards the goal'),
+        'streak_7days': _('Worked out %(streak)s days in a row'),
+        'streak_30days': _('Worked out %(streak)s days in a row'),
+        'streak_90days': _('Worked out %(streak)s days in a row'),
+        'first_workout': _('Completed the first workout'),
+        '100_workouts': _('Completed %(workouts)s workouts'),
+        'consistency': _('%(weeks)s weeks of excellent workout adherence'),
+        'transformation': _('%(amount)skg of progress since the first weigh-in'),
+    }
+    return descriptions[milestone_type] % value
+
+
+# Milestones reached inside the current transaction, per shard: (callback, items)
+_pending = threading.local()
+
+
+def _buffers():
+    buffers = getattr(_pending, 'buffers', None)
+    if buffers is None:
+        buffers = _pending.buffers = {}
+    return buffers
+
+
+def queue(user_id, reached):
+    """Hold milestones until the rollup transaction commits, then write them in one batch.
+
+    Every event inside one transaction (a bulk import, a backfill) shares a
+    single on-commit flush, so the rows go out in one insert and the
+    celebrations in one task per batch.
+    """
+    if not reached:
+        return
+    
+    alias = shard_for_user(user_id)
+    buffers = _buffers()
+    items = [(user_id, milestone_type, value) for milestone_type, value in reached]
+    
+    pending = buffers.get(alias)
+    if pending and _still_registered(alias, pending[0]):
+        pending[1].extend(items)
+        return
+    
+    # No flush registered yet, or its transaction rolled back
+    callback = lambda: flush(alias)  # noqa: E731
+    buffers[alias] = (callback, items)
+    transaction.on_commit(callback, using=alias)
+
+
+def _still_registered(alias, callback):
+    connection = transaction.get_connection(alias)
+    return any(entry[1] is callback for entry in connection.run_on_commit)
+
+
+def flush(alias):
+    """Insert the queued milestones for ``alias`` and celebrate them in batches"""
+    from apps.notifications.dispatch import get_batch_size
+    from apps.notifications.tasks import send_milestone_celebration_batch
+    
+    callback, reached = _buffers().pop(alias, (None, []))
+    if not reached:
+        return []
+    
+    try:
+        milestones = Milestone.objects.using(alias).bulk_create([
+            Milestone(
+                user_id=user_id,
+                milestone_type=milestone_type,
+                title=str(MILESTONE_TITLES[milestone_type]),
+                description=_description(milestone_type, value),
+                value=value,
+            )
+            for user_id, milestone_type, value in reached
+        ])
+    except Exception as e:
+        logger.error(f"Error recording {len(reached)} milestones: {str(e)}")
+        return []
+    
+    celebrations = [
+        {
+            'milestone_id': milestone.pk,
+            'user_id': milestone.user_id,
+            'milestone_type': milestone.milestone_type,
+            'milestone_data': milestone.value,
+        }
+        for milestone in milestones
+    ]
+    batch_size = get_batch_size()
+    for start in range(0, len(celebrations), batch_size):
+        send_milestone_celebration_batch.delay(celebrations[start:start + batch_size])
+    
+    logger.info(f"Recorded {len(milestones)} milestones on {alias}")
+    return milestones
@@ -5,6 +5,7 @@ from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 import uuid
+from apps.core.sharding import ShardedManager
 
 class User(AbstractUser):
     """Extended User model for AI Personal Trainer system"""
@@ -126,6 +127,8 @@ class UserProfile(models.Model):
     
     # Additional fitness preferences
     preferred_workout_time = models.TimeField(null=True, blank=True)
+    # Next preferred_workout_time in the user's timezone, as a UTC instant
+    next_reminder_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
     workout_duration_preference = models.IntegerField(
         null=True, 
         blank=True, 
@@ -168,6 +171,9 @@ class WeightEntry(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Weight Entry')
         verbose_name_plural = _('Weight Entries')
@@ -222,6 +228,9 @@ class ProgressEntry(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Progress Entry')
         verbose_name_plural = _('Progress Entries')
@@ -232,6 +241,69 @@ class ProgressEntry(models.Model):
         return f"{self.user.username} - Week of {self.week_start_date}"
 
 
+class UserRollup(models.Model):
+    """Per-user progress summary, maintained on write (see apps.users.rollups)"""
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='rollup', primary_key=True)
+    
+    # Weight
+    latest_weight = models.FloatField(null=True, blank=True)
+    last_weigh_in = models.DateField(null=True, blank=True)
+    previous_weight = models.FloatField(null=True, blank=True, help_text=_('Weight at the entry before the latest'))
+    weight_change_7d = models.FloatField(null=True, blank=True)
+    weight_change_30d = models.FloatField(null=True, blank=True)
+    weight_change_90d = models.FloatField(null=True, blank=True)
+    
+    # Workouts
+    workouts_completed = models.IntegerField(default=0)
+    workout_streak = models.IntegerField(default=0, help_text=_('Consecutive workout days ending at last_workout_date'))
+    last_workout_date = models.DateField(null=True, blank=True)
+    
+    # Latest weekly check-in
+    adherence_week = models.DateField(null=True, blank=True)
+    energy_level = models.IntegerField(null=True, blank=True)
+    workout_adherence = models.IntegerField(null=True, blank=True)
+    diet_adherence = models.IntegerField(null=True, blank=True)
+    consistent_weeks = models.IntegerField(
+        default=0,
+        help_text=_('Consecutive high-adherence weeks before adherence_week')
+    )
+    
+    # Milestone state (see apps.users.milestones)
+    starting_weight = models.FloatField(null=True, blank=True)
+    best_weight_delta = models.FloatField(default=0, help_text=_('Best progress from starting_weight towards the goal, in kg'))
+    milestones_achieved = models.JSONField(default=list, blank=True, help_text=_('One-off milestones already awarded'))
+    
+    # AI replies charged against the quota, added in batches (see apps.core.quotas)
+    ai_messages_used = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    shard_key = 'user'
+    objects = ShardedManager()
+    
+    class Meta:
+        verbose_name = _('User Rollup')
+        verbose_name_plural = _('User Rollups')
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.latest_weight}kg on {self.last_weigh_in}"
+    
+    @property
+    def weight_change(self):
+        """Change since the previous weigh-in"""
+        if self.latest_weight is None or self.previous_weight is None:
+            return None
+        return self.latest_weight - self.previous_weight
+    
+    def current_streak(self, today=None):
+        """Workout streak, or 0 once a full day has passed without a workout"""
+        today = today or timezone.now().date()
+        if not self.last_workout_date or (today - self.last_workout_date).days > 1:
+            return 0
+        return self.workout_streak
+
+
 class WorkoutPlan(models.Model):
     """AI-generated workout plans for users"""
     
@@ -255,10 +327,20 @@ class WorkoutPlan(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Workout Plan')
         verbose_name_plural = _('Workout Plans')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['user', '-created_at'],
+                condition=models.Q(is_active=True),
+                name='workoutplan_active_user'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.user.username}"
@@ -283,10 +365,20 @@ class NutritionPlan(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    shard_key = 'user'
+    objects = ShardedManager()
+    
     class Meta:
         verbose_name = _('Nutrition Plan')
         verbose_name_plural = _('Nutrition Plans')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['user', '-created_at'],
+                condition=models.Q(is_active=True),
+                name='nutritionplan_active_user'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.user.username}"
\ No newline at end of file
@@ -0,0 +1,255 @@
+# apps/users/rollups.py
+import logging
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from apps.core.query_shapes import hot_query
+from apps.core.sharding import shard_for_user
+from apps.users.models import User, UserRollup, WeightEntry, ProgressEntry
+from apps.core.models import WorkoutSession
+from apps.users import milestones
+
+logger = logging.getLogger(__name__)
+
+# Weight deltas kept on the rollup, in days
+DELTA_WINDOWS = (7, 30, 90)
+
+
+def get_rollup(user):
+    """The user's rollup, built from history the first time it is needed"""
+    rollup = UserRollup.objects.filter(user_id=user.pk).first()
+    if rollup is None:
+        rollup = rebuild_rollup(user.pk)
+    return rollup
+
+
+def _target_weight(user_id):
+    return User.objects.filter(pk=user_id).values_list('target_weight', flat=True).first()
+
+
+def _update(user_id, apply, event=None, weighed=False):
+    """Run ``apply(rollup)`` on the locked rollup row and save it.
+
+    A saved ``event`` (entry or session) is also checked against the
+    milestone rules (``weighed`` adds the weight rules) and anything reached
+    is queued for the end of the transaction.
+    """
+    with transaction.atomic(using=shard_for_user(user_id)):
+        rollup, created = UserRollup.objects.select_for_update().get_or_create(user_id=user_id)
+        if created and _has_history(user_id, event):
+            # Users from before rollups existed: backfill rather than count from zero
+            _refresh_all(rollup)
+            milestones.seed(rollup, _target_weight(user_id))
+        else:
+            before = milestones.snapshot(rollup)
+            apply(rollup)
+            if event is not None:
+                target_weight = _target_weight(user_id) if weighed else None
+                milestones.queue(user_id, milestones.evaluate(rollup, before, weighed, target_weight))
+        rollup.save()
+    return rollup
+
+
+def _has_history(user_id, event=None):
+    """Whether the user has tracked anything besides ``event``"""
+    for model, filters in ((WeightEntry, {}), (WorkoutSession, {'is_completed': True}), (ProgressEntry, {})):
+        rows = model.objects.filter(user_id=user_id, **filters)
+        if isinstance(event, model):
+            rows = rows.exclude(pk=event.pk)
+        if rows.exists():
+            return True
+    return False
+
+
+def _refresh_weight(rollup, anchor=None):
+    """Recompute the weight fields from at most 90 days of entries.
+
+    ``anchor`` is the latest weigh-in date when the caller knows it (a new
+    entry); otherwise it is looked up. Only the bounded window before the
+    latest weigh-in is read, never the whole history.
+    """
+    entries = WeightEntry.objects.filter(user_id=rollup.user_id)
+    if anchor is None:
+        latest = entries.order_by('-date_recorded').values_list('date_recorded', flat=True).first()
+        if latest is None:
+            rollup.latest_weight = rollup.last_weigh_in = rollup.previous_weight = None
+            rollup.weight_change_7d = rollup.weight_change_30d = rollup.weight_change_90d = None
+            return
+        anchor = latest
+    
+    window_start = anchor - timedelta(days=max(DELTA_WINDOWS))
+    rows = list(
+        entries.filter(date_recorded__range=[window_start, anchor])
+        .order_by('date_recorded')
+        .values_list('date_recorded', 'weight')
+    )
+    if not rows:
+        return _refresh_weight(rollup)
+    
+    if rollup.starting_weight is None:
+        rollup.starting_weight = entries.order_by('date_recorded').values_list('weight', flat=True).first()
+    
+    latest_date, latest_weight = rows[-1]
+    rollup.latest_weight = latest_weight
+    rollup.last_weigh_in = latest_date
+    
+    if len(rows) > 1:
+        rollup.previous_weight = rows[-2][1]
+    else:
+        rollup.previous_weight = (
+            entries.filter(date_recorded__lt=latest_date)
+            .order_by('-date_recorded')
+            .values_list('weight', flat=True)
+            .first()
+        )
+    
+    for days in DELTA_WINDOWS:
+        since = latest_date - timedelta(days=days)
+        # Earliest weigh-in inside the window; no delta without an earlier entry
+        baseline = next((weight for day, weight in rows if day >= since and day < latest_date), None)
+        setattr(rollup, f'weight_change_{days}d', latest_weight - baseline if baseline is not None else None)
+
+
+def record_weight(entry):
+    """Fold a saved ``WeightEntry`` into the rollup"""
+    def apply(rollup):
+        anchor = entry.date_recorded
+        if rollup.last_weigh_in and rollup.last_weigh_in > anchor:
+            anchor = rollup.last_weigh_in
+        _refresh_weight(rollup, anchor)
+    return _update(entry.user_id, apply, event=entry, weighed=True)
+
+
+def forget_weight(entry):
+    """A ``WeightEntry`` was deleted: recompute from the remaining entries"""
+    return _update(entry.user_id, _refresh_weight)
+
+
+@hot_query('workout_streak', sample=lambda user_id, conversation_id: (user_id, timezone.now().date()))
+def completed_workout_days(user_id, last_day):
+    """Distinct completed workout dates up to ``last_day``, newest first"""
+    return (
+        WorkoutSession.objects.filter(user_id=user_id, is_completed=True, date__lte=last_day)
+        .order_by('-date')
+        .values_list('date', flat=True)
+        .distinct()
+    )
+
+
+def _streak_ending(user_id, last_day):
+    """Consecutive workout days ending at ``last_day``, reading back only as far as the streak"""
+    streak, expected = 0, last_day
+    for day in completed_workout_days(user_id, last_day).iterator():
+        if day != expected:
+            break
+        streak += 1
+        expected = day - timedelta(days=1)
+    return streak
+
+
+def record_workout(session, was_completed=False):
+    """Count a completed ``WorkoutSession`` and extend (or restart) the streak"""
+    if not session.is_completed or was_completed:
+        return None
+    
+    def apply(rollup):
+        rollup.workouts_completed += 1
+        day, last = session.date, rollup.last_workout_date
+        
+        if last is None or day > last + timedelta(days=1):
+            rollup.workout_streak = 1
+            rollup.last_workout_date = day
+        elif day == last + timedelta(days=1):
+            rollup.workout_streak += 1
+            rollup.last_workout_date = day
+        elif day < last:
+            # Back-dated workout may join two runs: recount the current one
+            rollup.workout_streak = _streak_ending(session.user_id, last)
+    return _update(session.user_id, apply, event=session)
+
+
+def _refresh_workouts(rollup):
+    completed = WorkoutSession.objects.filter(user_id=rollup.user_id, is_completed=True)
+    rollup.workouts_completed = completed.count()
+    rollup.last_workout_date = completed.order_by('-date').values_list('date', flat=True).first()
+    rollup.workout_streak = _streak_ending(rollup.user_id, rollup.last_workout_date) if rollup.last_workout_date else 0
+
+
+def forget_workout(session):
+    """A completed ``WorkoutSession`` was deleted or un-completed"""
+    return _update(session.user_id, _refresh_workouts)
+
+
+def _apply_progress(rollup, entry):
+    if rollup.adherence_week and entry.week_start_date > rollup.adherence_week:
+        # A new week: carry the run on only from the week right before it
+        follows = entry.week_start_date - rollup.adherence_week == timedelta(days=7)
+        rollup.consistent_weeks = milestones.consistency_run(rollup) if follows else 0
+    rollup.adherence_week = entry.week_start_date
+    rollup.energy_level = entry.energy_level
+    rollup.workout_adherence = entry.workout_adherence
+    rollup.diet_adherence = entry.diet_adherence
+
+
+def record_progress(entry):
+    """Keep the latest weekly check-in scores"""
+    def apply(rollup):
+        if rollup.adherence_week is None or entry.week_start_date >= rollup.adherence_week:
+            _apply_progress(rollup, entry)
+    return _update(entry.user_id, apply, event=entry)
+
+
+def _refresh_progress(rollup):
+    weeks = ProgressEntry.objects.filter(user_id=rollup.user_id).order_by('-week_start_date')
+    latest = weeks.first()
+    rollup.consistent_weeks = 0
+    if not latest:
+        rollup.adherence_week = rollup.energy_level = rollup.workout_adherence = rollup.diet_adherence = None
+        return
+    
+    rollup.adherence_week = None
+    _apply_progress(rollup, latest)
+    
+    # Run of consistent weeks before the latest one, reading back only as far as it goes
+    expected = latest.week_start_date - timedelta(days=7)
+    for week_start, adherence in weeks.filter(week_start_date__lt=latest.week_start_date).values_list(
+        'week_start_date', 'workout_adherence'
+    ).iterator():
+        if week_start != expected or (adherence or 0) < milestones.CONSISTENT_ADHERENCE:
+            break
+        rollup.consistent_weeks += 1
+        expected = week_start - timedelta(days=7)
+
+
+def forget_progress(entry):
+    return _update(entry.user_id, _refresh_progress)
+
+
+def _refresh_all(rollup):
+    rollup.starting_weight = None
+    _refresh_weight(rollup)
+    _refresh_workouts(rollup)
+    _refresh_progress(rollup)
+    
+    # Best progress so far, for weight milestones: one aggregate over the history
+    rollup.best_weight_delta = 0
+    if rollup.starting_weight is not None:
+        extremes = WeightEntry.objects.filter(user_id=rollup.user_id).aggregate(low=Min('weight'), high=Max('weight'))
+        target_weight = _target_weight(rollup.user_id)
+        if target_weight and target_weight > rollup.starting_weight:
+            rollup.best_weight_delta = max(extremes['high'] - rollup.starting_weight, 0)
+        else:
+            rollup.best_weight_delta = max(rollup.starting_weight - extremes['low'], 0)
+
+
+def rebuild_rollup(user_id):
+    """Recompute every rollup field for one user (backfill and repair).
+
+    Milestones the history already satisfies are marked as achieved
+    without being celebrated again.
+    """
+    def apply(rollup):
+        _refresh_all(rollup)
+        milestones.seed(rollup, _target_weight(user_id))
+    return _update(user_id, apply)
@@ -0,0 +1,77 @@
+# apps/users/signals.py
+import logging
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from apps.users.models import WeightEntry, ProgressEntry
+from apps.core.models import WorkoutSession
+from apps.users import rollups
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=WeightEntry)
+def rollup_weight_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        rollups.record_weight(instance)
+    except Exception as e:
+        logger.error(f"Error updating rollup for user {instance.user_id}: {str(e)}")
+
+
+@receiver(post_delete, sender=WeightEntry)
+def rollup_weight_deleted(sender, instance, **kwargs):
+    try:
+        rollups.forget_weight(instance)
+    except Exception as e:
+        logger.error(f"Error updating rollup for user {instance.user_id}: {str(e)}")
+
+
+@receiver(post_save, sender=ProgressEntry)
+def rollup_progress_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        rollups.record_progress(instance)
+    except Exception as e:
+        logger.error(f"Error updating rollup for user {instance.user_id}: {str(e)}")
+
+
+@receiver(post_delete, sender=ProgressEntry)
+def rollup_progress_deleted(sender, instance, **kwargs):
+    try:
+        rollups.forget_progress(instance)
+    except Exception as e:
+        logger.error(f"Error updating rollup for user {instance.user_id}: {str(e)}")
+
+
+@receiver(pre_save, sender=WorkoutSession)
+def remember_workout_completion(sender, instance, raw=False, **kwargs):
+    """Note whether the session was already completed, so it is counted once"""
+    instance._was_completed = bool(instance.pk) and not raw and WorkoutSession.objects.filter(
+        user_id=instance.user_id, pk=instance.pk, is_completed=True
+    ).exists()
+
+
+@receiver(post_save, sender=WorkoutSession)
+def rollup_workout_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    was_completed = getattr(instance, '_was_completed', False)
+    try:
+        if instance.is_completed:
+            rollups.record_workout(instance, was_completed)
+        elif was_completed:
+            rollups.forget_workout(instance)
+    except Exception as e:
+        logger.error(f"Error updating rollup for user {instance.user_id}: {str(e)}")
+
+
+@receiver(post_delete, sender=WorkoutSession)
+def rollup_workout_deleted(sender, instance, **kwargs):
+    if not instance.is_completed:
+        return
+    try:
+        rollups.forget_workout(instance)
+    except Exception as e:
+        logger.error(f"Error updating rollup for user {instance.user_id}: {str(e)}")
@@ -41,6 +41,7 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'apps.core.middleware.ReplicaStickinessMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -86,6 +87,59 @@ DATABASES = {
     }
 }
 
+# Read replica (optional). Locally this can be a second SQLite file or a
+# second Postgres container; reads only go here inside replica_reads() blocks.
+DATABASE_REPLICA_ALIAS = 'replica'
+DATABASE_REPLICA_NAME = config('DATABASE_REPLICA_NAME', default='')
+if DATABASE_REPLICA_NAME:
+    DATABASES[DATABASE_REPLICA_ALIAS] = {
+        'ENGINE': config('DATABASE_REPLICA_ENGINE', default='django.db.backends.sqlite3'),
+        'NAME': DATABASE_REPLICA_NAME,
+        'HOST': config('DATABASE_REPLICA_HOST', default=''),
+        'PORT': config('DATABASE_REPLICA_PORT', default=''),
+        'USER': config('DATABASE_REPLICA_USER', default=''),
+        'PASSWORD': config('DATABASE_REPLICA_PASSWORD', default=''),
+        'TEST': {
+            'MIRROR': 'default',
+        }
+    }
+
+# Horizontal sharding of user-scoped tables. 'default' is shard 0 and also
+# holds the user directory; extra shards are local SQLite files unless
+# overridden. Run ``manage.py rebalance_shards`` after changing the count.
+DATABASE_SHARD_COUNT = config('DATABASE_SHARD_COUNT', default=1, cast=int)
+DATABASE_SHARDS = ['default'] + [f'shard_{i}' for i in range(1, DATABASE_SHARD_COUNT)]
+# Shards can have their own read replica (DATABASE_SHARD_<N>_REPLICA_NAME);
+# replica_reads() blocks then read sharded tables from it. Shard 0 uses the
+# primary's replica above.
+DATABASE_SHARD_REPLICAS = {}
+for _shard_alias in DATABASE_SHARDS[1:]:
+    DATABASES[_shard_alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': config(f'DATABASE_{_shard_alias.upper()}_NAME', default=str(BASE_DIR / f'db_{_shard_alias}.sqlite3')),
+        'OPTIONS': {
+            'timeout': 20,
+        }
+    }
+    _shard_replica_name = config(f'DATABASE_{_shard_alias.upper()}_REPLICA_NAME', default='')
+    if _shard_replica_name:
+        DATABASE_SHARD_REPLICAS[_shard_alias] = f'{_shard_alias}_replica'
+        DATABASES[f'{_shard_alias}_replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': _shard_replica_name,
+            'OPTIONS': {
+                'timeout': 20,
+            },
+            'TEST': {
+                'MIRROR': _shard_alias,
+            }
+        }
+
+DATABASE_ROUTERS = [
+    'apps.core.db_routers.ShardRouter',
+    'apps.core.db_routers.PrimaryReplicaRouter',
+]
+
 # Cache Configuration
 CACHES = {
     'default': {
@@ -152,6 +206,87 @@ WHATSAPP_ACCESS_TOKEN = config('WHATSAPP_ACCESS_TOKEN', default='')
 WHATSAPP_WEBHOOK_VERIFY_TOKEN = config('WHATSAPP_WEBHOOK_VERIFY_TOKEN', default='')
 WHATSAPP_PHONE_NUMBER_ID = config('WHATSAPP_PHONE_NUMBER_ID', default='')
 
+# Hot log retention: older rows are archived to gzip JSONL in storage
+NOTIFICATION_LOG_RETENTION_DAYS = config('NOTIFICATION_LOG_RETENTION_DAYS', default=30, cast=int)
+API_USAGE_LOG_RETENTION_DAYS = config('API_USAGE_LOG_RETENTION_DAYS', default=30, cast=int)
+
+# Notification fan-outs are dispatched as chords of batch tasks of this size
+NOTIFICATION_BATCH_SIZE = config('NOTIFICATION_BATCH_SIZE', default=500, cast=int)
+
+# Report charts are vector drawings in the PDF; also upload matplotlib PNGs
+REPORT_PNG_CHARTS = config('REPORT_PNG_CHARTS', default=False, cast=bool)
+
+# Weekly report delivery: 'html' (link), 'pdf' (attachment) or 'both'
+WEEKLY_REPORT_FORMAT = config('WEEKLY_REPORT_FORMAT', default='both')
+# Users per chunk streamed through the weekly report pipeline
+REPORT_PIPELINE_CHUNK_SIZE = config('REPORT_PIPELINE_CHUNK_SIZE', default=50, cast=int)
+# Render processes per report worker (0: one per core)
+REPORT_RENDER_PROCESSES = config('REPORT_RENDER_PROCESSES', default=0, cast=int)
+
+# Weekly report batches have their own queue. Prefork children are daemonic
+# and cannot start the render process pool, so serve this queue with a
+# non-prefork worker: ``celery -A config worker -Q reports -P solo``
+CELERY_TASK_ROUTES = {
+    'apps.notifications.tasks.generate_and_send_weekly_report_batch': {'queue': 'reports'},
+}
+REPORT_TEMPLATE_CACHE_DIR = config('REPORT_TEMPLATE_CACHE_DIR', default='')
+
+# Workout reminders overdue by more than this many minutes (e.g. after a
+# beat outage) are skipped and rescheduled for the next day
+WORKOUT_REMINDER_MAX_LATENESS = config('WORKOUT_REMINDER_MAX_LATENESS', default=60, cast=int)
+
+# GCRA rate limits as (requests, period_seconds[, burst]); see apps.core.ratelimit
+RATE_LIMITS = {
+    'http': (120, 60, 30),
+    # Incoming WhatsApp messages per sender number, checked before the OpenAI path
+    'whatsapp_number': (20, 60, 5),
+    # "Slow down" replies to a flooding number
+    'whatsapp_notice': (1, 600, 1),
+}
+RATE_LIMIT_TRUST_FORWARDED = config('RATE_LIMIT_TRUST_FORWARDED', default=False, cast=bool)
+
+# LLM quotas: plan ai_messages_limit per sliding window, optional per-plan caps
+# as {plan_type: (messages, window_seconds)}; 'local' keeps counters in-process
+AI_QUOTA_BACKEND = config('AI_QUOTA_BACKEND', default='redis')
+AI_QUOTA_WINDOW_SECONDS = config('AI_QUOTA_WINDOW_SECONDS', default=30 * 24 * 3600, cast=int)
+AI_FREE_MESSAGES_LIMIT = config('AI_FREE_MESSAGES_LIMIT', default=30, cast=int)
+AI_PLAN_RATE_LIMITS = {
+    'free': (2000, 3600),
+}
+
+# APIUsageLog rows are buffered in memory and bulk-written by a background thread
+API_USAGE_FLUSH_SECONDS = config('API_USAGE_FLUSH_SECONDS', default=5.0, cast=float)
+API_USAGE_BATCH_SIZE = config('API_USAGE_BATCH_SIZE', default=500, cast=int)
+# Extra/overriding prices, e.g. {'openai': {'gpt-4.1': {'input': Decimal('2'), 'output': Decimal('8')}}}
+API_PRICING = {}
+
+# Per-task/per-request query, DB, HTTP and wall time metrics (logger 'apps.metrics').
+# Budgets are keyed by task name or '<View>.<METHOD>'; see apps.core.instrumentation
+INSTRUMENTATION_ENABLED = config('INSTRUMENTATION_ENABLED', default=True, cast=bool)
+# Batch tasks may write once or twice per user (send log, status); another
+# query per user on top of that is an N+1 and blows the budget
+_BATCH_QUERY_BUDGET = {
+    'queries': 2 * NOTIFICATION_BATCH_SIZE + 50,
+    'repeated_queries': NOTIFICATION_BATCH_SIZE + 10,
+    'http_ms': None,
+    'wall_ms': None,
+}
+INSTRUMENTATION_BUDGETS = {
+    'default': {'queries': 100, 'repeated_queries': 20, 'db_ms': 1000, 'http_ms': 10000, 'wall_ms': 30000},
+    'WhatsAppWebhookView.POST': {'queries': 10, 'db_ms': 100, 'wall_ms': 500},
+    'apps.chatbot.whatsapp_handler.process_whatsapp_message': {'queries': 40, 'wall_ms': 15000},
+    'apps.notifications.tasks.send_weekly_checkin_batch': _BATCH_QUERY_BUDGET,
+    'apps.notifications.tasks.send_workout_reminder_batch': _BATCH_QUERY_BUDGET,
+    'apps.notifications.tasks.send_nutrition_tip_batch': _BATCH_QUERY_BUDGET,
+    'apps.notifications.tasks.send_reengagement_message_batch': _BATCH_QUERY_BUDGET,
+    'apps.notifications.tasks.send_milestone_celebration_batch': {'queries': 50, 'http_ms': None, 'wall_ms': None},
+    # Report chunks load per model, not per user
+    'apps.notifications.tasks.generate_and_send_weekly_report_batch': {
+        'queries': 2 * NOTIFICATION_BATCH_SIZE + 100, 'db_ms': 10000, 'http_ms': None, 'wall_ms': None
+    },
+    'apps.notifications.tasks.generate_monthly_report_batch': {'queries': 100, 'db_ms': 5000, 'wall_ms': None},
+}
+
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')